@@ -41,6 +41,22 @@ app.register_blueprint(predictions_bp, url_prefix='/api/predictions')
 app.register_blueprint(chat_bp, url_prefix='/api/chat')
 app.register_blueprint(history_bp, url_prefix='/api/history')
 
+# Keep weather for known user locations warm in the background. Under the
+# debug reloader only the serving child (WERKZEUG_RUN_MAIN) starts it; under
+# several gunicorn workers a file lock lets only one of them run it, and the
+# others read its results from the shared weather store.
+if os.getenv('WEATHER_PREFETCH_ENABLED', 'false').lower() == 'true' and \
+        (__name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+    from services.weather_prefetcher import start_weather_prefetcher
+    start_weather_prefetcher(app)
+
+# Load and time the routed models off the request path, so the first routed
+# prediction does not pay for profiling them
+if os.getenv('MODEL_ROUTER_WARM_UP', 'true').lower() == 'true' and \
+        (__name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+    from services.model_router import model_router
+    model_router.warm_up_in_background()
+
 @app.route('/')
 def home():
     return jsonify({"message": "Welcome to the Terra Scope API!"})
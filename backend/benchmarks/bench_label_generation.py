@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Row-wise vs vectorized fertility label generation for EnhancedFertilityPredictor
+Usage: python benchmarks/bench_label_generation.py [--skip-legacy-1m]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_models.enhanced_fertility_model import EnhancedFertilityPredictor
+
+
+def legacy_generate(n_samples):
+    """The previous implementation: DataFrame.apply with per-row noise"""
+    np.random.seed(42)
+    data = {
+        'ph': np.clip(np.random.normal(6.5, 1.2, n_samples), 3.5, 9.5),
+        'nitrogen': np.clip(np.random.gamma(2, 50, n_samples), 10, 500),
+        'phosphorus': np.clip(np.random.gamma(1.5, 15, n_samples), 5, 100),
+        'potassium': np.clip(np.random.gamma(2, 75, n_samples), 20, 400),
+        'organic_carbon': np.clip(np.random.gamma(1.2, 1.5, n_samples), 0.1, 8.0),
+        'moisture': np.clip(np.random.beta(2, 2, n_samples) * 50 + 10, 10, 60),
+    }
+    df = pd.DataFrame(data)
+    
+    def calculate_fertility_score(row):
+        score = 0
+        if 6.0 <= row['ph'] <= 7.5:
+            score += 25
+        elif 5.5 <= row['ph'] <= 8.0:
+            score += 15
+        else:
+            score += 5
+        score += 25 if row['nitrogen'] > 150 else 15 if row['nitrogen'] > 75 else 8
+        score += 20 if row['phosphorus'] > 25 else 12 if row['phosphorus'] > 15 else 6
+        score += 20 if row['potassium'] > 200 else 12 if row['potassium'] > 100 else 6
+        score += 10 if row['organic_carbon'] > 2.0 else 6 if row['organic_carbon'] > 1.0 else 3
+        score += np.random.normal(0, 5)
+        return max(0, min(100, score))
+    
+    df['fertility_score'] = df.apply(calculate_fertility_score, axis=1)
+    df['fertility_level'] = df['fertility_score'].apply(
+        lambda score: 'High' if score >= 70 else 'Medium' if score >= 50 else 'Low'
+    )
+    return df
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    predictor = EnhancedFertilityPredictor()
+    skip_legacy_1m = '--skip-legacy-1m' in sys.argv
+    
+    print("📊 Label generation benchmark")
+    for n in (5_000, 1_000_000):
+        fast_df, fast_seconds = timed(predictor._generate_realistic_training_data, n)
+        
+        if n > 5_000 and skip_legacy_1m:
+            print(f"   {n:>9,} rows: vectorized {fast_seconds:.3f}s (legacy skipped)")
+            continue
+        
+        legacy_df, legacy_seconds = timed(legacy_generate, n)
+        same = (np.allclose(legacy_df['fertility_score'], fast_df['fertility_score'])
+                and (legacy_df['fertility_level'] == fast_df['fertility_level']).all())
+        print(f"   {n:>9,} rows: legacy {legacy_seconds:.3f}s, vectorized {fast_seconds:.3f}s "
+              f"({legacy_seconds / fast_seconds:.0f}x faster, identical output: {same})")
+
+
+if __name__ == '__main__':
+    main()
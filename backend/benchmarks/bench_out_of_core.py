@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+In-memory vs out-of-core training: wall time and peak memory
+Each path runs in its own subprocess so peak RSS is measured separately.
+Usage: python benchmarks/bench_out_of_core.py [--rows 2000000] [--max-rows 500000]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from training.synthetic_shards import FEATURE_COLUMNS, generate_shards, load_dataframe
+
+
+def run_in_memory(dataset_dir, output_dir):
+    """The train_enhanced_model.py data flow: whole DataFrame, scaled copies, same model family"""
+    from sklearn.ensemble import HistGradientBoostingClassifier, HistGradientBoostingRegressor
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+
+    df = load_dataframe(dataset_dir)
+    X_train, X_test, y_score_train, _, y_level_train, _ = train_test_split(
+        df[FEATURE_COLUMNS], df['fertility_score'], df['fertility_level'], test_size=0.2, random_state=42
+    )
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    scaler.transform(X_test)
+    HistGradientBoostingRegressor(max_iter=200, max_depth=15, min_samples_leaf=20, random_state=42).fit(
+        X_train_scaled, y_score_train)
+    HistGradientBoostingClassifier(max_iter=150, learning_rate=0.1, max_depth=8, random_state=42).fit(
+        X_train_scaled, np.asarray(y_level_train, dtype=object))
+
+
+def run_streaming(dataset_dir, output_dir, max_rows):
+    from training.streaming import train_streaming
+    train_streaming(dataset_dir, output_dir=output_dir, max_rows=max_rows)
+
+
+def child(mode, dataset_dir, output_dir, max_rows):
+    start = time.perf_counter()
+    if mode == 'in_memory':
+        run_in_memory(dataset_dir, output_dir)
+    else:
+        run_streaming(dataset_dir, output_dir, max_rows)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'seconds': time.perf_counter() - start, 'peak_rss_mb': peak_kb / 1024}))
+
+
+def measure(mode, dataset_dir, output_dir, max_rows):
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', mode,
+         '--dataset-dir', dataset_dir, '--output-dir', output_dir, '--max-rows', str(max_rows)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--max-rows', type=int, default=500_000)
+    parser.add_argument('--child', choices=['in_memory', 'streaming'])
+    parser.add_argument('--dataset-dir')
+    parser.add_argument('--output-dir')
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.dataset_dir, args.output_dir, args.max_rows)
+        return
+
+    print(f"📊 Out-of-core training benchmark ({args.rows:,} rows, streaming cap {args.max_rows:,})")
+    with tempfile.TemporaryDirectory() as workdir:
+        dataset_dir = generate_shards(args.rows, cache_dir=os.path.join(workdir, 'shards'))
+        for mode in ('in_memory', 'streaming'):
+            result = measure(mode, dataset_dir, os.path.join(workdir, mode), args.max_rows)
+            print(f"   {mode:>9}: {result['seconds']:.1f}s, peak RSS {result['peak_rss_mb']:.0f} MB")
+
+
+if __name__ == '__main__':
+    main()
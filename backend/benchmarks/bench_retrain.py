@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Wall-clock comparison of incremental vs full retraining for the stacking model
+Usage: python benchmarks/bench_retrain.py [new_samples]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_models.fertility_model import FertilityPredictor
+
+
+def main():
+    n_new = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        predictor = FertilityPredictor(
+            model_path=os.path.join(tmp, 'trained_fertility_model.pkl'),
+            scaler_path=os.path.join(tmp, 'scaler.pkl')
+        )
+        
+        new_X, new_y = predictor.generate_synthetic_data(n_new, seed=7)
+        holdout_X, holdout_y = predictor.generate_synthetic_data(500, seed=99)
+        
+        start = time.perf_counter()
+        predictor.retrain_model(new_X, new_y)
+        incremental_seconds = time.perf_counter() - start
+        incremental_acc = predictor.model.score(predictor.scaler.transform(holdout_X), holdout_y)
+        
+        start = time.perf_counter()
+        predictor.retrain_model(new_X, new_y, full=True)
+        full_seconds = time.perf_counter() - start
+        full_acc = predictor.model.score(predictor.scaler.transform(holdout_X), holdout_y)
+    
+    print(f"\n📊 Retraining with {n_new} new samples:")
+    print(f"   Incremental: {incremental_seconds:.2f}s (holdout accuracy {incremental_acc:.3f})")
+    print(f"   Full:        {full_seconds:.2f}s (holdout accuracy {full_acc:.3f})")
+    print(f"   Speedup:     {full_seconds / incremental_seconds:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
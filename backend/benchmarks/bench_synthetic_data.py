@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Row-wise vs sharded synthetic soil data generation
+Usage: python benchmarks/bench_synthetic_data.py [--rows 10000000] [--workers 4]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from train_enhanced_model import generate_comprehensive_synthetic_data
+from training.synthetic_shards import generate_shards, load_dataframe
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--legacy-rows', type=int, default=10_000)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    print("📊 Synthetic data generation benchmark")
+    _, legacy_seconds = timed(generate_comprehensive_synthetic_data, args.legacy_rows)
+    legacy_rate = args.legacy_rows / legacy_seconds
+    print(f"   row-wise: {args.legacy_rows:,} rows in {legacy_seconds:.2f}s ({legacy_rate:,.0f} rows/s)")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        dataset_dir, cold_seconds = timed(generate_shards, args.rows, cache_dir=cache_dir, workers=args.workers)
+        _, warm_seconds = timed(generate_shards, args.rows, cache_dir=cache_dir, workers=args.workers)
+        df, load_seconds = timed(load_dataframe, dataset_dir)
+        sharded_rate = args.rows / cold_seconds
+        print(f"   sharded:  {args.rows:,} rows in {cold_seconds:.2f}s ({sharded_rate:,.0f} rows/s, "
+              f"{sharded_rate / legacy_rate:.0f}x faster)")
+        print(f"   cache hit {warm_seconds * 1000:.1f} ms, load into DataFrame {load_seconds:.2f}s "
+              f"({df.memory_usage(deep=True).sum() / 1024 / 1024:.0f} MB)")
+
+
+if __name__ == '__main__':
+    main()
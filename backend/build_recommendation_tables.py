@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Precompute the band-code recommendation lookup tables
+Run this script after changing a recommendation rule or its thresholds.
+
+Usage: python build_recommendation_tables.py [--output models/recommendation_tables.json]
+"""
+
+import argparse
+import os
+import sys
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import services.enhanced_predictor  # noqa: F401  (registers the predictor tables)
+import utils.recommendations  # noqa: F401  (registers the fertilizer table)
+from utils.recommendation_tables import TABLES_PATH, registered_tables, write_tables
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--output', default=TABLES_PATH)
+    args = parser.parse_args()
+
+    print("🧮 Building recommendation lookup tables")
+    tables = list(registered_tables().values())
+    built = write_tables(tables, args.output)
+    for table in tables:
+        print(f"   • {table.name}: {table.size} band combinations, "
+              f"{len(built[table.name]['payloads'])} distinct payloads")
+    print(f"✅ Tables written to {args.output}")
+
+if __name__ == '__main__':
+    main()
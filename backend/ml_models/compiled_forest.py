@@ -0,0 +1,89 @@
+"""
+Compiled inference for fitted scikit-learn random forests
+
+The trees of a fitted RandomForestClassifier are flattened once into shared
+node arrays (children, split feature, threshold, normalized leaf class
+distribution). Prediction then walks every tree for every row together, one
+tree level per NumPy step, instead of dispatching each tree through joblib as
+``RandomForestClassifier.predict`` does. That overhead dominates single-row
+and small-batch latency; past a few hundred rows sklearn's Cython traversal
+is faster again (see ``COMPILED_MAX_ROWS``).
+
+Splits compare the input cast to float32 against the stored thresholds,
+exactly as sklearn's tree code does, so predictions match the original
+forest.
+"""
+
+from typing import Any
+
+import numpy as np
+
+# Rows per traversal chunk; bounds the (rows x trees) work arrays
+BATCH_CHUNK_ROWS = 4096
+
+# Above this many rows the forest's own predict_proba wins (100 trees, 1 CPU:
+# 1 row 0.35 vs 5.9 ms, 64 rows 4.4 vs 8.5 ms, 256 rows 16 vs 13 ms)
+COMPILED_MAX_ROWS = 128
+
+class CompiledForest:
+    """Array-based predict/predict_proba for a fitted RandomForestClassifier"""
+
+    def __init__(self, forest: Any):
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        sizes = np.array([tree.node_count for tree in trees])
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+        left, right, feature, threshold, value = [], [], [], [], []
+        for tree, offset in zip(trees, offsets):
+            is_leaf = tree.children_left == -1
+            left.append(np.where(is_leaf, -1, tree.children_left + offset))
+            right.append(np.where(is_leaf, -1, tree.children_right + offset))
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+            counts = tree.value[:, 0, :]
+            totals = counts.sum(axis=1, keepdims=True)
+            value.append(counts / np.where(totals == 0, 1, totals))
+
+        self.left = np.concatenate(left).astype(np.intp)
+        self.right = np.concatenate(right).astype(np.intp)
+        self.feature = np.concatenate(feature).astype(np.intp)
+        self.threshold = np.concatenate(threshold)
+        self.value = np.concatenate(value)
+        self.roots = offsets.astype(np.intp)
+        self.classes_ = forest.classes_
+        self.n_features_in_ = forest.n_features_in_
+
+    def _leaves(self, X: np.ndarray) -> np.ndarray:
+        """Leaf node of every tree for every row, shape (rows, trees)"""
+        n_rows, n_trees = len(X), len(self.roots)
+        nodes = np.tile(self.roots, n_rows)
+        row_offsets = np.repeat(np.arange(n_rows) * X.shape[1], n_trees)
+        flat_X = X.ravel()
+
+        # Only (row, tree) pairs still at an internal node are advanced, so
+        # shallow trees stop costing anything once they reach their leaves
+        active = np.arange(n_rows * n_trees)
+        while active.size:
+            current = nodes[active]
+            left = self.left[current]
+            internal = left != -1
+            active, current, left = active[internal], current[internal], left[internal]
+            go_left = flat_X[row_offsets[active] + self.feature[current]] <= self.threshold[current]
+            nodes[active] = np.where(go_left, left, self.right[current])
+        return nodes.reshape(n_rows, n_trees)
+
+    def predict_proba(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected {self.n_features_in_} features, got {X.shape[1]}")
+
+        probabilities = np.empty((len(X), len(self.classes_)))
+        for start in range(0, len(X), BATCH_CHUNK_ROWS):
+            chunk = X[start:start + BATCH_CHUNK_ROWS]
+            probabilities[start:start + len(chunk)] = self.value[self._leaves(chunk)].mean(axis=1)
+        return probabilities
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
@@ -7,6 +7,127 @@ from sklearn.metrics import accuracy_score, classification_report
 import joblib
 import os
 
+from utils.crop_knowledge import crop_knowledge
+from utils.model_profiles import record_model_profile
+
+def calculate_fertility_scores(ph, nitrogen, phosphorus, potassium, organic_carbon, noise=0.0):
+    """Rule-based fertility score (0-100) for whole columns at once"""
+    # pH factor (optimal range 6.0-7.5)
+    score = np.select(
+        [(ph >= 6.0) & (ph <= 7.5), (ph >= 5.5) & (ph <= 8.0)], [25, 15], default=5
+    ).astype(np.float64)
+    
+    # Nitrogen factor (>150 = high, 75-150 = medium, <75 = low)
+    score += np.select([nitrogen > 150, nitrogen > 75], [25, 15], default=8)
+    
+    # Phosphorus factor (>25 = high, 15-25 = medium, <15 = low)
+    score += np.select([phosphorus > 25, phosphorus > 15], [20, 12], default=6)
+    
+    # Potassium factor (>200 = high, 100-200 = medium, <100 = low)
+    score += np.select([potassium > 200, potassium > 100], [20, 12], default=6)
+    
+    # Organic carbon factor (>2.0 = high, 1.0-2.0 = medium, <1.0 = low)
+    score += np.select([organic_carbon > 2.0, organic_carbon > 1.0], [10, 6], default=3)
+    
+    # Add some randomness to make it more realistic
+    score += noise
+    
+    return np.clip(score, 0, 100)
+
+def scores_to_levels(scores):
+    """Map fertility scores to High (>=70), Medium (>=50) and Low"""
+    return np.select([scores >= 70, scores >= 50], ['High', 'Medium'], default='Low')
+
+# Crop suitability requirements, one array entry per crop (from the shared knowledge store)
+_MODEL_CROPS = crop_knowledge.source_table('suitability_model')
+CROP_NAMES = np.array(list(_MODEL_CROPS))
+CROP_TYPES = np.array([crop['type'] for crop in _MODEL_CROPS.values()])
+CROP_PH_MIN = np.array([crop['ph_range'][0] for crop in _MODEL_CROPS.values()], dtype=np.float64)
+CROP_PH_MAX = np.array([crop['ph_range'][1] for crop in _MODEL_CROPS.values()], dtype=np.float64)
+CROP_N_MIN = np.array([crop['nitrogen_min'] for crop in _MODEL_CROPS.values()], dtype=np.float64)
+CROP_P_MIN = np.array([crop['phosphorus_min'] for crop in _MODEL_CROPS.values()], dtype=np.float64)
+CROP_K_MIN = np.array([crop['potassium_min'] for crop in _MODEL_CROPS.values()], dtype=np.float64)
+CROP_MOISTURE_MIN = np.array([crop['moisture_min'] for crop in _MODEL_CROPS.values()], dtype=np.float64)
+
+PH_FACTORS = np.array(['Optimal pH', 'Acceptable pH', 'pH needs adjustment'])
+N_FACTORS = np.array(['Low nitrogen', 'Adequate nitrogen'])
+P_FACTORS = np.array(['Needs phosphorus', 'Good phosphorus'])
+
+def crop_suitability_matrix(samples):
+    """Score every crop for every sample in one pass.
+    
+    ``samples`` is an (n, 6) array of (ph, n, p, k, oc, moisture) rows.
+    Returns a dict of (n, crops) arrays: ``scores`` plus the codes behind
+    the first three suitability factors (``ph_code``, ``n_ok``, ``p_ok``).
+    """
+    samples = np.atleast_2d(np.asarray(samples, dtype=np.float64))
+    ph, n, p, k, moisture = (samples[:, i:i + 1] for i in (0, 1, 2, 3, 5))
+    
+    # pH suitability: 0 = optimal, 1 = acceptable, 2 = needs adjustment
+    in_range = (ph >= CROP_PH_MIN) & (ph <= CROP_PH_MAX)
+    near_mid = np.abs(ph - (CROP_PH_MIN + CROP_PH_MAX) / 2) < 1.0
+    ph_code = np.where(in_range, 0, np.where(near_mid, 1, 2))
+    scores = np.array([25.0, 15.0, 5.0])[ph_code]
+    
+    # Nutrient suitability
+    n_ok = n >= CROP_N_MIN
+    scores += np.where(n_ok, 25, np.maximum(5, 20 - (CROP_N_MIN - n) // 10))
+    p_ok = p >= CROP_P_MIN
+    scores += np.where(p_ok, 20, np.maximum(5, 15 - (CROP_P_MIN - p) // 2))
+    scores += np.where(k >= CROP_K_MIN, 20, np.maximum(5, 15 - (CROP_K_MIN - k) // 15))
+    scores += np.where(moisture >= CROP_MOISTURE_MIN, 10, 5)
+    
+    return {'scores': scores, 'ph_code': ph_code, 'n_ok': n_ok, 'p_ok': p_ok}
+
+def rank_crops(scores):
+    """Crop indices per sample, best first, with their scores.
+    
+    Sorting is stable so ties keep catalogue order. Slice the result for
+    top-k; this stays fully vectorized for thousands of fields.
+    """
+    order = np.argsort(-scores, axis=1, kind='stable')
+    return order, np.take_along_axis(scores, order, axis=1)
+
+def suggest_crops_batch(samples, highly_k=5, moderately_k=3):
+    """Crop suggestions for many samples; same output as _generate_crop_suggestions"""
+    matrix = crop_suitability_matrix(samples)
+    scores = matrix['scores']
+    
+    order, ranked = rank_crops(scores)
+    high_mask = ranked >= 75
+    moderate_mask = (ranked >= 60) & ~high_mask
+    
+    # Convert once to Python objects; only the selected cells become dicts
+    order_rows = order.tolist()
+    high_rows = high_mask.tolist()
+    moderate_rows = moderate_mask.tolist()
+    score_rows = np.minimum(scores, 100).tolist()
+    ph_rows = PH_FACTORS[matrix['ph_code']].tolist()
+    n_rows = N_FACTORS[matrix['n_ok'].astype(int)].tolist()
+    p_rows = P_FACTORS[matrix['p_ok'].astype(int)].tolist()
+    names = CROP_NAMES.tolist()
+    types = CROP_TYPES.tolist()
+    
+    suggestions = []
+    for row, cols in enumerate(order_rows):
+        def crop_entry(col):
+            return {
+                'name': names[col],
+                'type': types[col],
+                'suitability_score': score_rows[row][col],
+                'season_match': True,
+                'factors': [ph_rows[row][col], n_rows[row][col], p_rows[row][col]]
+            }
+        
+        high = [col for col, keep in zip(cols, high_rows[row]) if keep][:highly_k]
+        moderate = [col for col, keep in zip(cols, moderate_rows[row]) if keep][:moderately_k]
+        suggestions.append({
+            'highly_suitable': [crop_entry(col) for col in high],
+            'moderately_suitable': [crop_entry(col) for col in moderate]
+        })
+    
+    return suggestions
+
 class EnhancedFertilityPredictor:
     def __init__(self):
         self.fertility_model = None
@@ -15,13 +136,19 @@ class EnhancedFertilityPredictor:
         self.label_encoder = LabelEncoder()
         self.is_trained = False
         
-        # Real agricultural data for training
-        self.training_data = self._generate_realistic_training_data()
+        # Training data is generated on first use (see training_data)
+        self._training_data = None
         
-    def _generate_realistic_training_data(self):
+    @property
+    def training_data(self):
+        """Synthetic training set, generated lazily when training needs it"""
+        if self._training_data is None:
+            self._training_data = self._generate_realistic_training_data()
+        return self._training_data
+    
+    def _generate_realistic_training_data(self, n_samples=5000):
         """Generate realistic training data based on agricultural research"""
         np.random.seed(42)
-        n_samples = 5000
         
         # Generate realistic soil parameter ranges
         data = {
@@ -41,72 +168,14 @@ class EnhancedFertilityPredictor:
         data['organic_carbon'] = np.clip(data['organic_carbon'], 0.1, 8.0)
         data['moisture'] = np.clip(data['moisture'], 10, 60)
         
-        df = pd.DataFrame(data)
-        
-        # Create realistic fertility scores based on multiple factors
-        def calculate_fertility_score(row):
-            score = 0
-            
-            # pH factor (optimal range 6.0-7.5)
-            ph_optimal = 6.0 <= row['ph'] <= 7.5
-            if ph_optimal:
-                score += 25
-            elif 5.5 <= row['ph'] <= 8.0:
-                score += 15
-            else:
-                score += 5
-            
-            # Nitrogen factor (>150 = high, 75-150 = medium, <75 = low)
-            if row['nitrogen'] > 150:
-                score += 25
-            elif row['nitrogen'] > 75:
-                score += 15
-            else:
-                score += 8
-            
-            # Phosphorus factor (>25 = high, 15-25 = medium, <15 = low)
-            if row['phosphorus'] > 25:
-                score += 20
-            elif row['phosphorus'] > 15:
-                score += 12
-            else:
-                score += 6
-            
-            # Potassium factor (>200 = high, 100-200 = medium, <100 = low)
-            if row['potassium'] > 200:
-                score += 20
-            elif row['potassium'] > 100:
-                score += 12
-            else:
-                score += 6
-            
-            # Organic carbon factor (>2.0 = high, 1.0-2.0 = medium, <1.0 = low)
-            if row['organic_carbon'] > 2.0:
-                score += 10
-            elif row['organic_carbon'] > 1.0:
-                score += 6
-            else:
-                score += 3
-            
-            # Add some randomness to make it more realistic
-            score += np.random.normal(0, 5)
-            
-            return max(0, min(100, score))
-        
-        df['fertility_score'] = df.apply(calculate_fertility_score, axis=1)
-        
-        # Create fertility levels
-        def score_to_level(score):
-            if score >= 70:
-                return 'High'
-            elif score >= 50:
-                return 'Medium'
-            else:
-                return 'Low'
-        
-        df['fertility_level'] = df['fertility_score'].apply(score_to_level)
-        
-        return df
+        data['fertility_score'] = calculate_fertility_scores(
+            data['ph'], data['nitrogen'], data['phosphorus'],
+            data['potassium'], data['organic_carbon'],
+            noise=np.random.normal(0, 5, n_samples)
+        )
+        data['fertility_level'] = scores_to_levels(data['fertility_score'])
+        
+        return pd.DataFrame(data)
     
     def _generate_fertilizer_recommendations(self, soil_params):
         """Generate intelligent fertilizer recommendations"""
@@ -200,91 +269,7 @@ class EnhancedFertilityPredictor:
     
     def _generate_crop_suggestions(self, fertility_level, soil_params):
         """Generate crop suggestions based on soil conditions"""
-        ph, n, p, k, oc, moisture = soil_params
-        
-        highly_suitable = []
-        moderately_suitable = []
-        
-        # Crop suitability matrix based on soil parameters
-        crops_db = {
-            'Rice': {'ph_range': (5.5, 7.0), 'n_min': 80, 'p_min': 15, 'k_min': 100, 'moisture_min': 25},
-            'Wheat': {'ph_range': (6.0, 7.5), 'n_min': 100, 'p_min': 20, 'k_min': 120, 'moisture_min': 15},
-            'Corn': {'ph_range': (6.0, 7.0), 'n_min': 120, 'p_min': 25, 'k_min': 150, 'moisture_min': 20},
-            'Barley': {'ph_range': (6.0, 8.0), 'n_min': 80, 'p_min': 18, 'k_min': 100, 'moisture_min': 12},
-            'Soybeans': {'ph_range': (6.0, 7.5), 'n_min': 60, 'p_min': 25, 'k_min': 140, 'moisture_min': 18},
-            'Cotton': {'ph_range': (5.8, 8.0), 'n_min': 100, 'p_min': 30, 'k_min': 180, 'moisture_min': 15},
-            'Sugarcane': {'ph_range': (6.0, 7.5), 'n_min': 150, 'p_min': 35, 'k_min': 200, 'moisture_min': 25},
-            'Potatoes': {'ph_range': (4.8, 6.5), 'n_min': 120, 'p_min': 40, 'k_min': 250, 'moisture_min': 20},
-            'Tomatoes': {'ph_range': (6.0, 7.0), 'n_min': 150, 'p_min': 45, 'k_min': 220, 'moisture_min': 22},
-            'Onions': {'ph_range': (6.0, 7.5), 'n_min': 100, 'p_min': 35, 'k_min': 180, 'moisture_min': 18},
-        }
-        
-        for crop, requirements in crops_db.items():
-            score = 0
-            factors = []
-            
-            # pH suitability
-            ph_min, ph_max = requirements['ph_range']
-            if ph_min <= ph <= ph_max:
-                score += 25
-                factors.append('Optimal pH')
-            elif abs(ph - (ph_min + ph_max)/2) < 1.0:
-                score += 15
-                factors.append('Acceptable pH')
-            else:
-                score += 5
-                factors.append('pH needs adjustment')
-            
-            # Nutrient suitability
-            if n >= requirements['n_min']:
-                score += 25
-                factors.append('Adequate nitrogen')
-            else:
-                score += max(5, 20 - (requirements['n_min'] - n) // 10)
-                factors.append('Low nitrogen')
-            
-            if p >= requirements['p_min']:
-                score += 20
-                factors.append('Good phosphorus')
-            else:
-                score += max(5, 15 - (requirements['p_min'] - p) // 2)
-                factors.append('Needs phosphorus')
-            
-            if k >= requirements['k_min']:
-                score += 20
-                factors.append('Sufficient potassium')
-            else:
-                score += max(5, 15 - (requirements['k_min'] - k) // 15)
-                factors.append('Low potassium')
-            
-            if moisture >= requirements['moisture_min']:
-                score += 10
-                factors.append('Good moisture')
-            else:
-                score += 5
-                factors.append('Needs irrigation')
-            
-            crop_data = {
-                'name': crop,
-                'type': 'cereal' if crop in ['Rice', 'Wheat', 'Corn', 'Barley'] else 'cash_crop',
-                'suitability_score': min(100, score),
-                'season_match': True,
-                'factors': factors[:3]  # Top 3 factors
-            }
-            
-            if score >= 75:
-                highly_suitable.append(crop_data)
-            elif score >= 60:
-                moderately_suitable.append(crop_data)
-        
-        # Sort by suitability score
-        highly_suitable.sort(key=lambda x: x['suitability_score'], reverse=True)
-        moderately_suitable.sort(key=lambda x: x['suitability_score'], reverse=True)
-        
-        return {
-            'highly_suitable': highly_suitable[:5],
-            'moderately_suitable': moderately_suitable[:3]
-        }
+        return suggest_crops_batch([soil_params])[0]
     
     def train_model(self):
         """Train the fertility prediction model"""
@@ -336,6 +321,7 @@ class EnhancedFertilityPredictor:
         
         # Save models
         self._save_models()
+        record_model_profile('enhanced_6f', level_accuracy, score_r2=float(score_accuracy))
         
         return {
             'score_r2': score_accuracy,
@@ -422,7 +408,7 @@ class EnhancedFertilityPredictor:
         model_dir = os.path.dirname(__file__)
         joblib.dump(self.fertility_model, os.path.join(model_dir, 'fertility_score_model.pkl'))
         joblib.dump(self.recommendation_model, os.path.join(model_dir, 'fertility_level_model.pkl'))
-        joblib.dump(self.scaler, os.path.join(model_dir, 'scaler.pkl'))
+        joblib.dump(self.scaler, os.path.join(model_dir, 'enhanced_scaler.pkl'))
         joblib.dump(self.label_encoder, os.path.join(model_dir, 'label_encoder.pkl'))
         print("Models saved successfully!")
     
@@ -432,7 +418,7 @@ class EnhancedFertilityPredictor:
             model_dir = os.path.dirname(__file__)
             self.fertility_model = joblib.load(os.path.join(model_dir, 'fertility_score_model.pkl'))
             self.recommendation_model = joblib.load(os.path.join(model_dir, 'fertility_level_model.pkl'))
-            self.scaler = joblib.load(os.path.join(model_dir, 'scaler.pkl'))
+            self.scaler = joblib.load(os.path.join(model_dir, 'enhanced_scaler.pkl'))
             self.label_encoder = joblib.load(os.path.join(model_dir, 'label_encoder.pkl'))
             self.is_trained = True
             print("Models loaded successfully!")
@@ -2,14 +2,66 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.user import User
 from models.soil_data import SoilData
-from services.enhanced_predictor import enhanced_predictor
-from utils.weather import get_weather_data
+from services.enhanced_predictor import enhanced_predictor, MICRONUTRIENT_FIELD_MAP
+from utils.weather import get_weather_data, get_weather_cache_metrics
 from utils.recommendations import get_fertilizer_recommendations, get_crop_suggestions
+from services.retraining import submit_retrain_job, get_job_status, list_jobs
+from services.model_router import model_router, PROFILE_SAMPLE
+from services.weather_prefetcher import get_prefetcher_metrics
 from database import db
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 import json
+import os
+import time
 
 predictions_bp = Blueprint('predictions', __name__)
 
+# Weather is fetched on these threads while the request thread runs inference;
+# both share one deadline so a slow weather API never stalls the response
+PREDICTION_DEADLINE_SECONDS = float(os.getenv('PREDICTION_DEADLINE_SECONDS', '2.0'))
+_weather_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='weather')
+
+# Extra time a thread waiting on another request's fetch keeps waiting after
+# the deadline, so the request itself reports 'pending' first
+WEATHER_WAIT_GRACE_SECONDS = 0.1
+
+def _start_weather_fetch(location, deadline):
+    """Submit the weather lookup, or return None if the user has no location"""
+    if not location:
+        return None
+    return _weather_executor.submit(_weather_until, location, deadline)
+
+def _weather_until(location, deadline):
+    """
+    Weather lookup that stops waiting on another request's fetch at the deadline
+    
+    Only the request that actually calls the provider runs past the deadline,
+    so waiting threads do not pile up in the executor during an outage.
+    """
+    wait_timeout = max(0.0, deadline - time.monotonic()) + WEATHER_WAIT_GRACE_SECONDS
+    return get_weather_data(location, wait_timeout=wait_timeout)
+
+def _finish_weather_fetch(future, deadline):
+    """
+    Wait for the weather lookup until the shared deadline
+    
+    Returns (weather_data, status) where status is 'ok', 'pending' (still
+    running when the deadline passed) or 'unavailable' (no location or the
+    lookup failed).
+    """
+    if future is None:
+        return {}, 'unavailable'
+    try:
+        return future.result(timeout=max(0.0, deadline - time.monotonic())), 'ok'
+    except FutureTimeoutError:
+        return {}, 'pending'
+    except Exception as e:
+        print(f"Weather lookup failed: {e}")
+        return {}, 'unavailable'
+
+# Request fields used only by the 12-feature micronutrient model
+LAB_FIELDS = ['ec', 'zinc', 'iron', 'copper', 'manganese', 'boron']
+
 @predictions_bp.route('/fertility', methods=['POST'])
 @jwt_required()
 def predict_fertility():
@@ -31,7 +83,6 @@ def predict_fertility():
             'organic_matter': float(data.get('organicCarbon', 2.5)),  # Map to organic_matter
             'moisture': float(data.get('moisture', 25)),
             'temperature': float(data.get('temperature', 22)),
-            'sulfur': float(data.get('sulfur', 20)),
             'magnesium': float(data.get('magnesium', 50)),
             'calcium': float(data.get('calcium', 500)),
             'clay': float(data.get('clay', 25)),
@@ -39,10 +90,17 @@ def predict_fertility():
             'sand': float(data.get('sand', 40))
         }
         
-        # Get weather data if location is available
-        weather_data = {}
-        if user.location:
-            weather_data = get_weather_data(user.location)
+        # Lab-only fields and sulfur are passed on only when sent, so the
+        # micronutrient model imputes what is missing rather than using defaults
+        for field in LAB_FIELDS + ['sulfur']:
+            if data.get(field) is not None:
+                soil_params[field] = float(data[field])
+        if data.get('organicCarbon') is not None:
+            soil_params['organic_carbon'] = float(data['organicCarbon'])
+        
+        # Fetch weather in the background while the model runs
+        deadline = time.monotonic() + PREDICTION_DEADLINE_SECONDS
+        weather_future = _start_weather_fetch(user.location, deadline)
         
         # Make prediction using enhanced model
         prediction_result = enhanced_predictor.predict_fertility(soil_params)
@@ -66,12 +124,17 @@ def predict_fertility():
             latest_soil.crop_suggestions = json.dumps(crop_suggestions)
             db.session.commit()
         
-        return jsonify({
+        weather_data, weather_status = _finish_weather_fetch(weather_future, deadline)
+        response = {
             'fertility': fertility_prediction,
             'fertilizer_recommendations': fertilizer_recs,
             'crop_recommendations': crop_suggestions,
-            'weather_impact': weather_data
-        }), 200
+            'weather_impact': weather_data,
+            'weather_status': weather_status
+        }
+        if 'micronutrient_assessment' in prediction_result:
+            response['micronutrient_assessment'] = prediction_result['micronutrient_assessment']
+        return jsonify(response), 200
         
     except ValueError as e:
         return jsonify({'error': 'Invalid input values'}), 400
@@ -103,7 +166,6 @@ def analyze_latest_soil():
             'organic_matter': latest_soil.organic_carbon,
             'moisture': latest_soil.moisture,
             'temperature': 22.0,  # Default temperature
-            'sulfur': 20.0,      # Default sulfur
             'magnesium': 50.0,   # Default magnesium
             'calcium': 500.0,    # Default calcium
             'clay': 25.0,        # Default clay
@@ -111,10 +173,9 @@ def analyze_latest_soil():
             'sand': 40.0         # Default sand
         }
         
-        # Get weather data
-        weather_data = {}
-        if user.location:
-            weather_data = get_weather_data(user.location)
+        # Fetch weather in the background while the model runs
+        deadline = time.monotonic() + PREDICTION_DEADLINE_SECONDS
+        weather_future = _start_weather_fetch(user.location, deadline)
         
         # Make prediction using enhanced model
         prediction_result = enhanced_predictor.predict_fertility(soil_params)
@@ -136,6 +197,7 @@ def analyze_latest_soil():
         latest_soil.crop_suggestions = json.dumps(crop_suggestions)
         db.session.commit()
         
+        weather_data, weather_status = _finish_weather_fetch(weather_future, deadline)
         return jsonify({
             'soilData': {
                 'id': latest_soil.id,
@@ -152,8 +214,157 @@ def analyze_latest_soil():
             'fertility': fertility_prediction,
             'fertilizer_recommendations': fertilizer_recs,
             'crop_recommendations': crop_suggestions,
-            'weather_impact': weather_data
+            'weather_impact': weather_data,
+            'weather_status': weather_status
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+RETRAIN_FEATURES = ['ph', 'nitrogen', 'phosphorus', 'potassium',
+                    'organic_carbon', 'moisture', 'temperature', 'rainfall']
+FERTILITY_LABELS = {'Low': 0, 'Medium': 1, 'High': 2}
+
+def _retrain_classes():
+    """Class labels of the stacking model that /retrain updates"""
+    predictor = model_router.models['stacking'].ensure_loaded(PROFILE_SAMPLE)
+    return {int(label) for label in predictor.model.classes_}
+
+@predictions_bp.route('/retrain', methods=['POST'])
+@jwt_required()
+def start_retraining():
+    """Queue a background retraining job with newly labelled soil samples
+    
+    Retrains the stacking model, which is served through /fertility/routed.
+    /fertility keeps using the enhanced predictor's own models, which this
+    job does not touch.
+    """
+    try:
+        data = request.get_json() or {}
+        samples = data.get('samples', [])
+        
+        if not samples:
+            return jsonify({'error': 'samples are required'}), 400
+        
+        new_data = []
+        new_labels = []
+        for sample in samples:
+            new_data.append([float(sample[feature]) for feature in RETRAIN_FEATURES])
+            label = sample['fertility_level']
+            new_labels.append(FERTILITY_LABELS[label] if label in FERTILITY_LABELS else int(label))
+        
+        # Unknown classes would only fail later inside the worker process
+        classes = _retrain_classes()
+        unknown = sorted(set(new_labels) - classes)
+        if unknown:
+            return jsonify({'error': f'Unknown fertility_level {unknown}; expected one of '
+                                     f'{sorted(classes)} or {list(FERTILITY_LABELS)}'}), 400
+        
+        job = submit_retrain_job(new_data, new_labels, full=bool(data.get('full', False)))
+        return jsonify({'job': job}), 202
+        
+    except (KeyError, ValueError) as e:
+        return jsonify({'error': f'Invalid sample: {e}'}), 400
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 409
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@predictions_bp.route('/retrain', methods=['GET'])
+@jwt_required()
+def list_retraining_jobs():
+    try:
+        return jsonify({'jobs': list_jobs()}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@predictions_bp.route('/retrain/<job_id>', methods=['GET'])
+@jwt_required()
+def get_retraining_status(job_id):
+    try:
+        job = get_job_status(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify({'job': job}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@predictions_bp.route('/fertility/routed', methods=['POST'])
+@jwt_required()
+def predict_fertility_routed():
+    """Predict with the cheapest model that meets the requested accuracy tier"""
+    try:
+        data = request.get_json() or {}
+        tier = data.get('accuracyTier', 'standard')
+        
+        # Only fields the caller actually sent are passed on, so the router
+        # can tell which models have all of their inputs
+        field_map = {
+            'ph': 'ph', 'nitrogen': 'nitrogen', 'phosphorus': 'phosphorus', 'potassium': 'potassium',
+            'organicCarbon': 'organic_carbon', 'moisture': 'moisture', 'temperature': 'temperature',
+            'rainfall': 'rainfall', 'sulfur': 'sulfur', 'magnesium': 'magnesium', 'calcium': 'calcium',
+            'clay': 'clay', 'silt': 'silt', 'sand': 'sand', 'ec': 'ec', 'zinc': 'zinc', 'iron': 'iron',
+            'copper': 'copper', 'manganese': 'manganese', 'boron': 'boron'
+        }
+        soil_params = {
+            param: float(data[field]) for field, param in field_map.items()
+            if data.get(field) is not None
+        }
+        if 'organic_carbon' in soil_params:
+            soil_params['organic_matter'] = soil_params['organic_carbon']
+        
+        # The micronutrient model returns its own 3-class level and no score,
+        # so it is only considered when the caller sets requireScore to false
+        result = model_router.predict(soil_params, tier, require_score=bool(data.get('requireScore', True)))
+        return jsonify({'fertility': result}), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e) or 'Invalid input values'}), 400
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 422
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _micronutrient_params(sample):
+    """Request sample -> slot fields; absent values stay None and are imputed"""
+    params = {}
+    for field in MICRONUTRIENT_FIELD_MAP.values():
+        key = 'organicCarbon' if field == 'organic_carbon' else field
+        value = sample.get(key, sample.get(field))
+        params[field] = float(value) if value is not None else None
+    return params
+
+@predictions_bp.route('/fertility/micronutrient', methods=['POST'])
+@jwt_required()
+def predict_micronutrient_fertility():
+    """12-feature lab model; accepts one sample or {"samples": [...]} for a batch"""
+    try:
+        data = request.get_json() or {}
+        slot = enhanced_predictor.micronutrient
+        if not slot.is_available():
+            return jsonify({'error': 'Micronutrient model or its preprocessing parameters are missing '
+                                     '(run train_micronutrient_model.py)'}), 503
+        
+        if 'samples' in data:
+            samples = [_micronutrient_params(sample) for sample in data['samples']]
+            return jsonify({'predictions': slot.predict_batch(samples)}), 200
+        return jsonify({'prediction': slot.predict(_micronutrient_params(data))}), 200
+        
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e) or 'Invalid input values'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@predictions_bp.route('/metrics', methods=['GET'])
+@jwt_required()
+def get_prediction_metrics():
+    """Model routing choices, per-model cost profiles, inference latency, weather cache and prefetcher"""
+    try:
+        return jsonify({
+            'router': model_router.get_metrics(),
+            'predictor': enhanced_predictor.get_latency_metrics(),
+            'weather_cache': get_weather_cache_metrics(),
+            'weather_prefetch': get_prefetcher_metrics()
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
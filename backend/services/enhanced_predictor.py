@@ -5,17 +5,339 @@ Uses the newly trained ML models for realistic soil fertility predictions
 """
 
 import joblib
+import json
 import pandas as pd
 import numpy as np
 import os
 import random
-from typing import Dict, List, Any
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Any, Optional
+
+from ml_models.compiled_forest import CompiledForest, COMPILED_MAX_ROWS
+from utils.crop_knowledge import crop_knowledge
+from utils.recommendation_tables import Axis, RecommendationTable, above
+
+# Request field for each feature of the notebook's micronutrient model
+MICRONUTRIENT_FIELD_MAP = {
+    'N': 'nitrogen', 'P': 'phosphorus', 'K': 'potassium', 'pH': 'ph',
+    'EC': 'ec', 'OC': 'organic_carbon', 'S': 'sulfur', 'Zn': 'zinc',
+    'Fe': 'iron', 'Cu': 'copper', 'Mn': 'manganese', 'B': 'boron'
+}
+
+# Lab-only fields; their presence in a request is what makes the slot worth running
+MICRONUTRIENT_ONLY_FIELDS = ('ec', 'zinc', 'iron', 'copper', 'manganese', 'boron')
+
+# Class labels of the notebook dataset's "Output" column
+MICRONUTRIENT_CLASS_LABELS = {0: 'Less Fertile', 1: 'Fertile', 2: 'Highly Fertile'}
+
+def _fertilizer_rules(values: Dict[str, Any]) -> List[str]:
+    """Fertilizer rules behind get_fertilizer_recommendations, enumerated into FERTILIZER_TABLE"""
+    recommendations = []
+    fertility_score = values['fertility_score']
+    
+    nitrogen = values.get('nitrogen', 100)
+    phosphorus = values.get('phosphorus', 30)
+    potassium = values.get('potassium', 150)
+    ph = values.get('ph', 6.5)
+    magnesium = values.get('magnesium', 50)
+    calcium = values.get('calcium', 500)
+    sulfur = values.get('sulfur', 20)
+    
+    # Nitrogen recommendations
+    if nitrogen < 80:
+        if ph < 6.5:
+            recommendations.append("Calcium Nitrate (improves pH)")
+        else:
+            recommendations.append("Urea (high nitrogen content)")
+    elif nitrogen < 120:
+        recommendations.append("Ammonium Sulfate (balanced N+S)")
+    
+    # Phosphorus recommendations
+    if phosphorus < 25:
+        recommendations.append("DAP (Diammonium Phosphate)")
+    elif phosphorus < 40:
+        recommendations.append("Superphosphate")
+    
+    # Potassium recommendations
+    if potassium < 120:
+        recommendations.append("Potassium Chloride (Muriate of Potash)")
+    elif potassium < 180:
+        recommendations.append("Potassium Sulfate")
+    
+    # Secondary nutrients
+    if magnesium < 50:
+        recommendations.append("Epsom Salt (Magnesium Sulfate)")
+    
+    if calcium < 400:
+        if ph < 6.0:
+            recommendations.append("Lime (Calcium Carbonate)")
+        else:
+            recommendations.append("Gypsum (Calcium Sulfate)")
+    
+    if sulfur < 20:
+        recommendations.append("Elemental Sulfur")
+    
+    # pH adjustments
+    if ph < 5.5:
+        recommendations.append("Agricultural Lime (pH adjustment)")
+    elif ph > 8.0:
+        recommendations.append("Sulfur (pH reduction)")
+    
+    # If no specific deficiencies or if high fertility
+    if not recommendations or fertility_score > 75:
+        if fertility_score > 80:
+            recommendations = ["Balanced NPK (10-10-10)", "Compost", "Organic Fertilizer"]
+        else:
+            recommendations.append("NPK Complex (20-20-20)")
+    
+    # Limit recommendations to top 3-4
+    return recommendations[:4] if len(recommendations) > 4 else recommendations
+
+def _crop_rules(values: Dict[str, Any]) -> List[str]:
+    """Candidate crops behind get_crop_recommendations, enumerated into CROP_TABLE"""
+    crops = []
+    fertility_score = values['fertility_score']
+    
+    ph = values.get('ph', 6.5)
+    moisture = values.get('moisture', 25)
+    temperature = values.get('temperature', 22)
+    clay = values.get('clay', 25)
+    sand = values.get('sand', 40)
+    nitrogen = values.get('nitrogen', 100)
+    
+    # pH-based recommendations
+    if ph < 6.0:  # Acidic soil lovers
+        crops.extend(crop_knowledge.group('acidic_soil'))
+    elif ph > 7.5:  # Alkaline soil tolerant
+        crops.extend(crop_knowledge.group('alkaline_soil'))
+    else:  # Neutral pH crops
+        crops.extend(crop_knowledge.group('neutral_soil'))
+    
+    # Temperature-based recommendations
+    if temperature < 18:
+        crops.extend(crop_knowledge.group('cool_climate'))
+    elif temperature > 28:
+        crops.extend(crop_knowledge.group('hot_climate'))
+    else:
+        crops.extend(crop_knowledge.group('mild_climate'))
+    
+    # Soil texture based
+    if sand > 60:  # Sandy soil
+        crops.extend(crop_knowledge.group('sandy_soil'))
+    elif clay > 40:  # Clay soil
+        crops.extend(crop_knowledge.group('clay_soil'))
+    else:  # Loamy soil
+        crops.extend(crop_knowledge.group('loamy_soil'))
+    
+    # Fertility-based recommendations
+    if fertility_score > 75:
+        crops.extend(crop_knowledge.group('high_fertility'))
+    elif fertility_score < 45:
+        crops.extend(crop_knowledge.group('low_fertility'))
+    
+    # Moisture-based recommendations
+    if moisture > 35:
+        crops.extend(crop_knowledge.group('wet_soil'))
+    elif moisture < 20:
+        crops.extend(crop_knowledge.group('dry_soil'))
+    
+    # Remove duplicates, keeping the first mention
+    return list(dict.fromkeys(crops))
+
+FERTILIZER_TABLE = RecommendationTable('predictor_fertilizers', (
+    Axis('nitrogen', 100, cuts=(80, 120)),
+    Axis('phosphorus', 30, cuts=(25, 40)),
+    Axis('potassium', 150, cuts=(120, 180)),
+    Axis('ph', 6.5, cuts=(5.5, 6.0, 6.5, above(8.0))),
+    Axis('magnesium', 50, cuts=(50,)),
+    Axis('calcium', 500, cuts=(400,)),
+    Axis('sulfur', 20, cuts=(20,)),
+    Axis('fertility_score', 50, cuts=(above(75), above(80)))
+), _fertilizer_rules)
+
+CROP_TABLE = RecommendationTable('predictor_crops', (
+    Axis('ph', 6.5, cuts=(6.0, above(7.5))),
+    Axis('temperature', 22, cuts=(18, above(28))),
+    Axis('sand', 40, cuts=(above(60),)),
+    Axis('clay', 25, cuts=(above(40),)),
+    Axis('fertility_score', 50, cuts=(45, above(75))),
+    Axis('moisture', 25, cuts=(20, above(35)))
+), _crop_rules, depends_on=crop_knowledge.groups)
+
+class LatencyStats:
+    """Call count, moving average and recent percentiles of one inference path"""
+    
+    def __init__(self, window: int = 512, alpha: float = 0.2):
+        self.recent = deque(maxlen=window)
+        self.alpha = alpha
+        self.calls = 0
+        self.rows = 0
+        self.ewma_ms = None
+        self.lock = threading.Lock()
+    
+    def record(self, elapsed_ms: float, rows: int = 1) -> None:
+        with self.lock:
+            self.calls += 1
+            self.rows += rows
+            self.recent.append(elapsed_ms)
+            self.ewma_ms = elapsed_ms if self.ewma_ms is None else self.ewma_ms + self.alpha * (elapsed_ms - self.ewma_ms)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        with self.lock:
+            recent = sorted(self.recent)
+            calls, rows, ewma = self.calls, self.rows, self.ewma_ms
+        
+        def percentile(q):
+            return round(recent[min(len(recent) - 1, int(q * len(recent)))], 3) if recent else None
+        
+        return {
+            'calls': calls,
+            'rows': rows,
+            'ewma_ms': round(ewma, 3) if ewma is not None else None,
+            'p50_ms': percentile(0.5),
+            'p95_ms': percentile(0.95)
+        }
+
+class MicronutrientModelSlot:
+    """
+    The notebook's 12-feature RandomForest (train_micronutrient_model.py artifacts)
+    
+    Loaded on first use. Request fields are mapped to feature_order.txt with
+    plain lists; missing values take the training medians and are scaled with
+    the saved scaler parameters, as the notebook's ColumnTransformer did.
+    The forest was trained on standardized features, so the slot only serves
+    when those parameters exist: micronutrient_preprocessing.json, or the
+    fitted micronutrient_preprocessor.joblib they are read from.
+    Single rows and small batches run through CompiledForest when the
+    artifact is a forest; large batches use the forest's own predict_proba.
+    """
+    
+    def __init__(self, models_dir: str):
+        self.model_path = os.path.join(models_dir, 'soil_fertility_rf_model.joblib')
+        self.feature_order_path = os.path.join(models_dir, 'feature_order.txt')
+        self.preprocessing_path = os.path.join(models_dir, 'micronutrient_preprocessing.json')
+        self.preprocessor_path = os.path.join(models_dir, 'micronutrient_preprocessor.joblib')
+        self.model = None
+        self.engine = None
+        self.loaded = False
+        self.single_latency = LatencyStats()
+        self.batch_latency = LatencyStats()
+        self.lock = threading.Lock()
+    
+    def is_available(self) -> bool:
+        return os.path.exists(self.model_path) and os.path.exists(self.feature_order_path) and \
+            (os.path.exists(self.preprocessing_path) or os.path.exists(self.preprocessor_path))
+    
+    def _preprocessing_params(self) -> Dict[str, List]:
+        """Imputer medians and scaler statistics, from the JSON copy or the fitted preprocessor"""
+        if os.path.exists(self.preprocessing_path):
+            with open(self.preprocessing_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        preprocessor = joblib.load(self.preprocessor_path)
+        numeric = preprocessor.named_transformers_['num']
+        features = next(columns for name, _, columns in preprocessor.transformers_ if name == 'num')
+        return {
+            'features': list(features),
+            'medians': numeric.named_steps['imputer'].statistics_.tolist(),
+            'mean': numeric.named_steps['scaler'].mean_.tolist(),
+            'scale': numeric.named_steps['scaler'].scale_.tolist()
+        }
+    
+    def ensure_loaded(self) -> bool:
+        with self.lock:
+            if self.loaded:
+                return True
+            if not self.is_available():
+                return False
+            
+            self.model = joblib.load(self.model_path)
+            with open(self.feature_order_path, 'r', encoding='utf-8') as f:
+                self.feature_order = [line.strip() for line in f if line.strip()]
+            self.fields = [MICRONUTRIENT_FIELD_MAP[name] for name in self.feature_order]
+            
+            params = self._preprocessing_params()
+            # Reorder in case the two files list features differently
+            index = {name: i for i, name in enumerate(params['features'])}
+            self.medians = np.array([params['medians'][index[name]] for name in self.feature_order])
+            self.mean = np.array([params['mean'][index[name]] for name in self.feature_order])
+            self.scale = np.array([params['scale'][index[name]] for name in self.feature_order])
+            
+            self.engine = CompiledForest(self.model) if hasattr(self.model, 'estimators_') else None
+            self.loaded = True
+            print("✅ Micronutrient model loaded")
+            return True
+    
+    def _matrix(self, samples: List[Dict[str, Any]]):
+        """Feature matrix in feature_order plus the fields imputed for each sample"""
+        X = np.array([[sample.get(field) for field in self.fields] for sample in samples], dtype=np.float64)
+        missing = np.isnan(X)
+        if missing.any():
+            X = np.where(missing, self.medians, X)
+        X = (X - self.mean) / self.scale
+        imputed = [[self.fields[j] for j in np.flatnonzero(row)] for row in missing]
+        return X, imputed
+    
+    def _predict_matrix(self, X: np.ndarray):
+        if self.engine is not None and len(X) <= COMPILED_MAX_ROWS:
+            probabilities = self.engine.predict_proba(X)
+            return self.engine.classes_[np.argmax(probabilities, axis=1)], probabilities
+        probabilities = self.model.predict_proba(X) if hasattr(self.model, 'predict_proba') else None
+        return self.model.predict(X), probabilities
+    
+    def _format(self, label, probabilities, imputed) -> Dict[str, Any]:
+        key = label.item() if hasattr(label, 'item') else label
+        return {
+            'fertility_class': key,
+            'fertility_level': MICRONUTRIENT_CLASS_LABELS.get(key, str(key)),
+            'probabilities': {str(c): round(float(p), 4) for c, p in zip(self.model.classes_, probabilities)}
+                             if probabilities is not None else None,
+            'imputed_fields': imputed,
+            'model': 'micronutrient_rf'
+        }
+    
+    def predict(self, soil_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Single-sample prediction"""
+        if not self.ensure_loaded():
+            raise RuntimeError("Micronutrient model artifacts not found")
+        start = time.perf_counter()
+        X, imputed = self._matrix([soil_data])
+        labels, probabilities = self._predict_matrix(X)
+        self.single_latency.record((time.perf_counter() - start) * 1000)
+        return self._format(labels[0], probabilities[0] if probabilities is not None else None, imputed[0])
+    
+    def predict_batch(self, samples: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """One vectorized pass over many samples"""
+        if not self.ensure_loaded():
+            raise RuntimeError("Micronutrient model artifacts not found")
+        if not samples:
+            return []
+        start = time.perf_counter()
+        X, imputed = self._matrix(samples)
+        labels, probabilities = self._predict_matrix(X)
+        self.batch_latency.record((time.perf_counter() - start) * 1000, rows=len(samples))
+        return [
+            self._format(labels[i], probabilities[i] if probabilities is not None else None, imputed[i])
+            for i in range(len(samples))
+        ]
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            'available': self.is_available(),
+            'loaded': self.loaded,
+            'compiled': self.engine is not None,
+            'single': self.single_latency.to_dict(),
+            'batch': self.batch_latency.to_dict()
+        }
 
 class EnhancedFertilityPredictor:
     def __init__(self):
         """Initialize the enhanced predictor with trained models"""
         self.models_dir = 'models'
         self.models_loaded = False
+        self.latency = LatencyStats()
+        self.micronutrient = MicronutrientModelSlot(self.models_dir)
         self.load_models()
     
     def load_models(self):
@@ -79,8 +401,10 @@ class EnhancedFertilityPredictor:
             input_scaled = self.scaler.transform(input_data)
             
             # Make predictions
+            start = time.perf_counter()
             fertility_score = self.score_model.predict(input_scaled)[0]
             fertility_level = self.level_model.predict(input_scaled)[0]
+            self.latency.record((time.perf_counter() - start) * 1000)
             
             # Round fertility score to 1 decimal place
             fertility_score = round(float(fertility_score), 1)
@@ -91,7 +415,7 @@ class EnhancedFertilityPredictor:
             # Generate crop recommendations
             crop_recommendations = self.get_crop_recommendations(soil_data, fertility_score)
             
-            return {
+            result = {
                 'fertility_score': fertility_score,
                 'fertility_level': fertility_level,
                 'fertilizer_recommendations': fertilizer_recommendations,
@@ -99,123 +423,43 @@ class EnhancedFertilityPredictor:
                 'analysis': self.generate_analysis(soil_data, fertility_score, fertility_level)
             }
             
+            micronutrient = self.predict_micronutrients(soil_data)
+            if micronutrient:
+                result['micronutrient_assessment'] = micronutrient
+            return result
+            
         except Exception as e:
             print(f"❌ Error in prediction: {e}")
             return self.fallback_prediction(soil_data)
     
+    def predict_micronutrients(self, soil_data: Dict[str, float]) -> Optional[Dict[str, Any]]:
+        """Run the 12-feature lab model when the request carries lab-only fields"""
+        if not any(soil_data.get(field) is not None for field in MICRONUTRIENT_ONLY_FIELDS):
+            return None
+        if not self.micronutrient.is_available():
+            return None
+        try:
+            # organic_matter is not organic carbon (OM ~ 1.72 x OC); a missing
+            # organic_carbon is imputed by the slot
+            return self.micronutrient.predict(soil_data)
+        except Exception as e:
+            print(f"❌ Micronutrient prediction failed: {e}")
+            return None
+    
+    def get_latency_metrics(self) -> Dict[str, Any]:
+        return {
+            'main': {'loaded': self.models_loaded, 'single': self.latency.to_dict()},
+            'micronutrient': self.micronutrient.get_metrics()
+        }
+    
     def get_fertilizer_recommendations(self, soil_data: Dict[str, float], fertility_score: float) -> List[str]:
         """Generate fertilizer recommendations based on soil analysis"""
-        recommendations = []
-        
-        nitrogen = soil_data.get('nitrogen', 100)
-        phosphorus = soil_data.get('phosphorus', 30)
-        potassium = soil_data.get('potassium', 150)
-        ph = soil_data.get('ph', 6.5)
-        magnesium = soil_data.get('magnesium', 50)
-        calcium = soil_data.get('calcium', 500)
-        sulfur = soil_data.get('sulfur', 20)
-        
-        # Nitrogen recommendations
-        if nitrogen < 80:
-            if ph < 6.5:
-                recommendations.append("Calcium Nitrate (improves pH)")
-            else:
-                recommendations.append("Urea (high nitrogen content)")
-        elif nitrogen < 120:
-            recommendations.append("Ammonium Sulfate (balanced N+S)")
-        
-        # Phosphorus recommendations
-        if phosphorus < 25:
-            recommendations.append("DAP (Diammonium Phosphate)")
-        elif phosphorus < 40:
-            recommendations.append("Superphosphate")
-        
-        # Potassium recommendations
-        if potassium < 120:
-            recommendations.append("Potassium Chloride (Muriate of Potash)")
-        elif potassium < 180:
-            recommendations.append("Potassium Sulfate")
-        
-        # Secondary nutrients
-        if magnesium < 50:
-            recommendations.append("Epsom Salt (Magnesium Sulfate)")
-        
-        if calcium < 400:
-            if ph < 6.0:
-                recommendations.append("Lime (Calcium Carbonate)")
-            else:
-                recommendations.append("Gypsum (Calcium Sulfate)")
-        
-        if sulfur < 20:
-            recommendations.append("Elemental Sulfur")
-        
-        # pH adjustments
-        if ph < 5.5:
-            recommendations.append("Agricultural Lime (pH adjustment)")
-        elif ph > 8.0:
-            recommendations.append("Sulfur (pH reduction)")
-        
-        # If no specific deficiencies or if high fertility
-        if not recommendations or fertility_score > 75:
-            if fertility_score > 80:
-                recommendations = ["Balanced NPK (10-10-10)", "Compost", "Organic Fertilizer"]
-            else:
-                recommendations.append("NPK Complex (20-20-20)")
-        
-        # Limit recommendations to top 3-4
-        return recommendations[:4] if len(recommendations) > 4 else recommendations
+        return list(FERTILIZER_TABLE.lookup(soil_data, fertility_score=fertility_score))
     
     def get_crop_recommendations(self, soil_data: Dict[str, float], fertility_score: float) -> List[str]:
         """Generate crop recommendations based on soil conditions"""
-        crops = []
-        
-        ph = soil_data.get('ph', 6.5)
-        moisture = soil_data.get('moisture', 25)
-        temperature = soil_data.get('temperature', 22)
-        clay = soil_data.get('clay', 25)
-        sand = soil_data.get('sand', 40)
-        nitrogen = soil_data.get('nitrogen', 100)
-        
-        # pH-based recommendations
-        if ph < 6.0:  # Acidic soil lovers
-            crops.extend(["Blueberries", "Potatoes", "Sweet Potatoes", "Azaleas"])
-        elif ph > 7.5:  # Alkaline soil tolerant
-            crops.extend(["Asparagus", "Cabbage", "Spinach", "Sugar Beets"])
-        else:  # Neutral pH crops
-            crops.extend(["Tomatoes", "Corn", "Wheat", "Soybeans", "Carrots"])
-        
-        # Temperature-based recommendations
-        if temperature < 18:
-            crops.extend(["Lettuce", "Peas", "Spinach", "Kale"])
-        elif temperature > 28:
-            crops.extend(["Okra", "Eggplant", "Peppers", "Melons"])
-        else:
-            crops.extend(["Beans", "Squash", "Cucumbers", "Broccoli"])
-        
-        # Soil texture based
-        if sand > 60:  # Sandy soil
-            crops.extend(["Carrots", "Radishes", "Potatoes", "Herbs"])
-        elif clay > 40:  # Clay soil
-            crops.extend(["Rice", "Lettuce", "Cabbage", "Chard"])
-        else:  # Loamy soil
-            crops.extend(["Tomatoes", "Peppers", "Beans", "Squash"])
-        
-        # Fertility-based recommendations
-        if fertility_score > 75:
-            crops.extend(["Leafy Greens", "Brassicas", "Heavy Feeders"])
-        elif fertility_score < 45:
-            crops.extend(["Legumes", "Root Vegetables", "Light Feeders"])
-        
-        # Moisture-based recommendations
-        if moisture > 35:
-            crops.extend(["Rice", "Celery", "Watercress"])
-        elif moisture < 20:
-            crops.extend(["Cacti", "Drought-resistant crops", "Mediterranean herbs"])
-        
-        # Remove duplicates and select diverse recommendations
-        unique_crops = list(set(crops))
-        random.shuffle(unique_crops)
-        return unique_crops[:6]  # Return up to 6 diverse recommendations
+        crops = CROP_TABLE.lookup(soil_data, fertility_score=fertility_score)
+        return random.sample(crops, min(6, len(crops)))  # Up to 6 diverse recommendations
     
     def generate_analysis(self, soil_data: Dict[str, float], fertility_score: float, fertility_level: str) -> str:
         """Generate detailed soil analysis text"""
@@ -4,8 +4,17 @@ from datetime import datetime
 from models.soil_data import SoilData
 from models.user import User
 from services.enhanced_predictor import enhanced_predictor
+from utils.crop_knowledge import crop_knowledge
 import json
 
+def _crop_database_by_category():
+    """The chatbot's crop requirements from the shared store, grouped as vegetables/grains/fruits"""
+    database = {}
+    for name, info in crop_knowledge.source_table('chatbot').items():
+        entry = {key: value for key, value in info.items() if key != 'category'}
+        database.setdefault(info['category'], {})[name] = entry
+    return database
+
 class ImprovedAgriChatbot:
     def __init__(self):
         self.knowledge_base = {
@@ -30,28 +39,7 @@ class ImprovedAgriChatbot:
                 }
             },
             
-            'crop_database': {
-                'vegetables': {
-                    'Tomatoes': {'ph_range': (6.0, 7.0), 'fertility_need': 'high', 'season': 'warm', 'spacing': '18-24 inches'},
-                    'Lettuce': {'ph_range': (6.0, 7.0), 'fertility_need': 'medium', 'season': 'cool', 'spacing': '6-8 inches'},
-                    'Carrots': {'ph_range': (6.0, 7.0), 'fertility_need': 'low', 'season': 'cool', 'spacing': '2-3 inches'},
-                    'Peppers': {'ph_range': (6.0, 7.0), 'fertility_need': 'high', 'season': 'warm', 'spacing': '12-18 inches'},
-                    'Spinach': {'ph_range': (6.5, 7.5), 'fertility_need': 'medium', 'season': 'cool', 'spacing': '4-6 inches'},
-                    'Onions': {'ph_range': (6.0, 7.0), 'fertility_need': 'medium', 'season': 'cool', 'spacing': '4-6 inches'},
-                    'Potatoes': {'ph_range': (4.8, 6.5), 'fertility_need': 'high', 'season': 'cool', 'spacing': '12-15 inches'},
-                    'Cabbage': {'ph_range': (6.0, 7.5), 'fertility_need': 'high', 'season': 'cool', 'spacing': '12-18 inches'}
-                },
-                'grains': {
-                    'Wheat': {'ph_range': (6.0, 7.5), 'fertility_need': 'medium', 'season': 'cool'},
-                    'Corn': {'ph_range': (6.0, 6.8), 'fertility_need': 'high', 'season': 'warm'},
-                    'Rice': {'ph_range': (5.5, 7.0), 'fertility_need': 'high', 'season': 'warm'},
-                    'Barley': {'ph_range': (6.0, 8.0), 'fertility_need': 'medium', 'season': 'cool'}
-                },
-                'fruits': {
-                    'Blueberries': {'ph_range': (4.5, 5.5), 'fertility_need': 'low', 'season': 'perennial'},
-                    'Strawberries': {'ph_range': (5.5, 6.5), 'fertility_need': 'medium', 'season': 'cool'}
-                }
-            },
+            'crop_database': _crop_database_by_category(),
             
             'fertilizer_guide': {
                 'nitrogen_sources': {
@@ -408,12 +396,11 @@ class ImprovedAgriChatbot:
 
     def _get_crop_info(self, crop_name):
         """Get crop information from database"""
-        # Search in all crop categories
-        for category in self.knowledge_base['crop_database'].values():
-            if crop_name in category:
-                info = category[crop_name]
-                ph_range = info['ph_range']
-                return f"pH {ph_range[0]}-{ph_range[1]}, {info['fertility_need']} fertility, {info['season']} season"
+        # Any spelling the knowledge store knows (e.g. "Tomato" or "Tomatoes")
+        info = crop_knowledge.requirement(crop_name, 'chatbot')
+        if info:
+            ph_range = info['ph_range']
+            return f"pH {ph_range[0]}-{ph_range[1]}, {info['fertility_need']} fertility, {info['season']} season"
         return "Good choice for your soil conditions"
 
     def _get_seasonal_advice(self, message):
@@ -641,15 +628,7 @@ Just ask me anything about farming, and I'll provide personalized advice based o
 
     def _get_spacing_advice(self, message):
         """Provide plant spacing advice"""
-        spacing_guide = {
-            'tomato': '18-24 inches apart',
-            'lettuce': '6-8 inches apart', 
-            'carrot': '2-3 inches apart',
-            'pepper': '12-18 inches apart',
-            'onion': '4-6 inches apart',
-            'potato': '12-15 inches apart',
-            'cabbage': '12-18 inches apart'
-        }
+        spacing_guide = crop_knowledge.guide('spacing')
         
         found_crop = None
         for crop in spacing_guide:
@@ -664,14 +643,7 @@ Just ask me anything about farming, and I'll provide personalized advice based o
 
     def _get_harvest_advice(self, message):
         """Provide harvest timing advice"""
-        harvest_guide = {
-            'tomato': 'When fruits are fully colored but still firm',
-            'lettuce': 'Cut outer leaves when 4-6 inches long',
-            'carrot': 'When shoulders are 3/4 inch diameter',
-            'pepper': 'When fruits reach full size and color',
-            'potato': '2-3 weeks after flowers appear',
-            'onion': 'When tops begin to yellow and fall over'
-        }
+        harvest_guide = crop_knowledge.guide('harvest')
         
         found_crop = None
         for crop in harvest_guide:
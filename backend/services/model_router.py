@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Latency-aware routing across the fertility models in this project
+
+Each model is registered with the features it needs, the holdout accuracy its
+training script recorded in ``models/model_profiles.json``, and lazily measured
+load memory and inference latency. For a request the router picks the cheapest
+measured model that meets the caller's accuracy tier and whose required
+features were supplied; eligible models it has not measured yet are loaded and
+timed on a background thread, so no request waits on profiling.
+"""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from services.enhanced_predictor import MICRONUTRIENT_FIELD_MAP
+from utils.model_profiles import MODEL_PROFILES_PATH
+
+# Minimum holdout accuracy per tier
+ACCURACY_TIERS = {
+    'basic': 0.0,
+    'standard': 0.75,
+    'high': 0.85
+}
+
+# Holdout accuracies written by the training scripts, e.g. {"micronutrient_rf": {"accuracy": 0.9}}
+PROFILE_OVERRIDES_PATH = MODEL_PROFILES_PATH
+
+# Typical soil test used to time models before any request has arrived
+PROFILE_SAMPLE = {
+    'ph': 6.5, 'nitrogen': 120.0, 'phosphorus': 25.0, 'potassium': 150.0, 'organic_carbon': 0.8,
+    'organic_matter': 2.5, 'moisture': 25.0, 'temperature': 25.0, 'rainfall': 100.0, 'sulfur': 20.0,
+    'magnesium': 80.0, 'calcium': 500.0, 'clay': 30.0, 'silt': 40.0, 'sand': 30.0, 'ec': 0.5,
+    'zinc': 1.0, 'iron': 5.0, 'copper': 1.0, 'manganese': 5.0, 'boron': 0.5
+}
+
+# Weight of the newest observation in the latency moving average
+LATENCY_EWMA_ALPHA = 0.2
+
+# Loads are serialized so tracemalloc measurements don't overlap
+_load_lock = threading.Lock()
+
+class RoutedModel:
+    """One model the router can dispatch to"""
+
+    def __init__(self, name: str, description: str, required_features: List[str],
+                 accuracy: Optional[float], artifacts: List[str],
+                 loader: Callable[[], Any], predict: Callable[[Any, Dict], Dict],
+                 provides_score: bool = True):
+        self.name = name
+        self.description = description
+        self.required_features = set(required_features)
+        self.accuracy = accuracy
+        self.artifacts = artifacts
+        self.loader = loader
+        self.predict = predict
+        # Models without a 0-100 fertility score are only routed to on request
+        self.provides_score = provides_score
+
+        self.instance = None
+        self.memory_bytes = None
+        self.load_seconds = None
+        self.latency_ms = None
+        self.calls = 0
+        self.errors = 0
+        self.load_error = None
+        self.lock = threading.Lock()
+
+    def is_available(self) -> bool:
+        return all(os.path.exists(path) for path in self.artifacts)
+
+    def ensure_loaded(self, sample: Dict) -> Any:
+        """Load the model once, measuring memory and a warm-up latency
+
+        tracemalloc misses buffers that Cython code allocates with plain malloc
+        (sklearn tree nodes), so the artifact size on disk serves as a floor.
+        """
+        if self.instance is not None:
+            # Loaded models never wait behind another model's load
+            return self.instance
+        with _load_lock:
+            if self.instance is None:
+                tracing = tracemalloc.is_tracing()
+                if not tracing:
+                    tracemalloc.start()
+                before = tracemalloc.get_traced_memory()[0]
+                start = time.perf_counter()
+                instance = self.loader()
+                self.load_seconds = time.perf_counter() - start
+                traced = tracemalloc.get_traced_memory()[0] - before
+                on_disk = sum(os.path.getsize(path) for path in self.artifacts)
+                self.memory_bytes = max(traced, on_disk)
+                if not tracing:
+                    tracemalloc.stop()
+
+                start = time.perf_counter()
+                self.predict(instance, sample)
+                self.instance = instance
+                self.latency_ms = (time.perf_counter() - start) * 1000
+        return self.instance
+
+    def record_error(self, load_error: Optional[str] = None) -> None:
+        with self.lock:
+            self.errors += 1
+            if load_error is not None:
+                self.load_error = load_error
+
+    def record_latency(self, elapsed_ms: float) -> None:
+        with self.lock:
+            self.calls += 1
+            if self.latency_ms is None:
+                self.latency_ms = elapsed_ms
+            else:
+                self.latency_ms += LATENCY_EWMA_ALPHA * (elapsed_ms - self.latency_ms)
+
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'description': self.description,
+            'available': self.is_available(),
+            'loaded': self.instance is not None,
+            'required_features': sorted(self.required_features),
+            'accuracy': self.accuracy,
+            'provides_score': self.provides_score,
+            'latency_ms': round(self.latency_ms, 3) if self.latency_ms is not None else None,
+            'memory_mb': round(self.memory_bytes / 1024 / 1024, 2) if self.memory_bytes is not None else None,
+            'load_seconds': round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            'calls': self.calls,
+            'errors': self.errors,
+            'load_error': self.load_error
+        }
+
+class ModelRouter:
+    """Pick the cheapest model meeting an accuracy tier and feature set"""
+
+    def __init__(self, profiles_path: str = PROFILE_OVERRIDES_PATH):
+        self.models: Dict[str, RoutedModel] = {}
+        self.choices: Dict[str, int] = {}
+        self.rejections = 0
+        self.lock = threading.Lock()
+        self.profiles_path = profiles_path
+        self._profiles_mtime = None
+        # Names of models queued for background profiling
+        self.profiling = set()
+        self._profiler = ThreadPoolExecutor(max_workers=1, thread_name_prefix='model-profiler')
+
+    def register(self, model: RoutedModel) -> None:
+        self.models[model.name] = model
+
+    def refresh_profiles(self) -> bool:
+        """Re-read the recorded accuracies when a training run has rewritten them"""
+        try:
+            mtime = os.stat(self.profiles_path).st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self._profiles_mtime:
+            return False
+        self._profiles_mtime = mtime
+        self.apply_overrides(self.profiles_path)
+        return True
+
+    def apply_overrides(self, path: str = PROFILE_OVERRIDES_PATH) -> None:
+        """Apply accuracy figures recorded by training scripts, if any"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                overrides = json.load(f)
+        except (OSError, ValueError):
+            return
+        for name, profile in overrides.items():
+            if name in self.models and profile.get('accuracy') is not None:
+                self.models[name].accuracy = float(profile['accuracy'])
+
+    def candidates(self, features: List[str], tier: str = 'standard',
+                   require_score: bool = True) -> List[RoutedModel]:
+        """Models that satisfy the tier and feature set, cheapest first"""
+        if tier not in ACCURACY_TIERS:
+            raise ValueError(f"Unknown accuracy tier '{tier}'. Use one of: {', '.join(ACCURACY_TIERS)}")
+        minimum = ACCURACY_TIERS[tier]
+        available = set(features)
+        self.refresh_profiles()
+
+        eligible = [
+            model for model in self.models.values()
+            if model.is_available()
+            and model.required_features <= available
+            and (model.accuracy or 0.0) >= minimum
+            and (model.provides_score or not require_score)
+        ]
+        # Models not measured yet (still profiling, or failed to load) sort last
+        return sorted(eligible, key=lambda m: (
+            m.latency_ms is None,
+            m.latency_ms or 0.0,
+            m.memory_bytes or 0
+        ))
+
+    def _profile(self, model: RoutedModel, sample: Dict) -> None:
+        """Load and time one model on the profiler thread"""
+        try:
+            model.ensure_loaded(sample)
+        except Exception as e:
+            model.record_error(load_error=str(e))
+            print(f"❌ Could not profile {model.name}: {e}")
+        finally:
+            with self.lock:
+                self.profiling.discard(model.name)
+
+    def profile_in_background(self, candidates: List[RoutedModel], sample: Dict) -> List[str]:
+        """Queue every candidate without a latency yet; returns the names queued now"""
+        queued = []
+        with self.lock:
+            for model in candidates:
+                if model.latency_ms is not None or model.load_error is not None or model.name in self.profiling:
+                    continue
+                self.profiling.add(model.name)
+                queued.append(model)
+        for model in queued:
+            self._profiler.submit(self._profile, model, dict(sample))
+        return [model.name for model in queued]
+
+    def warm_up_in_background(self, sample: Dict = PROFILE_SAMPLE) -> List[str]:
+        """Queue every available model for profiling, e.g. at startup"""
+        return self.profile_in_background([model for model in self.models.values() if model.is_available()], sample)
+
+    def predict(self, soil_params: Dict, tier: str = 'standard', require_score: bool = True) -> Dict:
+        """Route one prediction, falling through to the next candidate on error"""
+        features = [key for key, value in soil_params.items() if value is not None]
+        candidates = self.candidates(features, tier, require_score)
+        # Unmeasured models are measured off the request path; until then they
+        # rank after every measured one
+        self.profile_in_background(candidates, soil_params)
+        if not candidates:
+            with self.lock:
+                self.rejections += 1
+            raise LookupError(f"No available model satisfies tier '{tier}' with features {sorted(features)}")
+
+        last_error = None
+        for model in candidates:
+            try:
+                instance = model.ensure_loaded(soil_params)
+                start = time.perf_counter()
+                result = model.predict(instance, soil_params)
+                model.record_latency((time.perf_counter() - start) * 1000)
+            except Exception as e:
+                model.record_error()
+                last_error = e
+                print(f"❌ Routed model {model.name} failed: {e}")
+                continue
+
+            with self.lock:
+                self.choices[model.name] = self.choices.get(model.name, 0) + 1
+            return {**result, 'model': model.name, 'tier': tier}
+
+        raise RuntimeError(f"All candidate models failed: {last_error}")
+
+    def get_metrics(self) -> Dict:
+        with self.lock:
+            choices = dict(self.choices)
+            rejections = self.rejections
+        return {
+            'tiers': ACCURACY_TIERS,
+            'choices': choices,
+            'rejections': rejections,
+            'models': [model.to_dict() for model in self.models.values()]
+        }
+
+def _load_enhanced_rf_gbm():
+    from services.enhanced_predictor import enhanced_predictor
+    return enhanced_predictor
+
+def _predict_enhanced_rf_gbm(predictor, soil_params):
+    result = predictor.predict_fertility(soil_params)
+    return {'fertility_level': result['fertility_level'], 'fertility_score': result['fertility_score']}
+
+def _load_stacking():
+    from ml_models.fertility_model import FertilityPredictor
+    return FertilityPredictor()
+
+def _predict_stacking(predictor, soil_params):
+    params = dict(soil_params)
+    params.setdefault('organic_carbon', params.get('organic_matter'))
+    weather = {key: params[key] for key in ('temperature', 'rainfall') if params.get(key) is not None}
+    result = predictor.predict_fertility(params, weather or None)
+    return {'fertility_level': result['level'], 'fertility_score': result['score']}
+
+def _load_enhanced_6f():
+    from ml_models.enhanced_fertility_model import enhanced_predictor
+    return enhanced_predictor
+
+def _predict_enhanced_6f(predictor, soil_params):
+    organic_carbon = soil_params.get('organic_carbon', soil_params.get('organic_matter'))
+    result = predictor.predict((
+        soil_params['ph'], soil_params['nitrogen'], soil_params['phosphorus'],
+        soil_params['potassium'], organic_carbon, soil_params['moisture']
+    ))
+    return {'fertility_level': result['fertility_level'], 'fertility_score': result['fertility_score']}
+
+MICRONUTRIENT_MODEL_PATH = os.path.join('models', 'soil_fertility_rf_model.joblib')
+MICRONUTRIENT_FEATURES_PATH = os.path.join('models', 'feature_order.txt')
+MICRONUTRIENT_PREPROCESSING_PATH = os.path.join('models', 'micronutrient_preprocessing.json')
+
+def _load_micronutrient_rf():
+    # Served by the predictor's second model slot (compiled forest inference)
+    from services.enhanced_predictor import enhanced_predictor
+    slot = enhanced_predictor.micronutrient
+    if not slot.ensure_loaded():
+        raise FileNotFoundError(MICRONUTRIENT_MODEL_PATH)
+    return slot
+
+def _predict_micronutrient_rf(slot, soil_params):
+    result = slot.predict(soil_params)
+    # Three notebook classes, not the 5-level scale; the router only picks this
+    # model when the caller opts out of requiring a score
+    return {'fertility_level': result['fertility_level'], 'fertility_score': None,
+            'level_scale': 'micronutrient'}
+
+def create_default_router() -> ModelRouter:
+    """Router over every fertility model shipped with the backend"""
+    router = ModelRouter()
+
+    # Accuracies stay unknown until a training script records its holdout
+    # accuracy; unknown models only qualify for the basic tier
+    router.register(RoutedModel(
+        name='enhanced_rf_gbm',
+        description='RandomForest score + GradientBoosting level on 13 features (train_enhanced_model.py)',
+        required_features=['ph', 'nitrogen', 'phosphorus', 'potassium'],
+        accuracy=None,
+        artifacts=[os.path.join('models', name) for name in (
+            'fertility_score_model.pkl', 'fertility_level_model.pkl', 'feature_scaler.pkl', 'feature_names.pkl'
+        )],
+        loader=_load_enhanced_rf_gbm,
+        predict=_predict_enhanced_rf_gbm
+    ))
+    router.register(RoutedModel(
+        name='stacking',
+        description='RF + XGBoost stacking ensemble with logistic meta-learner (ml_models/fertility_model.py)',
+        required_features=['ph', 'nitrogen', 'phosphorus', 'potassium', 'organic_carbon'],
+        accuracy=None,
+        artifacts=[os.path.join('ml_models', 'trained_fertility_model.pkl'), os.path.join('ml_models', 'scaler.pkl')],
+        loader=_load_stacking,
+        predict=_predict_stacking
+    ))
+    router.register(RoutedModel(
+        name='enhanced_6f',
+        description='RandomForest score + GradientBoosting level on 6 features (ml_models/enhanced_fertility_model.py)',
+        required_features=['ph', 'nitrogen', 'phosphorus', 'potassium', 'organic_carbon', 'moisture'],
+        accuracy=None,
+        artifacts=[os.path.join('ml_models', name) for name in (
+            'fertility_score_model.pkl', 'fertility_level_model.pkl', 'enhanced_scaler.pkl', 'label_encoder.pkl'
+        )],
+        loader=_load_enhanced_6f,
+        predict=_predict_enhanced_6f
+    ))
+    router.register(RoutedModel(
+        name='micronutrient_rf',
+        description='RandomForest on 12 lab features from the notebook pipeline',
+        required_features=list(MICRONUTRIENT_FIELD_MAP.values()),
+        accuracy=None,
+        artifacts=[MICRONUTRIENT_MODEL_PATH, MICRONUTRIENT_FEATURES_PATH, MICRONUTRIENT_PREPROCESSING_PATH],
+        loader=_load_micronutrient_rf,
+        predict=_predict_micronutrient_rf,
+        provides_score=False
+    ))
+
+    router.refresh_profiles()
+    return router
+
+# Initialize the global router instance
+model_router = create_default_router()
@@ -0,0 +1,217 @@
+"""
+Background retraining jobs for the stacking fertility model
+
+Jobs run in a separate process so the web worker is never blocked by a fit.
+The worker is started as ``python -m services.retraining <job_id>``, a plain
+module entry point, so it never imports ``app`` (a multiprocessing spawn child
+would re-import the launching script and rebuild the whole Flask app). The
+child publishes artifacts through FertilityPredictor.save_model, which renames
+complete files into place and bumps the model version file; serving
+predictors notice the new version on their next request.
+
+Only the stacking model (ml_models/fertility_model.py) is retrained. It serves
+through the model router (/fertility/routed); the /fertility route uses the
+separately trained models in services.enhanced_predictor.
+
+Job status is kept in small JSON files so every web worker can answer status
+queries, not only the one that started the job. Status updates and the
+one-active-job check hold an exclusive file lock, so concurrent web workers
+and the child cannot interleave their read-modify-write cycles.
+"""
+
+import os
+import subprocess
+import sys
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-worker development servers only
+    fcntl = None
+
+from utils.atomic_io import atomic_write_json, read_json
+
+JOBS_DIR = os.path.join('ml_models', 'jobs')
+ACTIVE_STATES = ('queued', 'running')
+
+# A job still queued this long after its worker was launched never started
+QUEUED_TIMEOUT_SECONDS = 120
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Handles to children started by this process, kept so they can be reaped
+_processes: Dict[str, subprocess.Popen] = {}
+
+def _job_path(job_id: str) -> str:
+    return os.path.join(JOBS_DIR, f'{job_id}.json')
+
+def _input_path(job_id: str) -> str:
+    return os.path.join(JOBS_DIR, f'{job_id}.input')
+
+@contextmanager
+def _jobs_lock():
+    """Exclusive lock shared by every process that touches the job files"""
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    with open(os.path.join(JOBS_DIR, '.lock'), 'a') as handle:
+        if fcntl:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+def _write_status(job_id: str, **fields) -> Dict:
+    """Read-modify-write of one status file; callers hold ``_jobs_lock``"""
+    status = read_json(_job_path(job_id), default={}) or {}
+    status['job_id'] = job_id
+    status.update(fields)
+    status['updated_at'] = datetime.utcnow().isoformat()
+    atomic_write_json(status, _job_path(job_id))
+    return status
+
+def _update_status(job_id: str, **fields) -> Dict:
+    with _jobs_lock():
+        return _write_status(job_id, **fields)
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        # The process exists but belongs to someone else, or the platform
+        # does not support signal 0; assume it is still alive.
+        return True
+    return True
+
+def _run_retrain_job(job_id: str) -> None:
+    """Entry point of the child process"""
+    _update_status(job_id, state='running', pid=os.getpid(), started_at=datetime.utcnow().isoformat())
+    try:
+        from ml_models.fertility_model import FertilityPredictor
+
+        job = read_json(_input_path(job_id))
+        if job is None:
+            raise RuntimeError('Job input is missing')
+        predictor = FertilityPredictor(model_path=job['model_path'], scaler_path=job['scaler_path'])
+        ok = predictor.retrain_model(job['new_data'], job['new_labels'], full=job['full'])
+
+        if ok:
+            _update_status(
+                job_id,
+                state='completed',
+                finished_at=datetime.utcnow().isoformat(),
+                model_version=predictor.loaded_version,
+                stats=getattr(predictor, 'last_retrain_stats', None)
+            )
+        else:
+            _update_status(job_id, state='failed', finished_at=datetime.utcnow().isoformat(),
+                           error='Retraining did not complete; see worker log')
+    except Exception as e:
+        _update_status(job_id, state='failed', finished_at=datetime.utcnow().isoformat(),
+                       error=str(e), traceback=traceback.format_exc())
+    finally:
+        if os.path.exists(_input_path(job_id)):
+            os.remove(_input_path(job_id))
+
+def submit_retrain_job(new_data: List[List[float]], new_labels: List[int], full: bool = False,
+                       model_path: Optional[str] = None, scaler_path: Optional[str] = None) -> Dict:
+    """
+    Start a retraining job in a separate process
+
+    Only one job may be active at a time; a RuntimeError is raised if another
+    job is still queued or running.
+    """
+    _reap_finished()
+    with _jobs_lock():
+        # Checked and claimed under the lock so two web workers cannot both start a job
+        active = [job for job in _list_statuses() if job.get('state') in ACTIVE_STATES]
+        if active:
+            raise RuntimeError(f"Retraining job {active[0]['job_id']} is already {active[0]['state']}")
+
+        job_id = uuid.uuid4().hex[:12]
+        atomic_write_json({
+            'new_data': [list(map(float, row)) for row in new_data],
+            'new_labels': [int(label) for label in new_labels],
+            'full': full, 'model_path': model_path, 'scaler_path': scaler_path
+        }, _input_path(job_id), indent=None)
+        status = _write_status(
+            job_id,
+            state='queued',
+            mode='full' if full else 'incremental',
+            samples=len(new_labels),
+            created_at=datetime.utcnow().isoformat()
+        )
+
+        # A fresh interpreter keeps the child free of the web server's threads,
+        # sockets and app module
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [BACKEND_DIR, env.get('PYTHONPATH')]))
+        try:
+            process = subprocess.Popen([sys.executable, '-m', 'services.retraining', job_id], env=env)
+        except Exception as e:
+            return _write_status(job_id, state='failed', error=f'Could not start worker: {e}')
+        _processes[job_id] = process
+
+        # Recorded by the parent so a child that dies before its first status
+        # update is still detected as gone
+        return _write_status(job_id, pid=process.pid, launched_at=time.time())
+
+def get_job_status(job_id: str) -> Optional[Dict]:
+    """Return the stored status of a job, or None if the job is unknown"""
+    _reap_finished()
+    with _jobs_lock():
+        return _checked_status(job_id)
+
+def _checked_status(job_id: str) -> Optional[Dict]:
+    """Stored status, marking active jobs whose worker is gone as failed; callers hold the lock"""
+    status = read_json(_job_path(job_id))
+    if not status:
+        return None
+
+    if status.get('state') in ACTIVE_STATES:
+        if status.get('pid') and not _pid_alive(status['pid']):
+            status = _write_status(job_id, state='failed', error='Worker process exited unexpectedly')
+        elif not status.get('pid') and status.get('state') == 'queued' and \
+                time.time() - status.get('launched_at', _created_timestamp(status)) > QUEUED_TIMEOUT_SECONDS:
+            status = _write_status(job_id, state='failed', error='Worker process never started')
+    return status
+
+def _created_timestamp(status: Dict) -> float:
+    try:
+        return (datetime.fromisoformat(status['created_at']) - datetime(1970, 1, 1)).total_seconds()
+    except (KeyError, ValueError):
+        return 0.0
+
+def _list_statuses() -> List[Dict]:
+    if not os.path.isdir(JOBS_DIR):
+        return []
+    jobs = []
+    for filename in os.listdir(JOBS_DIR):
+        if filename.endswith('.json'):
+            status = _checked_status(filename[:-len('.json')])
+            if status:
+                jobs.append(status)
+    return sorted(jobs, key=lambda job: job.get('created_at', ''), reverse=True)
+
+def list_jobs() -> List[Dict]:
+    """Return all known jobs, newest first"""
+    _reap_finished()
+    with _jobs_lock():
+        return _list_statuses()
+
+def _reap_finished() -> None:
+    for job_id, process in list(_processes.items()):
+        if process.poll() is not None:
+            del _processes[job_id]
+
+if __name__ == '__main__':
+    _run_retrain_job(sys.argv[1])
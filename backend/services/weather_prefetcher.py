@@ -0,0 +1,200 @@
+"""
+Background weather prefetch for every known user location
+
+A daemon thread wakes every ``interval`` seconds, collects the distinct
+``User.location`` values, maps them to canonical place keys (so spellings
+of one place are fetched once) and refreshes the ones whose cached
+weather would go stale before the next pass. Lookups run concurrently on a
+small thread pool behind a token-bucket rate limit, and results land in the
+shared weather cache, so prediction requests are served from memory instead
+of waiting on the provider.
+
+OpenWeatherMap's bulk ``/group`` endpoint only accepts numeric city IDs,
+while users store free-text place names, so locations are refreshed with
+individual concurrent calls through the pooled weather client.
+
+Under a multi-worker server (gunicorn ``-w N``) every worker imports
+app.py, but only the one that takes the ``WEATHER_PREFETCH_LOCK_PATH`` file
+lock runs the prefetcher, so the provider sees one prefetch pass per
+interval. The weather cache writes every lookup to the SQLite weather
+store that all workers share, so the other workers pick the prefetched
+results up from there instead of calling the provider.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, IO, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-worker development servers only
+    fcntl = None
+
+from database import db
+from utils.weather import WeatherCache, normalize_location, weather_cache, weather_location_key
+
+WEATHER_PREFETCH_INTERVAL = float(os.getenv('WEATHER_PREFETCH_INTERVAL', '300'))
+WEATHER_PREFETCH_RATE = float(os.getenv('WEATHER_PREFETCH_RATE', '5'))  # lookups per second
+WEATHER_PREFETCH_WORKERS = int(os.getenv('WEATHER_PREFETCH_WORKERS', '4'))
+WEATHER_PREFETCH_LOCK_PATH = os.getenv('WEATHER_PREFETCH_LOCK_PATH', os.path.join('instance', 'weather_prefetch.lock'))
+
+class RateLimiter:
+    """Token bucket shared by the prefetch threads; ``acquire`` blocks until a token is free"""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+def collect_user_locations() -> List[str]:
+    """Distinct normalized locations of all users (needs an app context)"""
+    from models.user import User
+
+    rows = db.session.query(User.location).filter(User.location.isnot(None)).distinct().all()
+    locations = {normalize_location(location) for (location,) in rows}
+    locations.discard('')
+    return sorted(locations)
+
+class WeatherPrefetcher:
+    """Periodically refresh the weather cache for all user locations"""
+
+    def __init__(self, app, cache: WeatherCache = weather_cache,
+                 interval: float = WEATHER_PREFETCH_INTERVAL,
+                 rate: float = WEATHER_PREFETCH_RATE,
+                 workers: int = WEATHER_PREFETCH_WORKERS):
+        self.app = app
+        self.cache = cache
+        self.interval = interval
+        self.limiter = RateLimiter(rate)
+        self.workers = workers
+        self.thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self.stats = {'runs': 0, 'refreshed': 0, 'failed': 0, 'skipped_fresh': 0}
+        self.last_run: Optional[Dict] = None
+        self.lock = threading.Lock()
+
+    def _needs_refresh(self, location: str) -> bool:
+        # Refresh anything that would expire before the next pass
+        age = self.cache.age(location)
+        return age is None or age >= self.cache.ttl - self.interval
+
+    def _refresh(self, location: str) -> bool:
+        self.limiter.acquire()
+        try:
+            return self.cache.refresh(location)
+        except Exception as e:
+            print(f"Weather prefetch failed for {location}: {e}")
+            return False
+
+    def run_once(self) -> Dict:
+        """One prefetch pass; returns a summary of what was refreshed"""
+        start = time.perf_counter()
+        with self.app.app_context():
+            spellings = collect_user_locations()
+        # Spellings of the same place collapse onto one canonical key
+        locations = sorted({weather_location_key(spelling) for spelling in spellings})
+        due = [location for location in locations if self._needs_refresh(location)]
+
+        results = []
+        if due:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(due)),
+                                    thread_name_prefix='weather-prefetch') as pool:
+                results = list(pool.map(self._refresh, due))
+
+        summary = {
+            'finished_at': datetime.utcnow().isoformat(),
+            'locations': len(locations),
+            'refreshed': sum(results),
+            'failed': len(results) - sum(results),
+            'skipped_fresh': len(locations) - len(due),
+            'seconds': round(time.perf_counter() - start, 3)
+        }
+        with self.lock:
+            self.stats['runs'] += 1
+            for key in ('refreshed', 'failed', 'skipped_fresh'):
+                self.stats[key] += summary[key]
+            self.last_run = summary
+        return summary
+
+    def _loop(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Weather prefetch pass failed: {e}")
+            self._stop_event.wait(self.interval)
+
+    def start(self) -> None:
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self._stop_event.clear()
+        self.thread = threading.Thread(target=self._loop, name='weather-prefetcher', daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def get_metrics(self) -> Dict:
+        with self.lock:
+            return {
+                **self.stats,
+                'running': self.thread is not None and self.thread.is_alive(),
+                'interval_seconds': self.interval,
+                'rate_per_second': self.limiter.rate,
+                'last_run': self.last_run
+            }
+
+# Started from app.py when WEATHER_PREFETCH_ENABLED is set
+weather_prefetcher: Optional[WeatherPrefetcher] = None
+
+# Open while this process owns the prefetch lock; the OS drops it on exit
+_lock_handle: Optional[IO] = None
+
+def acquire_prefetch_lock(path: str = WEATHER_PREFETCH_LOCK_PATH) -> Optional[IO]:
+    """Non-blocking exclusive lock on ``path``; returns the open handle, or None if another process holds it"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    handle = open(path, 'a')
+    if fcntl:
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return None
+    return handle
+
+def start_weather_prefetcher(app) -> Optional[WeatherPrefetcher]:
+    """Start the prefetcher unless another worker process already runs it"""
+    global weather_prefetcher, _lock_handle
+    if _lock_handle is None:
+        _lock_handle = acquire_prefetch_lock()
+        if _lock_handle is None:
+            print("Weather prefetcher already running in another worker; not starting here")
+            return None
+    if weather_prefetcher is None:
+        weather_prefetcher = WeatherPrefetcher(app)
+    weather_prefetcher.start()
+    return weather_prefetcher
+
+def get_prefetcher_metrics() -> Optional[Dict]:
+    return weather_prefetcher.get_metrics() if weather_prefetcher else None
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import time
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from ml_models.compiled_forest import CompiledForest
+from services.enhanced_predictor import MICRONUTRIENT_FIELD_MAP, MicronutrientModelSlot, enhanced_predictor
+from train_micronutrient_model import FEATURES, TARGET, build_preprocessor, generate_synthetic_lab_data
+
+def test_compiled_forest_matches_random_forest():
+    """The compiled path must agree with RandomForestClassifier.predict / predict_proba"""
+    df = generate_synthetic_lab_data(1500, seed=5)
+    X = df[FEATURES].fillna(df[FEATURES].median()).to_numpy()
+    y = df[TARGET].to_numpy()
+    forest = RandomForestClassifier(n_estimators=100, random_state=42).fit(X[:1200], y[:1200])
+    engine = CompiledForest(forest)
+    
+    X_test = X[1200:]
+    assert np.allclose(engine.predict_proba(X_test), forest.predict_proba(X_test), atol=1e-9)
+    assert np.array_equal(engine.predict(X_test), forest.predict(X_test))
+    
+    # Single-row timing, compiled vs. sklearn
+    row = X_test[:1]
+    start = time.perf_counter()
+    for _ in range(50):
+        forest.predict(row)
+    sklearn_ms = (time.perf_counter() - start) / 50 * 1000
+    
+    start = time.perf_counter()
+    for _ in range(50):
+        engine.predict(row)
+    compiled_ms = (time.perf_counter() - start) / 50 * 1000
+    
+    print(f"\n⚡ Single-row latency: sklearn {sklearn_ms:.2f} ms, compiled {compiled_ms:.2f} ms")
+
+def test_slot_requires_the_training_scaling():
+    """Unscaled lab values must never reach a forest trained on standardized features"""
+    df = generate_synthetic_lab_data(600, seed=8)
+    preprocessor = build_preprocessor()
+    X = preprocessor.fit_transform(df[FEATURES])
+    forest = RandomForestClassifier(n_estimators=30, random_state=1).fit(X, df[TARGET])
+
+    models_dir = tempfile.mkdtemp()
+    joblib.dump(forest, os.path.join(models_dir, 'soil_fertility_rf_model.joblib'))
+    with open(os.path.join(models_dir, 'feature_order.txt'), 'w') as f:
+        f.write('\n'.join(FEATURES))
+    # The notebook's artifacts alone: refuse to serve
+    slot = MicronutrientModelSlot(models_dir)
+    assert not slot.is_available() and not slot.ensure_loaded()
+
+    # With the fitted preprocessor, predictions match the training pipeline
+    joblib.dump(preprocessor, os.path.join(models_dir, 'micronutrient_preprocessor.joblib'))
+    slot = MicronutrientModelSlot(models_dir)
+    samples = [{MICRONUTRIENT_FIELD_MAP[name]: (None if np.isnan(value) else float(value))
+                for name, value in row.items()} for row in df[FEATURES].head(50).to_dict('records')]
+    predicted = [result['fertility_class'] for result in slot.predict_batch(samples)]
+    assert predicted == forest.predict(preprocessor.transform(df[FEATURES].head(50))).tolist()
+
+    # Organic matter is not organic carbon, and sulfur has no route default:
+    # both are imputed when the request does not measure them
+    served = enhanced_predictor.micronutrient
+    enhanced_predictor.micronutrient = slot
+    try:
+        result = enhanced_predictor.predict_micronutrients({'ph': 6.5, 'organic_matter': 3.4, 'zinc': 0.9})
+    finally:
+        enhanced_predictor.micronutrient = served
+    assert {'organic_carbon', 'sulfur'} <= set(result['imputed_fields'])
+
+if __name__ == "__main__":
+    test_compiled_forest_matches_random_forest()
+    test_slot_requires_the_training_scaling()
+    print("✅ Compiled forest test passed!")
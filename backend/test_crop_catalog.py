@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+import itertools
+
+import numpy as np
+
+from utils.recommendations import (CATEGORY_KEYS, CROP_DATABASE, CROP_NAMES, evaluate_crops,
+                                   evaluate_crops_single, get_crop_suggestions)
+
+def _reference_category(requirements, ph, n, p, k, season):
+    """The per-crop scalar scoring get_crop_suggestions used before the catalog was compiled"""
+    score = 0
+    low, high = requirements['ph_range']
+    if low <= ph <= high:
+        score += 1
+    elif abs(ph - (low + high) / 2) < 0.5:
+        score += 0.5
+    for value, minimum in ((n, requirements['nitrogen_min']), (p, requirements['phosphorus_min']),
+                           (k, requirements['potassium_min'])):
+        if value >= minimum:
+            score += 1
+        elif value >= minimum * 0.8:
+            score += 0.5
+    percentage = score / 4 * 100
+    match = season in requirements['seasons']
+    if percentage >= 80 and match:
+        return 'highly_suitable', percentage
+    if percentage >= 60 and match:
+        return 'moderately_suitable', percentage
+    if percentage >= 60:
+        return 'season_specific', percentage
+    return 'not_recommended', percentage
+
+def test_evaluator_matches_scalar_rules_on_boundaries():
+    # Every requirement boundary, its 80% threshold and neighbours
+    phs = sorted({v for crop in CROP_DATABASE.values() for bound in crop['ph_range'] for v in (bound - 0.01, bound, bound + 0.01)}
+                 | {sum(crop['ph_range']) / 2 + d for crop in CROP_DATABASE.values() for d in (-0.5, 0.49, 0.5)})
+    def levels(key):
+        return sorted({v for crop in CROP_DATABASE.values() for v in (crop[key], crop[key] * 0.8, crop[key] - 0.01)})
+    samples = list(itertools.product(phs[::3], levels('nitrogen_min')[::2], levels('phosphorus_min')[::2],
+                                     levels('potassium_min')[::2], ['spring', 'summer', 'autumn', 'winter', 'monsoon']))
+    ph, n, p, k, season = (np.array(column) for column in zip(*samples))
+
+    result = evaluate_crops(ph, n, p, k, season)
+    for row, sample in enumerate(samples):
+        single = evaluate_crops_single(*sample)
+        for col, crop in enumerate(CROP_NAMES):
+            category, percentage = _reference_category(CROP_DATABASE[crop], *sample)
+            assert CATEGORY_KEYS[result['category'][row, col]] == category, (sample, crop)
+            assert result['suitability_score'][row, col] == percentage
+            assert single[col] == (percentage, bool(result['season_match'][row, col]), CATEGORY_KEYS.index(category))
+
+def test_single_sample_suggestions_use_catalog_order_and_sorting():
+    suggestions = get_crop_suggestions({'ph': 6.5, 'nitrogen': 95, 'phosphorus': 22, 'potassium': 110,
+                                        'organic_carbon': 1.0}, 'Spring')
+    scores = [crop['suitability_score'] for crop in suggestions['highly_suitable']]
+    assert scores == sorted(scores, reverse=True)
+    names = [crop['name'].lower() for key in CATEGORY_KEYS for crop in suggestions[key]]
+    assert sorted(names) == sorted(CROP_NAMES)
+    assert [crop['name'] for crop in suggestions['soil_improvement_crops']] == ['Clover', 'Alfalfa', 'Winter Rye']
+    for crop in suggestions['season_specific']:
+        assert 'spring' not in crop['suitable_seasons']
+
+def test_batch_matches_single_samples():
+    rng = np.random.default_rng(3)
+    ph, n, p, k = rng.uniform(4.5, 8.5, 200), rng.uniform(0, 200, 200), rng.uniform(0, 40, 200), rng.uniform(0, 250, 200)
+    batch = evaluate_crops(ph, n, p, k, 'winter')
+    for i in range(200):
+        single = evaluate_crops(ph[i], n[i], p[i], k[i], 'winter')
+        for key in batch:
+            assert np.array_equal(batch[key][i], single[key][0])
+
+if __name__ == "__main__":
+    test_evaluator_matches_scalar_rules_on_boundaries()
+    test_single_sample_suggestions_use_catalog_order_and_sorting()
+    test_batch_matches_single_samples()
+    print("✅ Crop catalog tests passed!")
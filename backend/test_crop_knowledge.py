@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+import random
+
+from utils.crop_knowledge import CropKnowledgeStore, IntervalTree, crop_knowledge
+from utils.recommendations import CROP_DATABASE
+from ml_models.enhanced_fertility_model import CROP_NAMES, CROP_K_MIN
+
+def _synthetic_store(n_varieties=5000, seed=11):
+    rng = random.Random(seed)
+    records = []
+    for i in range(n_varieties):
+        low = round(rng.uniform(4.0, 7.5), 1)
+        records.append({
+            'key': f'variety-{i}', 'name': f'Variety {i}', 'aliases': (f'v{i}',),
+            'requirements': {
+                'catalog': {'ph_range': (low, round(low + rng.uniform(0.3, 2.0), 1)),
+                            'nitrogen_min': rng.randint(20, 200), 'phosphorus_min': rng.randint(5, 60),
+                            'potassium_min': rng.randint(40, 300)}
+            }
+        })
+    return CropKnowledgeStore(records)
+
+def test_consumers_read_their_own_values():
+    # Same crop, separately tuned requirements per consumer
+    assert CROP_DATABASE['tomato']['nitrogen_min'] == 100
+    assert CROP_K_MIN[list(CROP_NAMES).index('Tomatoes')] == 220
+    assert crop_knowledge.requirement('tomatoes', 'chatbot')['ph_range'] == (6.0, 7.0)
+    assert list(CROP_DATABASE)[:3] == ['rice', 'wheat', 'corn']
+    assert list(crop_knowledge.guide('spacing'))[0] == 'tomato'
+
+def test_name_index_resolves_every_spelling():
+    tomato = crop_knowledge.get('tomato')
+    for spelling in ('Tomatoes', 'TOMATO', ' tomatoes '):
+        assert crop_knowledge.get(spelling) is tomato
+    assert crop_knowledge.get('beans') is crop_knowledge.get('Bean')
+    assert crop_knowledge.get('dragonfruit') is None
+
+def test_query_acidic_soil_by_potassium():
+    # Nothing with known nutrient needs tolerates pH 5.2 on 100 mg/kg potassium
+    assert crop_knowledge.query(ph=5.2, potassium=100) == []
+    # At 200 mg/kg potato qualifies under the rule-based requirements only (model needs 250)
+    results = crop_knowledge.query(ph=5.2, potassium=200)
+    assert [(r['crop'], r['source']) for r in results] == [('potato', 'recommendations')]
+    assert crop_knowledge.query(ph=5.2, source='chatbot')[0]['crop'] == 'potato'
+
+def test_interval_tree_matches_brute_force():
+    rng = random.Random(5)
+    intervals = [(low, low + rng.uniform(0, 3), i) for i, low in enumerate(rng.uniform(0, 14) for _ in range(2000))]
+    tree = IntervalTree(intervals)
+    for point in [rng.uniform(-1, 15) for _ in range(300)] + [intervals[0][0], intervals[0][1]]:
+        expected = sorted(i for low, high, i in intervals if low <= point <= high)
+        assert sorted(tree.stab(point)) == expected
+
+def test_large_catalog_queries_are_exact_and_selective():
+    store = _synthetic_store()
+    rng = random.Random(2)
+    for _ in range(200):
+        ph, potassium = rng.uniform(4.0, 9.0), rng.uniform(40, 120)
+        results = store.query(ph=ph, potassium=potassium)
+        expected = [key for key, _, req in store.entries
+                    if req['ph_range'][0] <= ph <= req['ph_range'][1] and req['potassium_min'] <= potassium]
+        assert [r['crop'] for r in results] == expected
+
+    # Low-potassium queries only examine the matching prefix of the K index
+    store.stats['candidates_examined'] = 0
+    store.query(ph=6.0, potassium=50)
+    assert store.stats['candidates_examined'] < len(store.entries) / 20
+
+if __name__ == "__main__":
+    test_consumers_read_their_own_values()
+    test_name_index_resolves_every_spelling()
+    test_query_acidic_soil_by_potassium()
+    test_interval_tree_matches_brute_force()
+    test_large_catalog_queries_are_exact_and_selective()
+    print("✅ Crop knowledge store tests passed!")
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+
+import numpy as np
+
+from ml_models.enhanced_fertility_model import (
+    CROP_NAMES, crop_suitability_matrix, rank_crops, suggest_crops_batch
+)
+
+def test_crop_suitability_matrix():
+    """Batch crop suggestions must match one-sample-at-a-time suggestions"""
+    rng = np.random.RandomState(0)
+    samples = np.column_stack([
+        rng.uniform(4.0, 9.0, 500), rng.uniform(10, 300, 500), rng.uniform(3, 80, 500),
+        rng.uniform(20, 400, 500), rng.uniform(0.2, 4.0, 500), rng.uniform(8, 50, 500)
+    ])
+    
+    scores = crop_suitability_matrix(samples)['scores']
+    assert scores.shape == (500, len(CROP_NAMES))
+    
+    order, ranked = rank_crops(scores)
+    assert np.all(np.diff(ranked, axis=1) <= 0)
+    
+    batch = suggest_crops_batch(samples)
+    for i in range(0, 500, 50):
+        assert batch[i] == suggest_crops_batch([samples[i]])[0]
+    
+    # Rich, neutral soil: wheat meets every requirement
+    rich = suggest_crops_batch([(6.8, 200, 50, 260, 2.5, 30)])[0]
+    wheat = next(c for c in rich['highly_suitable'] if c['name'] == 'Wheat')
+    assert wheat['suitability_score'] == 100
+    assert wheat['factors'] == ['Optimal pH', 'Adequate nitrogen', 'Good phosphorus']
+    
+    print(f"Top crops for rich soil: {[c['name'] for c in rich['highly_suitable']]}")
+
+if __name__ == "__main__":
+    test_crop_suitability_matrix()
+    print("✅ Crop suitability test passed!")
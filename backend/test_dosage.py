@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+import numpy as np
+
+from utils.dosage import MG_PER_KG_TO_KG_PER_HA, OXIDE_FACTORS, SOIL_DEFAULTS, calculate_dosage_batch
+from utils.recommendations import (calculate_dosage_summary, get_default_fertilizer_recommendations,
+                                   get_fertilizer_recommendations)
+
+def test_products_cover_deficits_in_order():
+    plan = calculate_dosage_batch(50, 10, 80, ph=5.5, area_ha=2)
+    field = plan.to_dict(0)
+    # N 30, P 5 and K 20 mg/kg short of the targets
+    assert field['deficits_kg_per_ha'] == {'nitrogen': 67.2, 'p2o5': 25.6, 'k2o': 53.8}
+    rates = {product['name']: product['kg_per_ha'] for product in field['products']}
+    assert rates == {'DAP (18-46-0)': 55.8, 'Muriate of Potash (0-0-60)': 89.6, 'Urea (46-0-0)': 124.3}
+    assert field['lime_kg_per_ha'] == 500 and field['lime_total_kg'] == 1000
+
+    # Supplied nutrients add back up to the deficits, DAP nitrogen included
+    grades = np.array([(18, 46, 0), (0, 0, 60), (46, 0, 0)]) / 100
+    supplied = plan.product_rates[0] @ grades
+    assert np.allclose(supplied, plan.deficits[0])
+    assert np.allclose(plan.product_totals[0], plan.product_rates[0] * 2)
+
+def test_batch_matches_single_fields():
+    rng = np.random.default_rng(3)
+    n = 500
+    nitrogen, phosphorus = rng.uniform(20, 200, n), rng.uniform(2, 50, n)
+    potassium, ph, area = rng.uniform(30, 300, n), rng.uniform(4.5, 8.5, n), rng.uniform(0.2, 5, n)
+    nitrogen[::50] = np.nan
+
+    plan = calculate_dosage_batch(nitrogen, phosphorus, potassium, ph, area)
+    assert len(plan) == n and (plan.product_rates >= 0).all()
+    for i in range(0, n, 7):
+        single = calculate_dosage_batch(None if np.isnan(nitrogen[i]) else nitrogen[i],
+                                        phosphorus[i], potassium[i], ph[i], area[i])
+        assert single.to_dict(0) == plan.to_dict(i)
+
+    totals = plan.totals()
+    assert np.isclose(totals['Urea (46-0-0)'], plan.product_totals[:, 2].sum(), atol=0.1)
+
+    # Sufficient soils need nothing
+    assert not calculate_dosage_batch([150], [30], [200], [6.8]).product_rates.any()
+
+def test_recommendations_carry_numeric_dosage():
+    soil = {'ph': 5.8, 'nitrogen': 60, 'phosphorus': 12, 'potassium': 90, 'organic_carbon': 0.8}
+    recommendations = get_fertilizer_recommendations(soil, {'level': 'Low'})
+    dosage = recommendations['dosage_recommendations']
+    assert dosage == calculate_dosage_summary(soil)
+    assert dosage['deficits_kg_per_ha']['nitrogen'] == round(20 * MG_PER_KG_TO_KG_PER_HA * OXIDE_FACTORS[0], 1)
+
+    # Products the engine sizes state its quantities; the others keep the rule text
+    rates = {fertilizer['name']: fertilizer['application_rate'] for fertilizer in recommendations['primary_fertilizers']}
+    doses = {product['name']: product['kg_per_ha'] for product in dosage['products']}
+    assert rates['Urea (46-0-0)'] == f"{doses['Urea (46-0-0)']} kg per hectare"
+    assert rates['Muriate of Potash (0-0-60)'] == f"{doses['Muriate of Potash (0-0-60)']} kg per hectare"
+    assert rates['Lime (Calcium Carbonate)'] == f"{dosage['lime_kg_per_ha']} kg per hectare"
+    assert rates['Single Super Phosphate (0-16-0)'] == '10-15 kg per hectare'
+    assert rates['NPK Complex (20-20-20)'] == '20-30 kg per hectare'
+
+def test_default_recommendations_share_the_schema():
+    default = get_default_fertilizer_recommendations(area_ha=2)
+    assert default.keys() == get_fertilizer_recommendations(SOIL_DEFAULTS, {'level': 'Medium'}).keys()
+    assert default['dosage_recommendations'] == calculate_dosage_summary(SOIL_DEFAULTS, 2)
+    # A failed lookup falls back to the same shape
+    assert get_fertilizer_recommendations({'ph': 'acidic'}, {})['dosage_recommendations'] == \
+        calculate_dosage_summary(SOIL_DEFAULTS)
+
+if __name__ == "__main__":
+    test_products_cover_deficits_in_order()
+    test_batch_matches_single_fields()
+    test_recommendations_carry_numeric_dosage()
+    test_default_recommendations_share_the_schema()
+    print("✅ Dosage engine tests passed!")
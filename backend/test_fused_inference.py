@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from ml_models.fertility_model import FertilityPredictor
+
+def test_fused_inference_matches_stacking_model():
+    """The fused path must agree with StackingClassifier.predict / predict_proba"""
+    with tempfile.TemporaryDirectory() as tmp:
+        predictor = FertilityPredictor(
+            model_path=os.path.join(tmp, 'trained_fertility_model.pkl'),
+            scaler_path=os.path.join(tmp, 'scaler.pkl')
+        )
+        
+        X, _ = predictor.generate_synthetic_data(200, seed=11)
+        X_scaled = predictor.scaler.transform(X)
+        
+        labels, probabilities = predictor.predict_with_proba(X_scaled)
+        assert predictor._fused_components() is not None
+        assert np.allclose(probabilities, predictor.model.predict_proba(X_scaled), atol=1e-6)
+        assert np.array_equal(labels, predictor.model.predict(X_scaled))
+        
+        # Single-row timing, fused vs. the two sklearn calls
+        row = X_scaled[:1]
+        start = time.perf_counter()
+        for _ in range(50):
+            predictor.model.predict(row)
+            predictor.model.predict_proba(row)
+        sklearn_ms = (time.perf_counter() - start) / 50 * 1000
+        
+        start = time.perf_counter()
+        for _ in range(50):
+            predictor.predict_with_proba(row)
+        fused_ms = (time.perf_counter() - start) / 50 * 1000
+        
+        print(f"\n⚡ Single-row latency: sklearn {sklearn_ms:.2f} ms, fused {fused_ms:.2f} ms")
+
+if __name__ == "__main__":
+    test_fused_inference_matches_stacking_model()
+    print("✅ Fused inference test passed!")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+
+import utils.weather as weather
+from utils.location_resolver import LocationResolver, parse_place_id
+from test_weather_client import _client, start_stub_server
+
+def _resolver(path=None):
+    return LocationResolver(weather._geocode, path or os.path.join(tempfile.mkdtemp(), 'locations.db'))
+
+def _use_stub(monkeypatch, base_url, resolver):
+    monkeypatch.setenv('OPENWEATHER_API_KEY', 'test-key')
+    monkeypatch.setattr(weather, 'weather_client', _client(base_url))
+    monkeypatch.setattr(weather, 'location_resolver', resolver)
+    monkeypatch.setattr(weather, 'weather_cache', weather.WeatherCache(weather._fetch_weather))
+
+def test_spellings_share_one_place_and_one_weather_call(monkeypatch):
+    server, base_url = start_stub_server()
+    try:
+        _use_stub(monkeypatch, base_url, _resolver())
+        keys = {weather.weather_location_key(spelling) for spelling in ['Pune', 'pune ', ' PUNE', 'Pune, IN']}
+        assert keys == {'geo:18.52,73.86'}
+        assert parse_place_id('geo:18.52,73.86') == {'lat': 18.52, 'lon': 73.86}
+        # "pune" and "pune,in" are geocoded once each
+        assert server.hits['/geo/1.0/direct'] == 2
+
+        for spelling in ['Pune', 'pune ', 'Pune, IN', 'pune,in']:
+            assert weather.get_weather_data(spelling)['temperature'] == 27.5
+        assert server.hits['/data/2.5/weather'] == 1
+        assert weather.weather_cache.get_metrics()['size'] == 1
+    finally:
+        server.shutdown()
+
+def test_resolutions_persist_across_instances(monkeypatch):
+    server, base_url = start_stub_server()
+    try:
+        path = os.path.join(tempfile.mkdtemp(), 'locations.db')
+        first = _resolver(path)
+        _use_stub(monkeypatch, base_url, first)
+        place = first.resolve('nashik,in')
+        assert place['name'] == 'Nashik' and place['country'] == 'IN'
+        first.close()
+
+        second = _resolver(path)
+        assert second.resolve('nashik,in') == place
+        assert second.resolve('nashik,in') == place
+        assert server.hits['/geo/1.0/direct'] == 1
+        metrics = second.get_metrics()
+        assert metrics['db_hits'] == 1 and metrics['memo_hits'] == 1 and metrics['geocoded'] == 0
+        assert not second.alias_locks
+    finally:
+        server.shutdown()
+
+def test_unknown_places_are_remembered_and_fall_back_to_name(monkeypatch):
+    server, base_url = start_stub_server()
+    try:
+        resolver = _resolver()
+        _use_stub(monkeypatch, base_url, resolver)
+        assert weather.weather_location_key('Atlantis') == 'atlantis'
+        assert weather.weather_location_key('atlantis ') == 'atlantis'
+        assert server.hits['/geo/1.0/direct'] == 1
+        assert resolver.get_metrics()['unresolved'] == 1
+        # Unresolved names are still looked up by name
+        assert weather.get_weather_data('Atlantis')['location'] == 'atlantis'
+    finally:
+        server.shutdown()
+
+def test_transient_geocoding_failures_are_not_stored(monkeypatch):
+    server, base_url = start_stub_server()
+    try:
+        resolver = _resolver()
+        _use_stub(monkeypatch, base_url, resolver)
+        monkeypatch.delenv('OPENWEATHER_API_KEY')
+        assert resolver.resolve('mysuru') is None
+        # The failure is held briefly instead of retried on every request
+        assert resolver.resolve('mysuru') is None
+        assert resolver.get_metrics()['failures'] == 1
+        assert not resolver.alias_locks
+
+        monkeypatch.setenv('OPENWEATHER_API_KEY', 'test-key')
+        resolver.failure_ttl = 0
+        assert resolver.resolve('mysuru')['name'] == 'Mysuru'
+        assert not resolver.alias_locks
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    import pytest
+
+    for test in (test_spellings_share_one_place_and_one_weather_call, test_resolutions_persist_across_instances,
+                 test_unknown_places_are_remembered_and_fall_back_to_name,
+                 test_transient_geocoding_failures_are_not_stored):
+        with pytest.MonkeyPatch.context() as monkeypatch:
+            test(monkeypatch)
+    print("✅ Location resolver tests passed!")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import time
+
+from services.model_router import ModelRouter, RoutedModel
+from utils.model_profiles import record_model_profile
+
+def _model(name, delay, accuracy=0.9, provides_score=True, features=('ph',)):
+    def predict(instance, params):
+        time.sleep(delay)
+        return {'fertility_level': 'Good', 'fertility_score': 70.0 if provides_score else None}
+    return RoutedModel(name=name, description=name, required_features=list(features), accuracy=accuracy,
+                       artifacts=[], loader=lambda: object(), predict=predict, provides_score=provides_score)
+
+def _wait_for_profiling(router, timeout=5):
+    deadline = time.time() + timeout
+    while router.profiling and time.time() < deadline:
+        time.sleep(0.01)
+    assert not router.profiling
+
+def test_unmeasured_models_are_profiled_in_the_background():
+    router = ModelRouter()
+    router.register(_model('fast', 0.0))
+    router.register(_model('slow', 0.02))
+    slow = router.models['slow']
+    slow.loader = lambda: time.sleep(0.5) or object()
+    router.warm_up_in_background({'ph': 6.5})
+    while router.models['fast'].latency_ms is None:
+        time.sleep(0.005)
+    # While the slow model loads, requests are neither blocked by it nor by profiling
+    start = time.perf_counter()
+    assert router.predict({'ph': 6.5})['model'] == 'fast'
+    assert time.perf_counter() - start < 0.4
+    _wait_for_profiling(router)
+    assert all(model.latency_ms is not None for model in router.models.values())
+    assert router.predict({'ph': 6.5})['model'] == 'fast'
+
+def test_unmeasured_cheaper_models_win_once_profiled():
+    router = ModelRouter()
+    router.register(_model('slow', 0.02))
+    router.register(_model('fast', 0.0))
+    router.predict({'ph': 6.5})
+    _wait_for_profiling(router)
+    assert router.predict({'ph': 6.5})['model'] == 'fast'
+
+def test_models_that_fail_to_load_are_not_retried_for_profiling():
+    router = ModelRouter()
+    broken = _model('broken', 0.0)
+    broken.loader = lambda: 1 / 0
+    router.register(broken)
+    router.register(_model('working', 0.01))
+    assert router.predict({'ph': 6.5})['model'] == 'working'
+    _wait_for_profiling(router)
+    assert broken.load_error and router.candidates(['ph'])[-1] is broken
+    assert router.profile_in_background(router.candidates(['ph']), {'ph': 6.5}) == []
+    assert broken.errors == 2  # the request's attempt and the profiler's
+
+def test_scoreless_models_need_opt_in_and_tiers_use_recorded_accuracy():
+    router = ModelRouter()
+    router.register(_model('micro', 0.0, provides_score=False))
+    router.register(_model('unprofiled', 0.01, accuracy=None))
+    router.warm_up_in_background({'ph': 6.5})
+    _wait_for_profiling(router)
+    assert router.predict({'ph': 6.5}, 'basic')['model'] == 'unprofiled'
+    assert router.predict({'ph': 6.5}, 'basic', require_score=False)['model'] == 'micro'
+
+    # Unknown accuracy only qualifies for the basic tier until training records one
+    assert [m.name for m in router.candidates(['ph'], 'standard')] == []
+    path = os.path.join(tempfile.mkdtemp(), 'model_profiles.json')
+    with open(path, 'w') as f:
+        f.write('{"unprofiled": {"accuracy": 0.81}}')
+    router.apply_overrides(path)
+    assert [m.name for m in router.candidates(['ph'], 'standard')] == ['unprofiled']
+
+def test_recorded_accuracies_are_reloaded_when_the_file_changes():
+    path = os.path.join(tempfile.mkdtemp(), 'model_profiles.json')
+    router = ModelRouter(profiles_path=path)
+    router.register(_model('retrained', 0.0, accuracy=None))
+    assert router.candidates(['ph'], 'high') == []
+
+    # A retrain in another process records a new holdout accuracy
+    record_model_profile('retrained', 0.9, path)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert [m.name for m in router.candidates(['ph'], 'high')] == ['retrained']
+
+if __name__ == "__main__":
+    test_unmeasured_models_are_profiled_in_the_background()
+    test_unmeasured_cheaper_models_win_once_profiled()
+    test_models_that_fail_to_load_are_not_retried_for_profiling()
+    test_scoreless_models_need_opt_in_and_tiers_use_recorded_accuracy()
+    test_recorded_accuracies_are_reloaded_when_the_file_changes()
+    print("✅ Model router tests passed!")
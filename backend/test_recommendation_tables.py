@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+import os
+import random
+import tempfile
+
+import services.enhanced_predictor as enhanced_predictor
+from utils.recommendation_tables import Axis, RecommendationTable, above, thaw, write_tables
+from utils.recommendations import FERTILIZER_TABLE, _fertilizer_rules, get_fertilizer_recommendations
+
+# Every threshold the rules compare against, per input
+THRESHOLDS = {
+    'ph': (5.5, 6.0, 6.5, 7.5, 8.0), 'nitrogen': (80, 120, 200), 'phosphorus': (15, 25, 40),
+    'potassium': (100, 120, 180, 250), 'organic_carbon': (1.0,), 'magnesium': (50,), 'calcium': (400,),
+    'sulfur': (20,), 'temperature': (18, 28), 'moisture': (20, 35), 'sand': (60,), 'clay': (40,)
+}
+
+def _samples(count=5000, seed=4):
+    rng = random.Random(seed)
+    for _ in range(count):
+        soil = {}
+        for key, thresholds in THRESHOLDS.items():
+            if rng.random() < 0.1:
+                continue  # missing, so the rule default applies
+            edge = rng.choice(thresholds)
+            soil[key] = rng.choice([edge, edge - 0.01, edge + 0.01, rng.uniform(edge - 40, edge + 40)])
+        yield soil, rng.choice([44.99, 45, 75, 75.01, 80, 80.01, rng.uniform(20, 100)]), \
+            rng.choice(['Low', 'Medium', 'High', None])
+
+def test_tables_match_rule_functions():
+    for soil, score, level in _samples():
+        assert thaw(FERTILIZER_TABLE.lookup(soil, fertility_level=level)) == \
+            _fertilizer_rules({**soil, 'fertility_level': level})
+        assert list(enhanced_predictor.FERTILIZER_TABLE.lookup(soil, fertility_score=score)) == \
+            enhanced_predictor._fertilizer_rules({**soil, 'fertility_score': score})
+        assert list(enhanced_predictor.CROP_TABLE.lookup(soil, fertility_score=score)) == \
+            enhanced_predictor._crop_rules({**soil, 'fertility_score': score})
+
+def test_recommendations_come_from_the_table():
+    soil = {'ph': 5.8, 'nitrogen': 60, 'phosphorus': 12, 'potassium': 90, 'organic_carbon': 0.8}
+    recommendations = get_fertilizer_recommendations(soil, {'level': 'Low'})
+    payload = FERTILIZER_TABLE.lookup(soil, fertility_level='Low')
+    # The shared payload is read-only; callers get their own plain copy
+    assert [fertilizer['name'] for fertilizer in recommendations['primary_fertilizers']] == \
+        [fertilizer['name'] for fertilizer in payload['primary_fertilizers']]
+    assert recommendations['warnings'] == thaw(payload['warnings'])
+    recommendations['primary_fertilizers'][0]['name'] = 'changed'
+    recommendations['warnings'].append('changed')
+    assert payload['primary_fertilizers'][0]['name'] != 'changed' and 'changed' not in payload['warnings']
+    try:
+        payload['primary_fertilizers'][0]['name'] = 'changed'
+        assert False, 'shared payload dicts must be read-only'
+    except TypeError:
+        pass
+    assert recommendations['dosage_recommendations']['deficits_kg_per_ha']['nitrogen'] > 0
+
+    predictor = enhanced_predictor.EnhancedFertilityPredictor.__new__(enhanced_predictor.EnhancedFertilityPredictor)
+    assert isinstance(predictor.get_fertilizer_recommendations(soil, 40), list)
+    crops = predictor.get_crop_recommendations(soil, 40)
+    assert len(crops) == 6 and len(set(crops)) == 6
+    assert set(crops) <= set(enhanced_predictor.CROP_TABLE.lookup(soil, fertility_score=40))
+
+def test_serialized_tables_load_and_stale_ones_rebuild():
+    path = os.path.join(tempfile.mkdtemp(), 'tables.json')
+    axes = (Axis('ph', 6.5, cuts=(6.0, above(7.5))), Axis('level', 'Medium', labels=('Low', 'Medium')))
+    rule = lambda values: [values['ph'] < 6.0, values['ph'] > 7.5, values['level']]
+
+    built = write_tables([RecommendationTable('example', axes, rule)], path)
+    assert len(built['example']['index']) == 9
+
+    loaded = RecommendationTable('example', axes, rule, path=path)
+    assert loaded.lookup({'ph': 7.5}, level='Low') == (False, False, 'Low')
+    assert loaded.lookup({'ph': 7.51}) == (False, True, 'Medium')
+    assert loaded.lookup({}, level='High') == (False, False, None)
+    assert loaded.get_metrics()['source'] == 'serialized'
+
+    # Moving a threshold invalidates the stored table
+    changed = RecommendationTable('example', (Axis('ph', 6.5, cuts=(5.5, above(7.5))), axes[1]), rule, path=path)
+    changed.lookup({'ph': 5.8})
+    assert changed.get_metrics()['source'] == 'built'
+
+if __name__ == "__main__":
+    test_tables_match_rule_functions()
+    test_recommendations_come_from_the_table()
+    test_serialized_tables_load_and_stale_ones_rebuild()
+    print("✅ Recommendation lookup table tests passed!")
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import pytest
+
+import numpy as np
+
+import ml_models.fertility_model as fertility_model
+import services.retraining as retraining
+from ml_models.fertility_model import FertilityPredictor
+from utils.atomic_io import atomic_write_json
+
+def _use_jobs_dir(monkeypatch):
+    jobs_dir = os.path.join(tempfile.mkdtemp(), 'ml_models', 'jobs')
+    monkeypatch.setattr(retraining, 'JOBS_DIR', jobs_dir)
+    return jobs_dir
+
+def _sleeping_worker(monkeypatch):
+    """Launch a stand-in child instead of a real fit"""
+    real_popen = subprocess.Popen
+    monkeypatch.setattr(retraining.subprocess, 'Popen',
+                        lambda args, env=None: real_popen([sys.executable, '-c', 'import time; time.sleep(30)']))
+
+def test_one_active_job_and_dead_workers_are_detected(monkeypatch):
+    _use_jobs_dir(monkeypatch)
+    _sleeping_worker(monkeypatch)
+    job = retraining.submit_retrain_job([[6.5] * 8], [1])
+    # The parent records the pid right away, before the child writes anything
+    assert job['state'] == 'queued' and job['pid']
+
+    with pytest.raises(RuntimeError):
+        retraining.submit_retrain_job([[6.5] * 8], [1])
+
+    # A child that dies before its first status update no longer blocks new jobs
+    process = retraining._processes[job['job_id']]
+    process.kill()
+    process.wait()
+    assert retraining.get_job_status(job['job_id'])['state'] == 'failed'
+    second = retraining.submit_retrain_job([[6.5] * 8], [1])
+    retraining._processes[second['job_id']].kill()
+
+def test_queued_jobs_without_a_worker_expire(monkeypatch):
+    _use_jobs_dir(monkeypatch)
+    retraining._update_status('stale', state='queued', created_at='2020-01-01T00:00:00')
+    status = retraining.get_job_status('stale')
+    assert status['state'] == 'failed' and status['error'] == 'Worker process never started'
+
+def test_worker_entry_point_runs_without_the_app():
+    workdir = tempfile.mkdtemp()
+    backend = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=backend)
+    # No input file: the worker fails fast, and it never imported app.py
+    code = ("import sys, runpy; sys.argv = ['retraining', 'missing']; "
+            "runpy.run_module('services.retraining', run_name='__main__'); "
+            "assert 'app' not in sys.modules")
+    subprocess.run([sys.executable, '-c', code], cwd=workdir, env=env, check=True, timeout=120)
+    status = retraining.read_json(os.path.join(workdir, 'ml_models', 'jobs', 'missing.json'))
+    assert status['state'] == 'failed' and status['error'] == 'Job input is missing'
+
+def test_crashed_publish_is_cleared_on_load():
+    directory = tempfile.mkdtemp()
+    paths = dict(model_path=os.path.join(directory, 'model.pkl'), scaler_path=os.path.join(directory, 'scaler.pkl'))
+    published = FertilityPredictor(**paths)
+    version_path = published.version_path
+
+    # A publisher that died between marking the version odd and closing it
+    dead = subprocess.Popen([sys.executable, '-c', 'pass'])
+    dead.wait()
+    atomic_write_json({'sequence': published.loaded_version + 1, 'state': 'publishing',
+                       'pid': dead.pid, 'started_at': time.time()}, version_path)
+
+    reloaded = FertilityPredictor(**paths)
+    assert reloaded.model is not None
+    assert reloaded.loaded_version == published.loaded_version + 2
+    assert retraining.read_json(version_path)['state'] == 'recovered'
+
+def test_incremental_updates_are_bounded_and_atomic(monkeypatch):
+    monkeypatch.setattr(fertility_model, 'MAX_FOREST_TREES', 140)
+    directory = tempfile.mkdtemp()
+    predictor = FertilityPredictor(model_path=os.path.join(directory, 'model.pkl'),
+                                   scaler_path=os.path.join(directory, 'scaler.pkl'))
+    X, y = predictor.generate_synthetic_data(60, seed=7)
+    rounds = predictor.model.estimators_[1].get_params()['n_estimators']
+    seeds = []
+    generate = predictor.generate_synthetic_data
+    def recording(n_samples, seed=42):
+        seeds.append(seed)
+        return generate(n_samples, seed=seed)
+    monkeypatch.setattr(predictor, 'generate_synthetic_data', recording)
+    for _ in range(3):
+        assert predictor.incremental_update(X, y)
+    # 100 trees + 3 x 20, capped at 140 by retiring the oldest
+    assert len(predictor.model.estimators_[0].estimators_) == 140
+    # The continuation does not change the configured boosting rounds
+    assert predictor.model.estimators_[1].get_params()['n_estimators'] == rounds
+    # Replay batches follow the published version, not the process
+    assert len(set(seeds)) == 3
+    restarted = FertilityPredictor(model_path=predictor.model_path, scaler_path=predictor.scaler_path)
+    monkeypatch.setattr(restarted, 'generate_synthetic_data', recording)
+    assert restarted.incremental_update(X, y)
+    assert len(set(seeds)) == 4
+
+    # A failing update leaves the serving model and scaler untouched
+    model, mean = predictor.model, predictor.scaler.mean_.copy()
+    assert not predictor.incremental_update(X, np.full(len(X), 7))
+    assert predictor.model is model and np.allclose(predictor.scaler.mean_, mean)
+
+def test_failed_publish_fails_the_job(monkeypatch):
+    _use_jobs_dir(monkeypatch)
+    directory = tempfile.mkdtemp()
+    paths = dict(model_path=os.path.join(directory, 'model.pkl'), scaler_path=os.path.join(directory, 'scaler.pkl'))
+    published = FertilityPredictor(**paths)
+    X, y = published.generate_synthetic_data(60, seed=7)
+
+    def failing_dump(obj, path):
+        raise OSError('disk full')
+    monkeypatch.setattr(fertility_model, 'atomic_joblib_dump', failing_dump)
+
+    retraining._update_status('nospace', state='queued', created_at='2020-01-01T00:00:00')
+    atomic_write_json({'new_data': X.tolist(), 'new_labels': y.tolist(), 'full': False, **paths},
+                      retraining._input_path('nospace'))
+    retraining._run_retrain_job('nospace')
+    status = retraining.read_json(retraining._job_path('nospace'))
+    assert status['state'] == 'failed' and 'model_version' not in status
+
+    # The sequence is closed, so readers keep loading the previous artifacts
+    version = retraining.read_json(published.version_path)
+    assert version['state'] == 'failed' and version['sequence'] % 2 == 0
+    assert FertilityPredictor(**paths).model is not None
+
+if __name__ == "__main__":
+    for test in (test_one_active_job_and_dead_workers_are_detected, test_queued_jobs_without_a_worker_expire,
+                 test_incremental_updates_are_bounded_and_atomic, test_failed_publish_fails_the_job):
+        with pytest.MonkeyPatch.context() as monkeypatch:
+            test(monkeypatch)
+    test_worker_entry_point_runs_without_the_app()
+    test_crashed_publish_is_cleared_on_load()
+    print("✅ Retraining job tests passed!")
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+import numpy as np
+
+from utils.weather import (SEASON_NAMES, assess_weather_impact_batch, assess_weather_impact_on_soil,
+                           get_seasonal_adjustments, get_seasonal_adjustments_batch)
+
+def test_batch_impact_matches_single_assessment():
+    rng = np.random.default_rng(0)
+    # Random fields plus every threshold and its neighbours
+    temperature = np.concatenate([rng.uniform(-5, 45, 2000), [9.99, 10, 35, 35.01]])
+    rainfall = np.concatenate([rng.uniform(0, 400, 2000), [49.9, 50, 300, 300.1]])
+    humidity = np.concatenate([rng.uniform(10, 100, 2000), [39.9, 40, 80, 80.1]])
+
+    batch = assess_weather_impact_batch(temperature, rainfall, humidity)
+    assert len(batch) == len(temperature)
+    for i in range(len(batch)):
+        expected = assess_weather_impact_on_soil(
+            {'temperature': temperature[i], 'monthly_rainfall': rainfall[i], 'humidity': humidity[i]}, {})
+        assert batch.to_dict(i) == expected
+
+    assert sum(batch.counts().values()) == len(batch)
+    assert set(batch.labels('humidity_impact')) <= {'neutral', 'mixed', 'negative'}
+
+def test_missing_values_use_single_field_defaults():
+    batch = assess_weather_impact_batch([np.nan, 40], [None, 20], [np.nan, 90])
+    assert batch.to_dict(0) == assess_weather_impact_on_soil({}, {})
+    assert batch.to_dict(1) == assess_weather_impact_on_soil(
+        {'temperature': 40, 'monthly_rainfall': 20, 'humidity': 90}, {})
+
+def test_seasonal_batch_matches_single_lookup():
+    seasons = ['Spring', 'summer', 'AUTUMN', 'winter', 'monsoon', 'summer']
+    batch = get_seasonal_adjustments_batch(seasons)
+    for i, season in enumerate(seasons):
+        expected = get_seasonal_adjustments(season)
+        for key in ('temperature_adjustment', 'moisture_adjustment', 'nutrient_uptake_factor'):
+            assert batch[key][i] == expected[key]
+        assert get_seasonal_adjustments(SEASON_NAMES[batch['season_code'][i]]) == expected
+    assert len(get_seasonal_adjustments_batch([])['season_code']) == 0
+
+if __name__ == "__main__":
+    test_batch_impact_matches_single_assessment()
+    test_missing_values_use_single_field_defaults()
+    test_seasonal_batch_matches_single_lookup()
+    print("✅ Weather batch assessment tests passed!")
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import threading
+import time
+
+from utils.weather import WeatherCache, normalize_location
+from utils.weather_history import WeatherHistoryStore
+
+def _counting_fetch(ok=True, delay=0.0):
+    calls = []
+    def fetch(key):
+        calls.append(key)
+        time.sleep(delay)
+        return {'temperature': len(calls), 'location': key}, ok
+    return fetch, calls
+
+def test_normalized_keys_share_an_entry():
+    assert normalize_location('  New   Delhi , IN ') == normalize_location('new delhi,in') == 'new delhi,in'
+    fetch, calls = _counting_fetch()
+    cache = WeatherCache(fetch, ttl=60)
+    cache.get('New Delhi, IN')
+    cache.get(' new delhi ,in')
+    assert calls == ['new delhi,in']
+    assert cache.get_metrics()['hits'] == 1
+
+def test_stale_entry_is_served_while_refreshing():
+    fetch, calls = _counting_fetch()
+    cache = WeatherCache(fetch, ttl=0.05, stale_ttl=60)
+    assert cache.get('Pune')['temperature'] == 1
+    time.sleep(0.1)
+    
+    # Stale value comes back immediately; the refresh lands in the background
+    assert cache.get('Pune')['temperature'] == 1
+    deadline = time.time() + 2
+    while cache.get_metrics()['refreshes'] == 0 and time.time() < deadline:
+        time.sleep(0.01)
+    assert cache.get('Pune')['temperature'] == 2
+    metrics = cache.get_metrics()
+    assert metrics['stale_hits'] >= 1 and metrics['refreshes'] == 1
+
+def test_failures_are_negative_cached_briefly():
+    fetch, calls = _counting_fetch(ok=False)
+    cache = WeatherCache(fetch, ttl=60, negative_ttl=0.05)
+    cache.get('Nowhere')
+    cache.get('Nowhere')
+    assert len(calls) == 1
+    time.sleep(0.1)
+    cache.get('Nowhere')
+    assert len(calls) == 2
+    assert cache.get_metrics()['negative_hits'] == 1
+
+def test_lru_eviction_and_single_flight():
+    fetch, calls = _counting_fetch(delay=0.05)
+    cache = WeatherCache(fetch, ttl=60, max_size=2)
+    threads = [threading.Thread(target=cache.get, args=('Chennai',)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == ['chennai']
+    
+    cache.get('Mumbai')
+    cache.get('Chennai')  # Chennai is now most recently used
+    cache.get('Kochi')
+    assert cache.get_metrics()['evictions'] == 1
+    assert set(cache.entries) == {'chennai', 'kochi'}
+
+def test_waiters_give_up_on_a_hung_fetch():
+    release = threading.Event()
+    calls = []
+    def fetch(key):
+        calls.append(key)
+        if len(calls) > 1:
+            release.wait(5)  # every fetch after the first hangs until released
+        return {'temperature': len(calls), 'location': key}, True
+    cache = WeatherCache(fetch, ttl=0.01, stale_ttl=0, wait_timeout=0.05, fallback=lambda: {'temperature': None})
+    # A per-call timeout (the request deadline) overrides the default
+    cache.wait_timeout = 60
+    assert cache.get('Goa')['temperature'] == 1
+    time.sleep(0.02)
+
+    leader = threading.Thread(target=cache.get, args=('Goa',))
+    leader.start()
+    while len(calls) < 2:
+        time.sleep(0.005)
+    # The expired value beats waiting on the stuck leader; with none, the fallback
+    assert cache.get('Goa', wait_timeout=0.05)['temperature'] == 1
+    cache.entries.clear()
+    start = time.perf_counter()
+    assert cache.get('Goa', wait_timeout=0.05) == {'temperature': None}
+    assert time.perf_counter() - start < 1
+    assert cache.get_metrics()['wait_timeouts'] == 2 and len(calls) == 2
+
+    release.set()
+    leader.join()
+
+def test_processes_share_results_through_the_store():
+    store = WeatherHistoryStore(os.path.join(tempfile.mkdtemp(), 'weather.db'))
+    # Two caches over one store stand in for two web workers
+    prefetching_fetch, prefetching_calls = _counting_fetch()
+    serving_fetch, serving_calls = _counting_fetch()
+    prefetching = WeatherCache(prefetching_fetch, ttl=60, shared=store)
+    serving = WeatherCache(serving_fetch, ttl=60, shared=store)
+
+    assert prefetching.refresh('Pune')
+    assert serving.age('Pune') < 1
+    assert serving.get('Pune')['location'] == 'pune'
+    assert serving.get('Pune')['location'] == 'pune'
+    assert not serving_calls and len(prefetching_calls) == 1
+    metrics = serving.get_metrics()
+    assert metrics['shared_hits'] == 1 and metrics['hits'] == 1
+
+    # Expired shared values are not served; failures are never shared
+    expired = WeatherCache(serving_fetch, ttl=0, shared=store)
+    expired.get('Pune')
+    assert len(serving_calls) == 1
+    failing_fetch, _ = _counting_fetch(ok=False)
+    WeatherCache(failing_fetch, ttl=60, shared=store).get('Goa')
+    assert store.load_latest('goa') is None
+
+if __name__ == "__main__":
+    test_normalized_keys_share_an_entry()
+    test_stale_entry_is_served_while_refreshing()
+    test_failures_are_negative_cached_briefly()
+    test_lru_eviction_and_single_flight()
+    test_waiters_give_up_on_a_hung_fetch()
+    test_processes_share_results_through_the_store()
+    print("✅ Weather cache tests passed!")
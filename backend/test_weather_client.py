@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import utils.weather as weather
+from utils.weather_client import CircuitBreaker, CircuitOpenError, WeatherClient, WeatherClientError
+
+OWM_RESPONSE = {
+    'main': {'temp': 27.5, 'humidity': 70, 'pressure': 1009},
+    'weather': [{'description': 'light rain'}],
+    'name': 'Pune', 'sys': {'country': 'IN'},
+    'rain': {'1h': 1.2}, 'wind': {'speed': 3.1}, 'visibility': 8000
+}
+
+# OpenWeatherMap geocoding answers, keyed by the normalized query
+GEOCODING = {
+    'pune': {'name': 'Pune', 'state': 'Maharashtra', 'country': 'IN', 'lat': 18.5204, 'lon': 73.8567},
+    'pune,in': {'name': 'Pune', 'state': 'Maharashtra', 'country': 'IN', 'lat': 18.5196, 'lon': 73.8553},
+    'nashik,in': {'name': 'Nashik', 'state': 'Maharashtra', 'country': 'IN', 'lat': 19.9975, 'lon': 73.7898},
+    'mysuru': {'name': 'Mysuru', 'state': 'Karnataka', 'country': 'IN', 'lat': 12.2958, 'lon': 76.6394},
+}
+
+class StubWeatherHandler(BaseHTTPRequestHandler):
+    """
+    /ok        -> 200 JSON
+    /slow      -> sleeps ``slow_seconds`` before answering
+    /fail      -> 503 every time
+    /flaky     -> 503 for the first ``flaky_failures`` calls, then 200
+    /missing   -> 404
+    /data/2.5/weather -> OpenWeatherMap-shaped 200
+    /geo/1.0/direct   -> matches from ``GEOCODING`` (empty list if unknown)
+    """
+
+    def do_GET(self):
+        server = self.server
+        path = urlparse(self.path).path
+        with server.lock:
+            server.hits[path] = server.hits.get(path, 0) + 1
+            hits = server.hits[path]
+
+        if path == '/slow':
+            time.sleep(server.slow_seconds)
+            self._send(200, {'ok': True})
+        elif path == '/fail':
+            self._send(503, {'error': 'down'})
+        elif path == '/flaky':
+            self._send(503 if hits <= server.flaky_failures else 200, {'hits': hits})
+        elif path == '/missing':
+            self._send(404, {'error': 'city not found'})
+        elif path == '/data/2.5/weather':
+            query = parse_qs(urlparse(self.path).query)
+            name = query['q'][0] if 'q' in query else f"{query['lat'][0]},{query['lon'][0]}"
+            self._send(200, {**OWM_RESPONSE, 'name': name})
+        elif path == '/geo/1.0/direct':
+            match = GEOCODING.get(parse_qs(urlparse(self.path).query)['q'][0])
+            self._send(200, [match] if match else [])
+        else:
+            self._send(200, {'ok': True})
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        try:
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client already gave up (read timeout)
+            pass
+
+    def log_message(self, *args):
+        pass
+
+def start_stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubWeatherHandler)
+    server.daemon_threads = True
+    server.hits = {}
+    server.lock = threading.Lock()
+    server.slow_seconds = 1.0
+    server.flaky_failures = 2
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+def _client(base_url, **kwargs):
+    options = {'connect_timeout': 0.5, 'read_timeout': 0.3, 'max_retries': 2, 'backoff': 0.01}
+    options.update(kwargs)
+    return WeatherClient(base_url, **options)
+
+def test_retries_transient_errors_then_succeeds():
+    server, base_url = start_stub_server()
+    try:
+        client = _client(base_url)
+        assert client.get_json('/flaky') == {'hits': 3}
+        assert client.get_metrics()['retries'] == 2
+        assert client.breaker.state == 'closed'
+    finally:
+        server.shutdown()
+
+def test_slow_upstream_is_cut_off_by_read_timeout():
+    server, base_url = start_stub_server()
+    try:
+        client = _client(base_url, max_retries=1)
+        start = time.perf_counter()
+        try:
+            client.get_json('/slow')
+            assert False, 'expected a timeout'
+        except WeatherClientError:
+            pass
+        # Two attempts at a 0.3s read timeout, far below the 1s the server takes
+        elapsed = time.perf_counter() - start
+        assert elapsed < 0.9
+        # The bound cache waiters use covers it: 2 x (0.5 + 0.3) + 0.01
+        assert elapsed < client.worst_case_seconds() == 1.61
+
+        # The total deadline stops retries the per-attempt timeouts would allow
+        client = _client(base_url, max_retries=5, total_timeout=0.5)
+        start = time.perf_counter()
+        try:
+            client.get_json('/slow')
+            assert False, 'expected a timeout'
+        except WeatherClientError:
+            pass
+        assert time.perf_counter() - start < 0.7
+        assert client.worst_case_seconds() == 0.5
+    finally:
+        server.shutdown()
+
+def test_client_errors_are_not_retried():
+    server, base_url = start_stub_server()
+    try:
+        client = _client(base_url)
+        try:
+            client.get_json('/missing')
+            assert False, 'expected an error'
+        except WeatherClientError:
+            pass
+        assert server.hits['/missing'] == 1
+        assert client.breaker.state == 'closed'
+    finally:
+        server.shutdown()
+
+def test_breaker_opens_fails_fast_and_recovers():
+    server, base_url = start_stub_server()
+    try:
+        client = _client(base_url, max_retries=0, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=0.2))
+        for _ in range(2):
+            try:
+                client.get_json('/fail')
+            except WeatherClientError:
+                pass
+        assert client.breaker.state == 'open'
+
+        hits_before = server.hits['/fail']
+        start = time.perf_counter()
+        try:
+            client.get_json('/fail')
+            assert False, 'expected a short circuit'
+        except CircuitOpenError:
+            pass
+        assert time.perf_counter() - start < 0.05
+        assert server.hits['/fail'] == hits_before
+
+        # After the cool-down one trial call goes through and closes the breaker
+        time.sleep(0.25)
+        assert client.get_json('/ok') == {'ok': True}
+        assert client.breaker.state == 'closed'
+    finally:
+        server.shutdown()
+
+def test_weather_lookup_falls_back_to_defaults_when_upstream_is_down(monkeypatch):
+    server, base_url = start_stub_server()
+    try:
+        monkeypatch.setenv('OPENWEATHER_API_KEY', 'test-key')
+        monkeypatch.setattr(weather, 'weather_client', _client(base_url))
+        data, ok = weather._fetch_weather('pune')
+        assert ok and data['temperature'] == 27.5 and data['location'] == 'pune'
+
+        # Stop the server so connections are refused
+        server.shutdown()
+        server.server_close()
+        down = _client(base_url, max_retries=0, breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60))
+        monkeypatch.setattr(weather, 'weather_client', down)
+        data, ok = weather._fetch_weather('pune')
+        assert not ok and data == weather.get_default_weather_data()
+        assert down.breaker.state == 'open'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+if __name__ == "__main__":
+    test_retries_transient_errors_then_succeeds()
+    test_slow_upstream_is_cut_off_by_read_timeout()
+    test_client_errors_are_not_retried()
+    test_breaker_opens_fails_fast_and_recovers()
+    print("✅ Weather client tests passed!")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+
+import utils.weather as weather
+from utils.location_resolver import LocationResolver
+from utils.weather_history import RAIN_DAY_MM, WeatherHistoryStore
+
+START = datetime(2026, 6, 1, 6, 0)
+
+def _store():
+    return WeatherHistoryStore(os.path.join(tempfile.mkdtemp(), 'history.db'))
+
+def _brute_force(observations, today, window):
+    """Recompute the window from raw observations"""
+    days = {}
+    for observed_at, obs in observations:
+        day = observed_at.date()
+        if today - timedelta(days=window - 1) <= day <= today:
+            days.setdefault(day, []).append(obs)
+    if not days:
+        return None
+    temps = [sum(o['temperature'] for o in obs) / len(obs) for obs in days.values()]
+    rains = [sum(o['rainfall'] for o in obs) / len(obs) * 24 for obs in days.values()]
+    return {
+        'days_observed': len(days),
+        'avg_temperature': round(sum(temps) / len(temps), 2),
+        'total_rainfall': round(sum(rains), 2),
+        'rainfall_days': sum(rain >= RAIN_DAY_MM for rain in rains)
+    }
+
+def test_incremental_windows_match_recomputation():
+    store = _store()
+    rng = random.Random(7)
+    observations = []
+    # 60 days with gaps, several observations per day and a few late arrivals
+    for offset in range(60):
+        if rng.random() < 0.2:
+            continue
+        for _ in range(rng.randint(1, 4)):
+            observed_at = START + timedelta(days=offset, hours=rng.randint(0, 15))
+            if rng.random() < 0.1:
+                observed_at -= timedelta(days=rng.randint(1, 10))
+            obs = {'temperature': rng.uniform(15, 38), 'humidity': rng.uniform(30, 95),
+                   'rainfall': rng.choice([0, 0, 0, rng.uniform(0, 3)])}
+            observations.append((observed_at, obs))
+            store.record('pune', obs, observed_at)
+
+        today = (START + timedelta(days=offset)).date()
+        for window in (7, 30):
+            expected = _brute_force(observations, today, window)
+            actual = store.get_aggregates('pune', window, today=today)
+            if expected is None:
+                assert actual is None
+                continue
+            for key, value in expected.items():
+                assert abs(actual[key] - value) < 0.02, (offset, window, key, actual[key], value)
+
+def test_window_slides_forward_on_read():
+    store = _store()
+    for offset in range(5):
+        store.record('nashik', {'temperature': 20 + offset, 'humidity': 50, 'rainfall': 1.0},
+                     START + timedelta(days=offset))
+    last_day = (START + timedelta(days=4)).date()
+    assert store.get_aggregates('nashik', 7, today=last_day)['days_observed'] == 5
+
+    # Four days later only the last day is still inside the 7-day window
+    later = store.get_aggregates('nashik', 7, today=last_day + timedelta(days=6))
+    assert later['days_observed'] == 1 and later['avg_temperature'] == 24
+    assert later['total_rainfall'] == 24 and later['rainfall_days'] == 1
+    assert store.get_aggregates('nashik', 7, today=last_day + timedelta(days=30)) is None
+    assert store.get_aggregates('unknown', 30) is None
+
+def test_weather_helpers_use_recorded_history(monkeypatch):
+    store = _store()
+    monkeypatch.setattr(weather, 'weather_history', store)
+    # Locations stay plain names when nothing can be geocoded
+    monkeypatch.setattr(weather, 'location_resolver',
+                        LocationResolver(lambda alias: None, os.path.join(tempfile.mkdtemp(), 'locations.db')))
+    assert weather.get_historical_weather('Pune')['source'] == 'default'
+    # Heuristic until a week of history exists
+    assert weather.estimate_monthly_rainfall(0, 70, 'Pune') == 100
+
+    today = datetime.utcnow()
+    for offset in range(10):
+        store.record('pune', {'temperature': 30, 'humidity': 70, 'rainfall': 0.5 if offset % 2 else 0},
+                     today - timedelta(days=offset))
+
+    history = weather.get_historical_weather(' PUNE ')
+    assert history['source'] == 'observed' and history['days_observed'] == 10
+    assert history['total_rainfall'] == 60 and history['rainfall_days'] == 5
+    assert weather.get_historical_weather('pune', days=7)['days_observed'] == 7
+    # 60 mm over 10 observed days -> 180 mm per 30 days
+    assert weather.estimate_monthly_rainfall(0, 70, 'Pune') == 180
+
+if __name__ == "__main__":
+    test_incremental_windows_match_recomputation()
+    test_window_slides_forward_on_read()
+    print("✅ Weather history tests passed!")
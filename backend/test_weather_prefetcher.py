@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import time
+
+from flask import Flask
+
+import utils.weather as weather
+from database import db
+from models.user import User
+from models.soil_data import SoilData
+from models.chat import ChatSession, ChatMessage
+from services.weather_prefetcher import RateLimiter, WeatherPrefetcher, acquire_prefetch_lock, collect_user_locations
+from utils.location_resolver import LocationResolver
+from test_weather_client import _client, start_stub_server
+
+USER_LOCATIONS = ['Pune', ' pune ', 'Nashik,  IN', 'nashik,in', 'Mysuru', None, '']
+
+def _use_stub(monkeypatch, base_url):
+    """Point weather lookups and geocoding at the stub server with a throwaway alias table"""
+    monkeypatch.setenv('OPENWEATHER_API_KEY', 'test-key')
+    monkeypatch.setattr(weather, 'weather_client', _client(base_url))
+    resolver = LocationResolver(weather._geocode, os.path.join(tempfile.mkdtemp(), 'locations.db'))
+    monkeypatch.setattr(weather, 'location_resolver', resolver)
+    return resolver
+
+def _make_app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        for i, location in enumerate(USER_LOCATIONS):
+            db.session.add(User(first_name='Test', last_name=str(i), email=f'user{i}@example.com',
+                                password='x', location=location))
+        db.session.commit()
+    return app
+
+def test_collects_distinct_normalized_locations():
+    app = _make_app()
+    with app.app_context():
+        assert collect_user_locations() == ['mysuru', 'nashik,in', 'pune']
+
+def test_prefetch_fills_cache_from_stub_server(monkeypatch):
+    server, base_url = start_stub_server()
+    try:
+        _use_stub(monkeypatch, base_url)
+        cache = weather.WeatherCache(weather._fetch_weather, ttl=600)
+        prefetcher = WeatherPrefetcher(_make_app(), cache=cache, interval=60, rate=50, workers=3)
+
+        summary = prefetcher.run_once()
+        assert summary['locations'] == 3 and summary['refreshed'] == 3 and summary['failed'] == 0
+        assert server.hits['/data/2.5/weather'] == 3
+
+        # Requests are now served from memory without touching the server
+        assert cache.get(weather.weather_location_key('Nashik, IN'))['temperature'] == 27.5
+        assert cache.get_metrics()['hits'] == 1
+        assert server.hits['/data/2.5/weather'] == 3
+
+        # Entries that stay fresh until the next pass are not fetched again
+        summary = prefetcher.run_once()
+        assert summary['skipped_fresh'] == 3 and server.hits['/data/2.5/weather'] == 3
+    finally:
+        server.shutdown()
+
+def test_failed_prefetch_keeps_last_good_value(monkeypatch):
+    server, base_url = start_stub_server()
+    _use_stub(monkeypatch, base_url)
+    cache = weather.WeatherCache(weather._fetch_weather, ttl=600)
+    # interval >= ttl, so every pass refreshes every location
+    prefetcher = WeatherPrefetcher(_make_app(), cache=cache, interval=600, rate=50)
+    assert prefetcher.run_once()['refreshed'] == 3
+
+    server.shutdown()
+    server.server_close()
+    summary = prefetcher.run_once()
+    assert summary['failed'] == 3
+    assert cache.get(weather.weather_location_key('pune'))['temperature'] == 27.5
+
+def test_rate_limiter_spaces_requests():
+    limiter = RateLimiter(rate=20, burst=1)
+    start = time.perf_counter()
+    for _ in range(5):
+        limiter.acquire()
+    # First token is free, the other four wait 1/20 s each
+    assert time.perf_counter() - start >= 0.18
+
+def test_background_thread_runs_and_stops(monkeypatch):
+    server, base_url = start_stub_server()
+    try:
+        _use_stub(monkeypatch, base_url)
+        cache = weather.WeatherCache(weather._fetch_weather)
+        prefetcher = WeatherPrefetcher(_make_app(), cache=cache, interval=30, rate=50)
+        prefetcher.start()
+        deadline = time.time() + 5
+        while prefetcher.get_metrics()['runs'] == 0 and time.time() < deadline:
+            time.sleep(0.02)
+        prefetcher.stop(timeout=2)
+        metrics = prefetcher.get_metrics()
+        assert metrics['runs'] == 1 and metrics['refreshed'] == 3 and not metrics['running']
+    finally:
+        server.shutdown()
+
+def test_only_one_process_holds_the_prefetch_lock():
+    path = os.path.join(tempfile.mkdtemp(), 'weather_prefetch.lock')
+    # Each open() is its own lock holder, like a separate worker process
+    first = acquire_prefetch_lock(path)
+    assert first is not None
+    assert acquire_prefetch_lock(path) is None
+    first.close()
+    second = acquire_prefetch_lock(path)
+    assert second is not None
+    second.close()
+
+if __name__ == "__main__":
+    test_collects_distinct_normalized_locations()
+    test_rate_limiter_spaces_requests()
+    test_only_one_process_holds_the_prefetch_lock()
+    print("✅ Weather prefetcher tests passed!")
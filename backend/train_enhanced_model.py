@@ -13,6 +13,11 @@ from sklearn.metrics import mean_squared_error, accuracy_score, classification_r
 import joblib
 import random
 import warnings
+from training.orchestrator import TrainingTask, train_concurrently, print_training_report
+from training.synthetic_shards import generate_shards, load_dataframe
+from training.streaming import train_streaming, DEFAULT_MAX_ROWS
+from training.profiler import StageProfiler
+from utils.model_profiles import record_model_profile
 warnings.filterwarnings('ignore')
 
 def generate_comprehensive_synthetic_data(n_samples=5000):
@@ -203,12 +208,47 @@ def generate_comprehensive_synthetic_data(n_samples=5000):
     
     return pd.DataFrame(data)
 
-def train_enhanced_models():
-    """Train enhanced ML models with synthetic data"""
+def make_score_model(n_jobs=-1):
+    """Fertility score regressor (multithreaded via n_jobs)"""
+    return RandomForestRegressor(
+        n_estimators=200,
+        max_depth=15,
+        min_samples_split=5,
+        min_samples_leaf=2,
+        random_state=42,
+        n_jobs=n_jobs
+    )
+
+def make_level_model():
+    """Fertility level classifier (GradientBoosting is single-threaded)"""
+    return GradientBoostingClassifier(
+        n_estimators=150,
+        learning_rate=0.1,
+        max_depth=8,
+        random_state=42
+    )
+
+def train_enhanced_models(parallel=True, cpu_budget=None, n_samples=5000, sharded=False,
+                          profile_path='models/training_profile.json'):
+    """Train enhanced ML models with synthetic data
+    
+    With ``parallel`` the score and level models are fit concurrently in
+    separate processes sharing ``cpu_budget`` cores (default: all).
+    With ``sharded`` the data comes from the vectorized, cached shard
+    generator (training/synthetic_shards.py) instead of the row-wise one.
+    Time and memory per stage are written to ``profile_path`` as JSON.
+    """
     print("Starting enhanced model training...")
+    profiler = StageProfiler()
+    profiler.metadata.update({'script': 'train_enhanced_model.py', 'n_samples': n_samples,
+                              'parallel': parallel, 'sharded': sharded})
     
     # Generate synthetic data
-    df = generate_comprehensive_synthetic_data(5000)
+    with profiler.stage('synthetic_generation', rows=n_samples):
+        if sharded:
+            df = load_dataframe(generate_shards(n_samples))
+        else:
+            df = generate_comprehensive_synthetic_data(n_samples)
     
     # Display data statistics
     print(f"\nDataset shape: {df.shape}")
@@ -224,52 +264,58 @@ def train_enhanced_models():
                       'sulfur', 'magnesium', 'calcium', 'moisture', 'temperature',
                       'clay', 'silt', 'sand']
     
-    X = df[feature_columns]
-    y_score = df['fertility_score']
-    y_level = df['fertility_level']
-    
-    # Split data
-    X_train, X_test, y_score_train, y_score_test, y_level_train, y_level_test = train_test_split(
-        X, y_score, y_level, test_size=0.2, random_state=42
-    )
-    
-    # Scale features
-    scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
-    X_test_scaled = scaler.transform(X_test)
+    with profiler.stage('split_and_scaling'):
+        X = df[feature_columns]
+        y_score = df['fertility_score']
+        y_level = df['fertility_level']
+        
+        # Split data
+        X_train, X_test, y_score_train, y_score_test, y_level_train, y_level_test = train_test_split(
+            X, y_score, y_level, test_size=0.2, random_state=42
+        )
+        
+        # Scale features
+        scaler = StandardScaler()
+        X_train_scaled = scaler.fit_transform(X_train)
+        X_test_scaled = scaler.transform(X_test)
     
-    # Train fertility score regression model
-    print("\nTraining fertility score regression model...")
-    score_model = RandomForestRegressor(
-        n_estimators=200,
-        max_depth=15,
-        min_samples_split=5,
-        min_samples_leaf=2,
-        random_state=42,
-        n_jobs=-1
-    )
-    score_model.fit(X_train_scaled, y_score_train)
+    if parallel:
+        print("\nTraining fertility score and level models concurrently...")
+        with profiler.stage('model_fit_concurrent') as record:
+            results = train_concurrently([
+                TrainingTask('fertility_score_model', make_score_model, X_train_scaled, y_score_train, multithreaded=True),
+                TrainingTask('fertility_level_model', make_level_model, X_train_scaled, y_level_train)
+            ], cpu_budget=cpu_budget)
+            record['workers'] = {name: result['stats'] for name, result in results.items() if name != '_total'}
+        score_model = results['fertility_score_model']['model']
+        level_model = results['fertility_level_model']['model']
+        print_training_report(results)
+    else:
+        # Train fertility score regression model
+        print("\nTraining fertility score regression model...")
+        with profiler.stage('rf_score_fit'):
+            score_model = make_score_model()
+            score_model.fit(X_train_scaled, y_score_train)
+        
+        # Train fertility level classification model
+        print("Training fertility level classification model...")
+        with profiler.stage('gbm_level_fit'):
+            level_model = make_level_model()
+            level_model.fit(X_train_scaled, y_level_train)
     
-    # Evaluate score model
-    score_pred = score_model.predict(X_test_scaled)
-    score_mse = mean_squared_error(y_score_test, score_pred)
-    score_rmse = np.sqrt(score_mse)
+    with profiler.stage('evaluation', rows=len(X_test_scaled)):
+        # Evaluate score model
+        score_pred = score_model.predict(X_test_scaled)
+        score_mse = mean_squared_error(y_score_test, score_pred)
+        score_rmse = np.sqrt(score_mse)
+        
+        # Evaluate level model
+        level_pred = level_model.predict(X_test_scaled)
+        level_accuracy = accuracy_score(y_level_test, level_pred)
     print(f"Fertility score RMSE: {score_rmse:.2f}")
-    
-    # Train fertility level classification model
-    print("Training fertility level classification model...")
-    level_model = GradientBoostingClassifier(
-        n_estimators=150,
-        learning_rate=0.1,
-        max_depth=8,
-        random_state=42
-    )
-    level_model.fit(X_train_scaled, y_level_train)
-    
-    # Evaluate level model
-    level_pred = level_model.predict(X_test_scaled)
-    level_accuracy = accuracy_score(y_level_test, level_pred)
     print(f"Fertility level accuracy: {level_accuracy:.3f}")
+    profiler.metadata['metrics'] = {'score_rmse': float(score_rmse), 'level_accuracy': float(level_accuracy)}
+    record_model_profile('enhanced_rf_gbm', level_accuracy, score_rmse=float(score_rmse))
     
     # Create encoders for categorical variables
     fertilizer_encoder = LabelEncoder()
@@ -277,14 +323,20 @@ def train_enhanced_models():
     
     # Save models and preprocessing objects
     print("\nSaving models and preprocessing objects...")
-    joblib.dump(score_model, 'models/fertility_score_model.pkl')
-    joblib.dump(level_model, 'models/fertility_level_model.pkl')
-    joblib.dump(scaler, 'models/feature_scaler.pkl')
-    joblib.dump(fertilizer_encoder, 'models/fertilizer_encoder.pkl')
+    with profiler.stage('joblib_dump'):
+        joblib.dump(score_model, 'models/fertility_score_model.pkl')
+        joblib.dump(level_model, 'models/fertility_level_model.pkl')
+        joblib.dump(scaler, 'models/feature_scaler.pkl')
+        joblib.dump(fertilizer_encoder, 'models/fertilizer_encoder.pkl')
+        
+        # Save feature names and sample data for reference
+        joblib.dump(feature_columns, 'models/feature_names.pkl')
+        df.sample(100).to_csv('models/sample_data.csv', index=False)
     
-    # Save feature names and sample data for reference
-    joblib.dump(feature_columns, 'models/feature_names.pkl')
-    df.sample(100).to_csv('models/sample_data.csv', index=False)
+    profiler.print_report()
+    if profile_path:
+        profiler.write_report(profile_path)
+        print(f"Profile written to {profile_path}")
     
     # Display feature importance
     feature_importance = pd.DataFrame({
@@ -358,12 +410,30 @@ def test_model_predictions():
         print(f"  Input - pH: {scenario['ph']}, N: {scenario['nitrogen']}, P: {scenario['phosphorus']}, K: {scenario['potassium']}")
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Train the enhanced fertility score and level models')
+    parser.add_argument('--samples', type=int, default=5000)
+    parser.add_argument('--sharded', action='store_true', help='use the vectorized sharded generator')
+    parser.add_argument('--sequential', action='store_true', help='fit the models one after the other')
+    parser.add_argument('--cpu-budget', type=int, default=None)
+    parser.add_argument('--streaming', action='store_true',
+                        help='out-of-core training on sharded data with bounded memory')
+    parser.add_argument('--dataset-dir', default=None,
+                        help='existing sharded dataset for --streaming (default: generate synthetic shards)')
+    parser.add_argument('--max-rows', type=int, default=DEFAULT_MAX_ROWS,
+                        help='rows kept in memory for fitting with --streaming')
+    args = parser.parse_args()
+    
     # Create models directory if it doesn't exist
     import os
     os.makedirs('models', exist_ok=True)
     
     # Train enhanced models
-    train_enhanced_models()
+    if args.streaming:
+        train_streaming(args.dataset_dir or generate_shards(args.samples), max_rows=args.max_rows)
+    else:
+        train_enhanced_models(parallel=not args.sequential, cpu_budget=args.cpu_budget,
+                              n_samples=args.samples, sharded=args.sharded)
     
     # Test predictions
     test_model_predictions()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Micronutrient soil fertility model training (script version of the notebook)
+Reproduces modal trining/soil_fertility_pipeline.ipynb outside Jupyter:
+median imputation + standard scaling of the 12 lab features, then
+RandomForest, SVC and LogisticRegression candidates trained in parallel.
+
+Usage: python train_micronutrient_model.py --data dataset1.csv [--workers 3]
+       python train_micronutrient_model.py --synthetic 5000   # no lab dataset at hand
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, classification_report
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+
+from utils.atomic_io import atomic_joblib_dump, atomic_write_json
+from utils.model_profiles import MODEL_PROFILES_PATH, record_model_profile
+
+FEATURES = ['N', 'P', 'K', 'pH', 'EC', 'OC', 'S', 'Zn', 'Fe', 'Cu', 'Mn', 'B']
+TARGET = 'Output'
+
+# Same estimators and settings as the notebook
+CANDIDATES = {
+    'random_forest': lambda: RandomForestClassifier(n_estimators=100, random_state=42),
+    'svm': lambda: SVC(kernel='rbf', probability=True, random_state=42),
+    'logistic_regression': lambda: LogisticRegression(max_iter=1000, random_state=42),
+}
+
+MODELS_DIR = 'models'
+CACHE_DIR = os.path.join(MODELS_DIR, 'micronutrient_cache')
+MODEL_PATH = os.path.join(MODELS_DIR, 'soil_fertility_rf_model.joblib')
+FEATURE_ORDER_PATH = os.path.join(MODELS_DIR, 'feature_order.txt')
+PREPROCESSOR_PATH = os.path.join(MODELS_DIR, 'micronutrient_preprocessor.joblib')
+PREPROCESSING_PARAMS_PATH = os.path.join(MODELS_DIR, 'micronutrient_preprocessing.json')
+PROFILES_PATH = MODEL_PROFILES_PATH
+
+# Per-worker copy of the cached matrices, filled once by the pool initializer
+_data = None
+
+def generate_synthetic_lab_data(n_samples=5000, seed=42):
+    """Lab-style samples in the value ranges of the notebook dataset, with a few missing values"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'N': np.clip(rng.normal(250, 70, n_samples), 6, 400),
+        'P': np.clip(rng.gamma(2.0, 6.0, n_samples), 2.9, 125),
+        'K': np.clip(rng.normal(500, 150, n_samples), 11, 890),
+        'pH': np.clip(rng.normal(7.5, 0.6, n_samples), 0.9, 11),
+        'EC': np.clip(rng.gamma(4.0, 0.14, n_samples), 0.1, 0.95),
+        'OC': np.clip(rng.gamma(2.0, 0.35, n_samples), 0.1, 24),
+        'S': np.clip(rng.gamma(2.0, 3.5, n_samples), 0.64, 31),
+        'Zn': np.clip(rng.gamma(1.5, 0.3, n_samples), 0.07, 42),
+        'Fe': np.clip(rng.gamma(1.5, 2.5, n_samples), 0.21, 44),
+        'Cu': np.clip(rng.gamma(2.0, 0.5, n_samples), 0.09, 3),
+        'Mn': np.clip(rng.gamma(2.0, 3.0, n_samples), 0.11, 31),
+        'B': np.clip(rng.gamma(2.0, 0.45, n_samples), 0.06, 2.8),
+    })
+
+    # 0 = less fertile, 1 = fertile, 2 = highly fertile
+    score = (df['N'] / 400 + df['P'] / 40 + df['K'] / 900 + df['OC'] / 1.5
+             + df['Zn'] / 1.0 + df['Fe'] / 8 + df['B'] / 1.5 - np.abs(df['pH'] - 7.0) / 2
+             + rng.normal(0, 0.25, n_samples))
+    df[TARGET] = np.digitize(score, np.quantile(score, [0.45, 0.9]))
+
+    # Lab sheets regularly miss a value or two
+    missing = rng.random(df[FEATURES].shape) < 0.01
+    df[FEATURES] = df[FEATURES].mask(missing)
+    return df
+
+def build_preprocessor():
+    """The notebook's ColumnTransformer: median imputation then standard scaling"""
+    numeric_transformer = Pipeline(steps=[
+        ('imputer', SimpleImputer(strategy='median')),
+        ('scaler', StandardScaler())
+    ])
+    return ColumnTransformer(transformers=[('num', numeric_transformer, FEATURES)])
+
+def build_matrix_cache(df, cache_key):
+    """
+    Impute, scale and split once; reuse the result while the data is unchanged
+
+    Like the notebook, the preprocessor is fit on all rows before the
+    stratified 80/20 split.
+    """
+    path = os.path.join(CACHE_DIR, f'{cache_key}.joblib')
+    if os.path.exists(path):
+        print(f"Reusing cached preprocessed matrix {path}")
+        return path
+
+    preprocessor = build_preprocessor()
+    X = preprocessor.fit_transform(df[FEATURES])
+    y = df[TARGET].to_numpy()
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+    atomic_joblib_dump({
+        'X_train': X_train, 'X_test': X_test, 'y_train': y_train, 'y_test': y_test,
+        'preprocessor': preprocessor
+    }, path)
+    return path
+
+def dataset_cache_key(df):
+    digest = hashlib.sha1(pd.util.hash_pandas_object(df[FEATURES + [TARGET]], index=False).values.tobytes())
+    digest.update(json.dumps(FEATURES).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+def _init_worker(cache_path):
+    global _data
+    _data = joblib.load(cache_path, mmap_mode='r')
+
+def train_candidate(name):
+    """Fit one candidate on the cached split and time fit, batch predict and single-row predict"""
+    model = CANDIDATES[name]()
+    X_train, y_train = np.asarray(_data['X_train']), np.asarray(_data['y_train'])
+    X_test, y_test = np.asarray(_data['X_test']), np.asarray(_data['y_test'])
+
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    predictions = model.predict(X_test)
+    predict_seconds = time.perf_counter() - start
+
+    row = X_test[:1]
+    model.predict(row)
+    timings = []
+    for _ in range(30):
+        start = time.perf_counter()
+        model.predict(row)
+        timings.append(time.perf_counter() - start)
+
+    return {
+        'name': name,
+        'model': model,
+        'accuracy': float(accuracy_score(y_test, predictions)),
+        'report': classification_report(y_test, predictions, output_dict=True, zero_division=0),
+        'fit_seconds': fit_seconds,
+        'predict_seconds': predict_seconds,
+        'latency_ms': float(np.median(timings) * 1000)
+    }
+
+def train_candidates(cache_path, workers=None):
+    with ProcessPoolExecutor(max_workers=workers or len(CANDIDATES), initializer=_init_worker,
+                             initargs=(cache_path,)) as pool:
+        futures = {name: pool.submit(train_candidate, name) for name in CANDIDATES}
+        return {name: future.result() for name, future in futures.items()}
+
+def preprocessing_params(preprocessor):
+    """Plain-number copy of the fitted preprocessor for pandas-free serving"""
+    numeric = preprocessor.named_transformers_['num']
+    return {
+        'features': FEATURES,
+        'medians': numeric.named_steps['imputer'].statistics_.tolist(),
+        'mean': numeric.named_steps['scaler'].mean_.tolist(),
+        'scale': numeric.named_steps['scaler'].scale_.tolist()
+    }
+
+def save_artifacts(results, preprocessor, data_source):
+    """Write the notebook's artifacts plus the preprocessor and router profile"""
+    os.makedirs(MODELS_DIR, exist_ok=True)
+    rf = results['random_forest']
+    atomic_joblib_dump(rf['model'], MODEL_PATH)
+    with open(FEATURE_ORDER_PATH, 'w') as f:
+        f.write('\n'.join(FEATURES))
+    atomic_joblib_dump(preprocessor, PREPROCESSOR_PATH)
+    atomic_write_json(preprocessing_params(preprocessor), PREPROCESSING_PARAMS_PATH)
+
+    record_model_profile('micronutrient_rf', rf['accuracy'], PROFILES_PATH, data_source=data_source, candidates={
+        name: {key: result[key] for key in ('accuracy', 'fit_seconds', 'predict_seconds', 'latency_ms')}
+        for name, result in results.items()
+    })
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the 12-feature micronutrient fertility model')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--data', default='dataset1.csv', help='lab CSV with the 12 features and "Output"')
+    source.add_argument('--synthetic', type=int, metavar='N', help='train on N synthetic lab samples instead')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        df = generate_synthetic_lab_data(args.synthetic)
+        data_source = f'synthetic:{args.synthetic}'
+    else:
+        if not os.path.exists(args.data):
+            parser.error(f"{args.data} not found (pass --data PATH or --synthetic N)")
+        df = pd.read_csv(args.data)
+        data_source = os.path.abspath(args.data)
+
+    print(f"Shape: {df.shape}")
+    print(f"Missing values: {int(df[FEATURES].isnull().sum().sum())}")
+    print(f"Class distribution:\n{df[TARGET].value_counts().sort_index()}")
+
+    start = time.perf_counter()
+    cache_path = build_matrix_cache(df, dataset_cache_key(df))
+    print(f"Preprocessed matrix ready in {time.perf_counter() - start:.2f}s")
+
+    print(f"\nTraining {len(CANDIDATES)} candidates in parallel...")
+    start = time.perf_counter()
+    results = train_candidates(cache_path, args.workers)
+    print(f"All candidates done in {time.perf_counter() - start:.2f}s\n")
+
+    print(f"{'model':<22}{'accuracy':>9}{'fit s':>9}{'batch s':>9}{'row ms':>9}")
+    for name, result in sorted(results.items(), key=lambda item: item[1]['accuracy'], reverse=True):
+        print(f"{name:<22}{result['accuracy']:>9.3f}{result['fit_seconds']:>9.2f}"
+              f"{result['predict_seconds']:>9.3f}{result['latency_ms']:>9.2f}")
+
+    importance = pd.DataFrame({
+        'feature': FEATURES,
+        'importance': results['random_forest']['model'].feature_importances_
+    }).sort_values('importance', ascending=False)
+    print(f"\nRandomForest feature importance:\n{importance.to_string(index=False)}")
+
+    save_artifacts(results, joblib.load(cache_path)['preprocessor'], data_source)
+    print(f"\n✅ Saved {MODEL_PATH}, {FEATURE_ORDER_PATH} and {PREPROCESSOR_PATH}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Concurrent model training with a shared CPU budget
+
+Independent models are fit side by side in separate worker processes. Each
+task states whether it can use several cores (e.g. RandomForest via n_jobs)
+or is inherently single-threaded (e.g. GradientBoostingClassifier); the
+budget gives single-threaded tasks one core each and splits the rest between
+the parallel ones, so the whole bundle finishes in roughly the time of the
+slowest model without oversubscribing the machine.
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from threadpoolctl import threadpool_limits
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+class TrainingTask:
+    """One model to fit: a factory for the unfitted estimator plus its data"""
+
+    def __init__(self, name: str, factory: Callable[..., Any], X, y, multithreaded: bool = False):
+        self.name = name
+        self.factory = factory
+        self.X = X
+        self.y = y
+        self.multithreaded = multithreaded
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if os.uname().sysname == 'Darwin' else peak / 1024
+
+def allocate_cpu_budget(tasks: List[TrainingTask], cpu_budget: int) -> Dict[str, int]:
+    """Cores per task: one for each single-threaded task, the rest shared by multithreaded ones"""
+    multithreaded = [task for task in tasks if task.multithreaded]
+    single = len(tasks) - len(multithreaded)
+    spare = max(cpu_budget - single, len(multithreaded))
+
+    allocation = {task.name: 1 for task in tasks if not task.multithreaded}
+    for i, task in enumerate(multithreaded):
+        share = spare // len(multithreaded) + (1 if i < spare % len(multithreaded) else 0)
+        allocation[task.name] = max(1, share)
+    return allocation
+
+def _fit_task(name: str, factory: Callable[..., Any], X, y, n_threads: int,
+              multithreaded: bool) -> Dict:
+    """Worker entry point: fit one model and measure it"""
+    rss_before = _peak_rss_mb()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+
+    with threadpool_limits(limits=n_threads):
+        model = factory(n_threads) if multithreaded else factory()
+        model.fit(X, y)
+
+    peak = _peak_rss_mb()
+    return {
+        'name': name,
+        'model': model,
+        'stats': {
+            'threads': n_threads,
+            'wall_seconds': time.perf_counter() - wall_start,
+            'cpu_seconds': time.process_time() - cpu_start,
+            'peak_rss_mb': peak,
+            'fit_rss_mb': peak - rss_before if peak is not None else None,
+            'pid': os.getpid()
+        }
+    }
+
+def train_concurrently(tasks: List[TrainingTask], cpu_budget: Optional[int] = None) -> Dict[str, Dict]:
+    """
+    Fit every task in its own process and return {name: {'model', 'stats'}}
+
+    ``factory`` must return an unfitted estimator. Multithreaded tasks' factories
+    receive the number of threads granted (pass it on as ``n_jobs``);
+    single-threaded ones are called without arguments.
+    """
+    cpu_budget = cpu_budget or os.cpu_count() or 1
+    allocation = allocate_cpu_budget(tasks, cpu_budget)
+
+    # Fresh spawned process per task so peak RSS is per model
+    context = multiprocessing.get_context('spawn')
+    results = {}
+    wall_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=len(tasks), mp_context=context, max_tasks_per_child=1) as pool:
+        futures = [
+            pool.submit(_fit_task, task.name, task.factory, task.X, task.y, allocation[task.name],
+                        task.multithreaded)
+            for task in tasks
+        ]
+        for future in futures:
+            result = future.result()
+            results[result['name']] = {'model': result['model'], 'stats': result['stats']}
+
+    results['_total'] = {'model': None, 'stats': {
+        'wall_seconds': time.perf_counter() - wall_start,
+        'cpu_budget': cpu_budget
+    }}
+    return results
+
+def print_training_report(results: Dict[str, Dict]) -> None:
+    print("\n⏱️ Training report:")
+    for name, result in results.items():
+        stats = result['stats']
+        if name == '_total':
+            print(f"   Total wall time: {stats['wall_seconds']:.2f}s (CPU budget {stats['cpu_budget']})")
+            continue
+        memory = f"{stats['peak_rss_mb']:.0f} MB peak" if stats['peak_rss_mb'] is not None else "peak n/a"
+        print(f"   {name}: {stats['wall_seconds']:.2f}s wall, {stats['cpu_seconds']:.2f}s CPU, "
+              f"{stats['threads']} thread(s), {memory}")
@@ -0,0 +1,146 @@
+"""
+Per-stage time and memory profiling for the training scripts
+
+    profiler = StageProfiler()
+    with profiler.stage('scaling'):
+        ...
+    profiler.write_report('models/training_profile.json')
+
+Each stage records wall time, CPU time (this process plus any child
+processes that finished during the stage) and resident memory at start, end
+and peak. The peak is sampled from /proc/self/statm by a background thread;
+where /proc is unavailable it falls back to the process-lifetime
+``ru_maxrss``, which is only exact for stages that set a new high.
+"""
+
+import os
+import platform
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from utils.atomic_io import atomic_write_json
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+STATM_PATH = '/proc/self/statm'
+SAMPLE_INTERVAL = 0.01
+
+def _current_rss_mb() -> Optional[float]:
+    try:
+        with open(STATM_PATH, 'r') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+def _max_rss_mb(who) -> Optional[float]:
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / 1024 / 1024 if platform.system() == 'Darwin' else peak / 1024
+
+def _children_cpu_seconds() -> float:
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+class _PeakSampler(threading.Thread):
+    """Poll the resident set size until stopped, keeping the maximum"""
+
+    def __init__(self, interval: float):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = _current_rss_mb() or 0.0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            rss = _current_rss_mb()
+            if rss is not None and rss > self.peak:
+                self.peak = rss
+
+    def stop(self) -> float:
+        self._stop_event.set()
+        self.join()
+        rss = _current_rss_mb()
+        return max(self.peak, rss or 0.0)
+
+class StageProfiler:
+    """Collect wall time, CPU time and memory for named pipeline stages"""
+
+    def __init__(self, sample_interval: float = SAMPLE_INTERVAL):
+        self.sample_interval = sample_interval
+        self.stages: List[Dict] = []
+        self.metadata: Dict = {}
+        self.started_at = datetime.utcnow().isoformat()
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str, **extra):
+        """Profile the enclosed block; ``extra`` is stored with the stage (e.g. rows=5000)"""
+        record = {'name': name, **extra}
+        use_statm = _current_rss_mb() is not None
+        sampler = _PeakSampler(self.sample_interval) if use_statm else None
+        if sampler:
+            sampler.start()
+
+        rss_start = _current_rss_mb()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        children_start = _children_cpu_seconds()
+        try:
+            yield record
+        finally:
+            record['wall_seconds'] = round(time.perf_counter() - wall_start, 4)
+            record['cpu_seconds'] = round(time.process_time() - cpu_start, 4)
+            record['child_cpu_seconds'] = round(_children_cpu_seconds() - children_start, 4)
+            if sampler:
+                record['peak_rss_mb'] = round(sampler.stop(), 1)
+                record['rss_start_mb'] = round(rss_start, 1)
+                record['rss_end_mb'] = round(_current_rss_mb(), 1)
+            else:
+                peak = _max_rss_mb(resource.RUSAGE_SELF) if resource else None
+                record['peak_rss_mb'] = round(peak, 1) if peak is not None else None
+            self.stages.append(record)
+
+    def summary(self) -> Dict:
+        return {
+            'started_at': self.started_at,
+            'total_wall_seconds': round(time.perf_counter() - self._start, 4),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            **self.metadata,
+            'stages': self.stages
+        }
+
+    def write_report(self, path: str) -> Dict:
+        """Write the JSON report atomically and return it"""
+        report = self.summary()
+        atomic_write_json(report, path)
+        return report
+
+    def print_report(self) -> None:
+        print("\n⏱️ Stage profile:")
+        for stage in self.stages:
+            peak = f"{stage['peak_rss_mb']:.0f} MB peak" if stage.get('peak_rss_mb') is not None else "peak n/a"
+            children = f" (+{stage['child_cpu_seconds']:.2f}s in workers)" if stage['child_cpu_seconds'] >= 0.01 else ""
+            print(f"   {stage['name']:<22} {stage['wall_seconds']:>8.2f}s wall, "
+                  f"{stage['cpu_seconds']:.2f}s CPU{children}, {peak}")
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, timeout=5, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
@@ -0,0 +1,193 @@
+"""
+Out-of-core training of the fertility score and level models
+
+Reads a sharded dataset (training/synthetic_shards.py layout: one directory
+per shard, one memory-mappable ``.npy`` file per column) in fixed-size
+chunks, so peak memory depends on ``chunk_rows`` and ``max_rows`` rather than
+on the size of the dataset:
+
+1. Pass one accumulates the StandardScaler statistics with ``partial_fit``.
+2. Pass two scales each chunk to float32 and streams it into a uniform
+   reservoir sample of at most ``max_rows`` training rows (plus a smaller
+   holdout reservoir for evaluation).
+3. HistGradientBoosting models bin the features once into uint8 and fit on
+   the reservoir.
+
+The artifacts keep the names the in-memory path writes, so
+services/enhanced_predictor.py loads them unchanged.
+"""
+
+import os
+import time
+from typing import Dict, Iterator
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingClassifier, HistGradientBoostingRegressor
+from sklearn.metrics import accuracy_score, mean_squared_error
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from training.profiler import StageProfiler
+from utils.model_profiles import record_model_profile
+from training.synthetic_shards import FEATURE_COLUMNS, FERTILITY_LEVELS, FERTILIZER_NAMES, iter_shards
+
+DEFAULT_CHUNK_ROWS = 100_000
+DEFAULT_MAX_ROWS = 1_000_000
+
+# Every n-th row (by global position) goes to the holdout reservoir
+HOLDOUT_EVERY = 5
+
+def _iter_chunks(dataset_dir: str, columns, chunk_rows: int) -> Iterator[Dict[str, np.ndarray]]:
+    """Yield chunks of at most ``chunk_rows`` rows across all shards"""
+    for shard in iter_shards(dataset_dir, columns):
+        n_rows = len(shard[columns[0]])
+        for start in range(0, n_rows, chunk_rows):
+            yield {name: values[start:start + chunk_rows] for name, values in shard.items()}
+
+def _feature_matrix(chunk: Dict[str, np.ndarray]) -> np.ndarray:
+    return np.column_stack([chunk[name] for name in FEATURE_COLUMNS]).astype(np.float64)
+
+class Reservoir:
+    """Uniform sample of at most ``capacity`` rows from a stream (Algorithm R, vectorized per chunk)"""
+
+    def __init__(self, capacity: int, n_features: int, rng: np.random.Generator):
+        self.capacity = capacity
+        self.X = np.empty((capacity, n_features), dtype=np.float32)
+        self.score = np.empty(capacity, dtype=np.float32)
+        self.level = np.empty(capacity, dtype=np.uint8)
+        self.size = 0
+        self.seen = 0
+        self.rng = rng
+
+    def add(self, X: np.ndarray, score: np.ndarray, level: np.ndarray) -> None:
+        n = len(X)
+        # Fill the free slots first
+        take = min(n, self.capacity - self.size)
+        if take:
+            self.X[self.size:self.size + take] = X[:take]
+            self.score[self.size:self.size + take] = score[:take]
+            self.level[self.size:self.size + take] = level[:take]
+            self.size += take
+
+        # Row with global position i replaces a random slot with probability capacity / (i + 1)
+        if take < n:
+            positions = np.arange(self.seen + take, self.seen + n)
+            slots = self.rng.integers(0, positions + 1)
+            keep = slots < self.capacity
+            rows = np.arange(take, n)[keep]
+            self.X[slots[keep]] = X[rows]
+            self.score[slots[keep]] = score[rows]
+            self.level[slots[keep]] = level[rows]
+        self.seen += n
+
+    def arrays(self):
+        return self.X[:self.size], self.score[:self.size], self.level[:self.size]
+
+def fit_streaming_scaler(dataset_dir: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> StandardScaler:
+    """One pass of StandardScaler.partial_fit over every chunk"""
+    scaler = StandardScaler()
+    for chunk in _iter_chunks(dataset_dir, FEATURE_COLUMNS, chunk_rows):
+        scaler.partial_fit(_feature_matrix(chunk))
+    # Predictors pass DataFrames, so record the column names like a DataFrame fit would
+    scaler.feature_names_in_ = np.asarray(FEATURE_COLUMNS, dtype=object)
+    return scaler
+
+def train_streaming(dataset_dir: str, output_dir: str = 'models', max_rows: int = DEFAULT_MAX_ROWS,
+                    chunk_rows: int = DEFAULT_CHUNK_ROWS, seed: int = 42) -> Dict:
+    """
+    Train the score and level models from on-disk shards with bounded memory
+
+    Returns the fitted objects and a summary of rows seen, rows used and
+    holdout metrics. A per-stage profile is written to
+    ``output_dir/training_profile.json``.
+    """
+    stats = {'chunk_rows': chunk_rows, 'max_rows': max_rows}
+    profiler = StageProfiler()
+    profiler.metadata.update({'script': 'training/streaming.py', 'dataset_dir': dataset_dir, **stats})
+
+    print("Pass 1: computing scaler statistics...")
+    start = time.perf_counter()
+    with profiler.stage('scaler_pass'):
+        scaler = fit_streaming_scaler(dataset_dir, chunk_rows)
+    stats['scaler_seconds'] = time.perf_counter() - start
+
+    print("Pass 2: scaling and sampling training rows...")
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    train = Reservoir(max_rows, len(FEATURE_COLUMNS), rng)
+    holdout = Reservoir(max(1, max_rows // (HOLDOUT_EVERY - 1)), len(FEATURE_COLUMNS), rng)
+    position = 0
+    fertilizer_codes = set()
+    columns = FEATURE_COLUMNS + ['fertility_score', 'fertility_level', 'fertilizer_recommendation']
+    with profiler.stage('sampling_pass'):
+        for chunk in _iter_chunks(dataset_dir, columns, chunk_rows):
+            X = scaler.transform(_feature_matrix(chunk)).astype(np.float32)
+            score = np.asarray(chunk['fertility_score'])
+            level = np.asarray(chunk['fertility_level'])
+            fertilizer_codes.update(np.unique(chunk['fertilizer_recommendation']).tolist())
+
+            is_holdout = (np.arange(position, position + len(X)) % HOLDOUT_EVERY) == 0
+            train.add(X[~is_holdout], score[~is_holdout], level[~is_holdout])
+            holdout.add(X[is_holdout], score[is_holdout], level[is_holdout])
+            position += len(X)
+    stats['sample_seconds'] = time.perf_counter() - start
+    stats['rows_seen'] = position
+    stats['rows_used'] = train.size
+
+    X_train, y_score_train, level_train = train.arrays()
+    X_test, y_score_test, level_test = holdout.arrays()
+    labels = np.asarray(FERTILITY_LEVELS, dtype=object)
+
+    print(f"Fitting on {train.size} of {position} rows...")
+    start = time.perf_counter()
+    score_model = HistGradientBoostingRegressor(max_iter=200, max_depth=15, min_samples_leaf=20, random_state=seed)
+    with profiler.stage('hgb_score_fit', rows=train.size):
+        score_model.fit(X_train, y_score_train)
+    stats['score_fit_seconds'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    level_model = HistGradientBoostingClassifier(max_iter=150, learning_rate=0.1, max_depth=8, random_state=seed)
+    with profiler.stage('hgb_level_fit', rows=train.size):
+        level_model.fit(X_train, labels[level_train])
+    stats['level_fit_seconds'] = time.perf_counter() - start
+
+    with profiler.stage('evaluation', rows=holdout.size):
+        stats['score_rmse'] = float(np.sqrt(mean_squared_error(y_score_test, score_model.predict(X_test))))
+        stats['level_accuracy'] = float(accuracy_score(labels[level_test], level_model.predict(X_test)))
+    print(f"Fertility score RMSE: {stats['score_rmse']:.2f}")
+    print(f"Fertility level accuracy: {stats['level_accuracy']:.3f}")
+
+    fertilizer_encoder = LabelEncoder()
+    fertilizer_encoder.fit([FERTILIZER_NAMES[code] for code in sorted(fertilizer_codes)])
+
+    print("\nSaving models and preprocessing objects...")
+    os.makedirs(output_dir, exist_ok=True)
+    with profiler.stage('joblib_dump'):
+        joblib.dump(score_model, os.path.join(output_dir, 'fertility_score_model.pkl'))
+        joblib.dump(level_model, os.path.join(output_dir, 'fertility_level_model.pkl'))
+        joblib.dump(scaler, os.path.join(output_dir, 'feature_scaler.pkl'))
+        joblib.dump(fertilizer_encoder, os.path.join(output_dir, 'fertilizer_encoder.pkl'))
+        joblib.dump(FEATURE_COLUMNS, os.path.join(output_dir, 'feature_names.pkl'))
+    # Same artifacts the router serves as enhanced_rf_gbm, so rank it on this holdout
+    record_model_profile('enhanced_rf_gbm', stats['level_accuracy'], os.path.join(output_dir, 'model_profiles.json'),
+                         score_rmse=stats['score_rmse'], trainer='training/streaming.py')
+
+    sample = next(_iter_chunks(dataset_dir, columns, 100))
+    sample_df = pd.DataFrame({name: np.asarray(values) for name, values in sample.items()})
+    sample_df['fertility_level'] = labels[sample_df['fertility_level']]
+    sample_df['fertilizer_recommendation'] = np.asarray(FERTILIZER_NAMES, dtype=object)[sample_df['fertilizer_recommendation']]
+    sample_df.to_csv(os.path.join(output_dir, 'sample_data.csv'), index=False)
+
+    profiler.metadata.update({'rows_seen': position, 'rows_used': train.size,
+                              'metrics': {'score_rmse': stats['score_rmse'], 'level_accuracy': stats['level_accuracy']}})
+    profiler.print_report()
+    profiler.write_report(os.path.join(output_dir, 'training_profile.json'))
+
+    return {
+        'score_model': score_model,
+        'level_model': level_model,
+        'scaler': scaler,
+        'fertilizer_encoder': fertilizer_encoder,
+        'stats': stats
+    }
@@ -0,0 +1,326 @@
+"""
+Sharded synthetic soil dataset for large training runs
+
+Vectorized counterpart of ``generate_comprehensive_synthetic_data`` in
+train_enhanced_model.py: the same distributions, fertility score formula,
+fertilizer rules and crop rules, but generated with NumPy a shard at a time.
+Each shard has its own seed derived from the dataset seed and shard index, so
+shards are independent, can be built in a process pool and are reproducible
+on their own.
+
+Shards are stored column by column as ``.npy`` files that can be memory
+mapped; string labels are stored as small integer codes (and the crop
+recommendation as a bitmask over ``CROP_NAMES``). A dataset lives in a
+directory named after a hash of its generation parameters, so unchanged
+parameters reuse the shards already on disk.
+
+Usage: python -m training.synthetic_shards --samples 10000000 [--workers 4]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.atomic_io import atomic_write_json, read_json
+
+# Bump when the generation logic changes so old caches are not reused
+GENERATOR_VERSION = 1
+
+CACHE_DIR = os.path.join('models', 'synthetic_shards')
+DEFAULT_SHARD_SIZE = 250_000
+
+FEATURE_COLUMNS = ['ph', 'organic_matter', 'nitrogen', 'phosphorus', 'potassium',
+                   'sulfur', 'magnesium', 'calcium', 'moisture', 'temperature',
+                   'clay', 'silt', 'sand']
+
+# Code order follows the score thresholds: code = number of thresholds reached
+FERTILITY_LEVELS = ['Very Poor', 'Poor', 'Fair', 'Good', 'Excellent']
+FERTILITY_THRESHOLDS = np.array([35, 50, 65, 80])
+
+# (nutrient, deficiency threshold, fertilizers) in the order the rules list them
+FERTILIZER_RULES = [
+    ('nitrogen', 80, ['Urea', 'Ammonium Sulfate', 'Calcium Nitrate']),
+    ('phosphorus', 25, ['Superphosphate', 'DAP', 'MAP']),
+    ('potassium', 120, ['Potassium Chloride', 'Potassium Sulfate']),
+    ('magnesium', 50, ['Epsom Salt', 'Dolomite']),
+    ('calcium', 400, ['Lime', 'Gypsum']),
+    ('sulfur', 20, ['Elemental Sulfur', 'Ammonium Sulfate']),
+]
+FERTILIZER_NAMES = list(dict.fromkeys(
+    [name for _, _, names in FERTILIZER_RULES for name in names] + ['NPK Complex', 'Balanced Fertilizer']
+))
+_NPK = FERTILIZER_NAMES.index('NPK Complex')
+_BALANCED = FERTILIZER_NAMES.index('Balanced Fertilizer')
+# One slot per (rule, fertilizer) pair, flattened in rule order
+_SLOT_RULE = np.array([i for i, (_, _, names) in enumerate(FERTILIZER_RULES) for _ in names])
+_SLOT_CODE = np.array([FERTILIZER_NAMES.index(name) for _, _, names in FERTILIZER_RULES for name in names])
+
+CROP_PH_GROUPS = [  # acidic (< 6.0), neutral, alkaline (> 7.5)
+    ['Blueberries', 'Potatoes', 'Sweet Potatoes', 'Radishes'],
+    ['Tomatoes', 'Corn', 'Wheat', 'Soybeans', 'Lettuce'],
+    ['Asparagus', 'Cabbage', 'Sugar Beets'],
+]
+CROP_MOISTURE_GROUPS = [  # dry (< 20), moderate, wet (> 35)
+    ['Cacti', 'Succulents', 'Drought-resistant crops'],
+    ['Carrots', 'Beans', 'Peas', 'Spinach'],
+    ['Rice', 'Celery', 'Watercress'],
+]
+CROP_FERTILITY_GROUPS = [  # score <= 70, score > 70
+    ['Legumes', 'Root Vegetables', 'Light Feeders'],
+    ['Leafy Greens', 'Brassicas', 'Heavy Feeders'],
+]
+CROP_NAMES = [name for groups in (CROP_PH_GROUPS, CROP_MOISTURE_GROUPS, CROP_FERTILITY_GROUPS)
+              for group in groups for name in group]
+CROPS_PER_SAMPLE = 4
+
+def _membership(groups: List[List[str]]) -> np.ndarray:
+    table = np.zeros((len(groups), len(CROP_NAMES)), dtype=bool)
+    for code, group in enumerate(groups):
+        table[code, [CROP_NAMES.index(name) for name in group]] = True
+    return table
+
+_CROP_PH_TABLE = _membership(CROP_PH_GROUPS)
+_CROP_MOISTURE_TABLE = _membership(CROP_MOISTURE_GROUPS)
+_CROP_FERTILITY_TABLE = _membership(CROP_FERTILITY_GROUPS)
+
+COLUMN_DTYPES = {
+    **{column: np.float32 for column in FEATURE_COLUMNS},
+    'fertility_score': np.float32,
+    'fertility_level': np.uint8,
+    'fertilizer_recommendation': np.uint8,
+    'crop_mask': np.uint32,
+}
+
+def generate_shard(n_rows: int, seed: int, shard_index: int) -> Dict[str, np.ndarray]:
+    """Generate one shard as a dict of column arrays"""
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(shard_index,)))
+
+    ph = np.clip(rng.normal(6.8, 1.2, n_rows), 4.0, 9.5)
+    organic_matter = np.clip(rng.exponential(2.5, n_rows), 0.5, 8.0)
+    nitrogen = np.clip(rng.gamma(2, 50, n_rows), 20, 400)
+    phosphorus = np.clip(rng.gamma(1.5, 25, n_rows), 5, 200)
+    potassium = np.clip(rng.gamma(2, 75, n_rows), 30, 600)
+    sulfur = np.clip(rng.gamma(1.8, 15, n_rows), 5, 80)
+    magnesium = np.clip(rng.gamma(2, 30, n_rows), 15, 200)
+    calcium = np.clip(rng.gamma(3, 100, n_rows), 100, 2500)
+    moisture = np.clip(rng.normal(25, 8, n_rows), 8, 60)
+    temperature = np.clip(rng.normal(22, 6, n_rows), 5, 45)
+
+    clay = np.clip(rng.normal(25, 12, n_rows), 5, 60)
+    silt = np.clip(rng.normal(35, 15, n_rows), 10, 70)
+    sand = np.clip(100 - clay - silt, 10, 80)
+    total = clay + silt + sand
+    clay, silt, sand = clay / total * 100, silt / total * 100, sand / total * 100
+
+    ph_factor = np.maximum(0.2, 1.0 - np.abs(ph - 6.75) * 0.2)
+    n_factor = np.minimum(1.0, nitrogen / 200)
+    p_factor = np.minimum(1.0, phosphorus / 50)
+    k_factor = np.minimum(1.0, potassium / 250)
+    om_factor = np.minimum(1.0, organic_matter / 4.0)
+    moisture_factor = np.where((moisture >= 20) & (moisture <= 35), 1.0,
+                               np.maximum(0.3, 1.0 - np.abs(moisture - 27.5) * 0.03))
+    temp_factor = np.where((temperature >= 15) & (temperature <= 30), 1.0,
+                           np.maximum(0.4, 1.0 - np.abs(temperature - 22.5) * 0.04))
+
+    fertility_score = (ph_factor * 0.2 + n_factor * 0.25 + p_factor * 0.2 + k_factor * 0.15 +
+                       om_factor * 0.1 + moisture_factor * 0.05 + temp_factor * 0.05) * 100
+    fertility_score = np.clip(fertility_score + rng.normal(0, 3, n_rows), 15, 98)
+    fertility_level = np.searchsorted(FERTILITY_THRESHOLDS, fertility_score, side='right')
+
+    nutrients = {'nitrogen': nitrogen, 'phosphorus': phosphorus, 'potassium': potassium,
+                 'magnesium': magnesium, 'calcium': calcium, 'sulfur': sulfur}
+    fertilizer = _pick_fertilizer(nutrients, rng, n_rows)
+    crop_mask = _pick_crops(ph, moisture, fertility_score, rng)
+
+    columns = {
+        'ph': np.round(ph, 2), 'organic_matter': np.round(organic_matter, 2),
+        'nitrogen': nitrogen, 'phosphorus': phosphorus, 'potassium': potassium,
+        'sulfur': sulfur, 'magnesium': magnesium, 'calcium': calcium,
+        'moisture': moisture, 'temperature': temperature,
+        'clay': clay, 'silt': silt, 'sand': sand,
+    }
+    for name in columns:
+        if name not in ('ph', 'organic_matter'):
+            columns[name] = np.round(columns[name], 1)
+    columns['fertility_score'] = np.round(fertility_score, 1)
+    columns['fertility_level'] = fertility_level
+    columns['fertilizer_recommendation'] = fertilizer
+    columns['crop_mask'] = crop_mask
+    return {name: values.astype(COLUMN_DTYPES[name]) for name, values in columns.items()}
+
+def _pick_fertilizer(nutrients: Dict[str, np.ndarray], rng: np.random.Generator, n_rows: int) -> np.ndarray:
+    """
+    Same choice as the row-wise rules: with no deficiency, NPK Complex or
+    Balanced Fertilizer; with up to three candidate fertilizers, one of them
+    uniformly; with more, NPK Complex a third of the time and otherwise one of
+    the first three candidates.
+    """
+    deficient = np.column_stack([nutrients[name] < threshold for name, threshold, _ in FERTILIZER_RULES])
+    slots = deficient[:, _SLOT_RULE]
+    count = slots.sum(axis=1)
+    rank = np.cumsum(slots, axis=1) - 1
+
+    choice = np.floor(rng.random(n_rows) * np.minimum(count, 3)).astype(np.int64)
+    slot = np.argmax(slots & (rank == choice[:, None]), axis=1)
+    codes = _SLOT_CODE[slot]
+
+    coin = rng.random(n_rows)
+    codes = np.where((count > 3) & (coin < 1 / 3), _NPK, codes)
+    codes = np.where(count == 0, np.where(coin < 0.5, _NPK, _BALANCED), codes)
+    return codes
+
+def _pick_crops(ph: np.ndarray, moisture: np.ndarray, fertility_score: np.ndarray,
+                rng: np.random.Generator) -> np.ndarray:
+    """Bitmask over CROP_NAMES of four crops drawn from the rule-based candidates"""
+    ph_code = np.where(ph < 6.0, 0, np.where(ph > 7.5, 2, 1))
+    moisture_code = np.where(moisture < 20, 0, np.where(moisture > 35, 2, 1))
+    fertility_code = (fertility_score > 70).astype(np.int64)
+    candidates = _CROP_PH_TABLE[ph_code] | _CROP_MOISTURE_TABLE[moisture_code] | _CROP_FERTILITY_TABLE[fertility_code]
+
+    # Random keys with non-candidates pushed past every candidate; every row
+    # has at least nine candidates so the four smallest keys are all valid
+    keys = rng.random(candidates.shape)
+    keys[~candidates] = 2.0
+    picked = np.argpartition(keys, CROPS_PER_SAMPLE, axis=1)[:, :CROPS_PER_SAMPLE]
+    return np.left_shift(np.uint32(1), picked.astype(np.uint32)).sum(axis=1, dtype=np.uint32)
+
+def decode_crop_masks(masks: np.ndarray) -> pd.Categorical:
+    """Comma-separated crop names for each bitmask (each distinct mask decoded once)"""
+    unique, inverse = np.unique(masks, return_inverse=True)
+    labels = [', '.join(name for bit, name in enumerate(CROP_NAMES) if int(mask) >> bit & 1) for mask in unique]
+    return pd.Categorical.from_codes(inverse, categories=labels)
+
+def dataset_key(n_samples: int, shard_size: int, seed: int) -> str:
+    params = {'n_samples': n_samples, 'shard_size': shard_size, 'seed': seed, 'version': GENERATOR_VERSION}
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+def _write_shard(dataset_dir: str, shard_index: int, n_rows: int, seed: int) -> str:
+    """Worker entry point: generate a shard and move it into place complete"""
+    final_dir = os.path.join(dataset_dir, f'shard_{shard_index:05d}')
+    if os.path.isdir(final_dir):
+        return final_dir
+
+    tmp_dir = f'{final_dir}.tmp-{os.getpid()}'
+    os.makedirs(tmp_dir, exist_ok=True)
+    try:
+        for name, values in generate_shard(n_rows, seed, shard_index).items():
+            np.save(os.path.join(tmp_dir, f'{name}.npy'), values)
+        os.rename(tmp_dir, final_dir)
+    except OSError:
+        # Another process published the same shard first
+        if not os.path.isdir(final_dir):
+            raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return final_dir
+
+def generate_shards(n_samples: int, shard_size: int = DEFAULT_SHARD_SIZE, seed: int = 42,
+                    cache_dir: Optional[str] = None, workers: Optional[int] = None) -> str:
+    """
+    Build (or reuse) a sharded dataset and return its directory
+
+    Shards already on disk for the same parameters are kept, so an
+    interrupted run resumes where it stopped.
+    """
+    dataset_dir = os.path.join(cache_dir or CACHE_DIR, dataset_key(n_samples, shard_size, seed))
+    manifest_path = os.path.join(dataset_dir, 'manifest.json')
+    if read_json(manifest_path):
+        print(f"Reusing cached synthetic dataset {dataset_dir}")
+        return dataset_dir
+
+    os.makedirs(dataset_dir, exist_ok=True)
+    sizes = [min(shard_size, n_samples - start) for start in range(0, n_samples, shard_size)]
+    missing = [i for i in range(len(sizes)) if not os.path.isdir(os.path.join(dataset_dir, f'shard_{i:05d}'))]
+    print(f"Generating {n_samples} synthetic soil samples in {len(sizes)} shard(s) "
+          f"({len(missing)} to build)...")
+
+    start = time.perf_counter()
+    if len(missing) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_write_shard, dataset_dir, i, sizes[i], seed) for i in missing]
+            for future in futures:
+                future.result()
+    else:
+        for i in missing:
+            _write_shard(dataset_dir, i, sizes[i], seed)
+
+    atomic_write_json({
+        'n_samples': n_samples,
+        'shard_size': shard_size,
+        'seed': seed,
+        'version': GENERATOR_VERSION,
+        'shards': [{'name': f'shard_{i:05d}', 'rows': rows} for i, rows in enumerate(sizes)],
+        'columns': {name: np.dtype(dtype).name for name, dtype in COLUMN_DTYPES.items()},
+        'categories': {
+            'fertility_level': FERTILITY_LEVELS,
+            'fertilizer_recommendation': FERTILIZER_NAMES,
+            'crop_mask': CROP_NAMES,
+        },
+        'generation_seconds': round(time.perf_counter() - start, 3),
+    }, manifest_path)
+    return dataset_dir
+
+def iter_shards(dataset_dir: str, columns: Optional[List[str]] = None) -> Iterator[Dict[str, np.ndarray]]:
+    """Yield each shard as a dict of memory-mapped column arrays"""
+    manifest = read_json(os.path.join(dataset_dir, 'manifest.json'))
+    if not manifest:
+        raise FileNotFoundError(f"No complete synthetic dataset in {dataset_dir}")
+    columns = columns or list(manifest['columns'])
+    for shard in manifest['shards']:
+        shard_dir = os.path.join(dataset_dir, shard['name'])
+        yield {name: np.load(os.path.join(shard_dir, f'{name}.npy'), mmap_mode='r') for name in columns}
+
+def load_dataframe(dataset_dir: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Concatenate the shards into a DataFrame shaped like the row-wise generator's
+
+    Coded columns come back as pandas Categoricals with their label strings;
+    'crop_recommendation' is only decoded when requested explicitly since it
+    is rarely needed for training.
+    """
+    columns = columns or FEATURE_COLUMNS + ['fertility_score', 'fertility_level', 'fertilizer_recommendation']
+    stored = [name for name in columns if name != 'crop_recommendation']
+    if 'crop_recommendation' in columns:
+        stored.append('crop_mask')
+
+    parts = {name: [] for name in stored}
+    for shard in iter_shards(dataset_dir, stored):
+        for name in stored:
+            parts[name].append(shard[name])
+    arrays = {name: np.concatenate(chunks) for name, chunks in parts.items()}
+
+    data = {}
+    for name in columns:
+        if name == 'fertility_level':
+            data[name] = pd.Categorical.from_codes(arrays[name], categories=FERTILITY_LEVELS)
+        elif name == 'fertilizer_recommendation':
+            data[name] = pd.Categorical.from_codes(arrays[name], categories=FERTILIZER_NAMES)
+        elif name == 'crop_recommendation':
+            data[name] = decode_crop_masks(arrays['crop_mask'])
+        else:
+            data[name] = arrays[name]
+    return pd.DataFrame(data)
+
+def main():
+    parser = argparse.ArgumentParser(description='Pre-generate a sharded synthetic soil dataset')
+    parser.add_argument('--samples', type=int, default=1_000_000)
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    dataset_dir = generate_shards(args.samples, args.shard_size, args.seed, args.cache_dir, args.workers)
+    print(f"✅ {args.samples} rows ready in {dataset_dir} ({time.perf_counter() - start:.1f}s)")
+
+if __name__ == '__main__':
+    main()
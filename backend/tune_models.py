@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Hyperparameter tuning for the fertility score and level models
+Runs a successive-halving search over a process pool and writes a leaderboard.
+
+Usage: python tune_models.py [--model score|level|both] [--workers 4]
+"""
+
+import argparse
+import hashlib
+import inspect
+import io
+import itertools
+import json
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingClassifier
+from sklearn.metrics import accuracy_score, r2_score
+from sklearn.model_selection import KFold, StratifiedKFold
+from sklearn.preprocessing import StandardScaler
+
+from train_enhanced_model import generate_comprehensive_synthetic_data
+from utils.atomic_io import atomic_joblib_dump
+
+FEATURE_COLUMNS = ['ph', 'organic_matter', 'nitrogen', 'phosphorus', 'potassium',
+                   'sulfur', 'magnesium', 'calcium', 'moisture', 'temperature',
+                   'clay', 'silt', 'sand']
+
+SEARCH_SPACES = {
+    'score': {
+        'estimator': RandomForestRegressor,
+        'metric': 'r2',
+        'fixed': {'random_state': 42, 'n_jobs': 1},
+        'grid': {
+            'n_estimators': [100, 200, 300],
+            'max_depth': [10, 15, None],
+            'min_samples_split': [2, 5],
+            'min_samples_leaf': [1, 2, 4],
+        }
+    },
+    'level': {
+        'estimator': GradientBoostingClassifier,
+        'metric': 'accuracy',
+        'fixed': {'random_state': 42},
+        'grid': {
+            'n_estimators': [100, 150, 200],
+            'learning_rate': [0.05, 0.1, 0.2],
+            'max_depth': [3, 5, 8],
+            'subsample': [0.8, 1.0],
+        }
+    }
+}
+
+CACHE_DIR = os.path.join('models', 'tuning_cache')
+
+# Bump when the split or scaling below changes; generator edits are caught by its source hash
+FOLD_CACHE_VERSION = 1
+
+# Per-worker fold cache, filled once by the pool initializer
+_folds = None
+
+def fold_cache_key(n_samples, n_folds, seed):
+    """Hash of everything the folds are built from, known before generating any data"""
+    spec = {'n_samples': n_samples, 'n_folds': n_folds, 'seed': seed, 'features': FEATURE_COLUMNS,
+            'version': FOLD_CACHE_VERSION, 'generator': inspect.getsource(generate_comprehensive_synthetic_data)}
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+def build_fold_cache(kind, n_samples, n_folds, seed=42):
+    """
+    Split and scale the data once per (model, size, folds) and store it on disk
+
+    Every candidate evaluates against the same scaled fold matrices, so
+    workers only memory-map the cache instead of re-splitting and re-scaling.
+    The file name carries a hash of the generator inputs and source, so a
+    changed generator never reuses folds built from the old data, and the
+    data is only generated on a miss.
+    """
+    path = os.path.join(CACHE_DIR, f'{kind}_{fold_cache_key(n_samples, n_folds, seed)}.joblib')
+    if os.path.exists(path):
+        return path
+
+    target = 'fertility_score' if kind == 'score' else 'fertility_level'
+    df = generate_comprehensive_synthetic_data(n_samples)
+    X = df[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    y = df[target].to_numpy()
+
+    if kind == 'score':
+        splitter = KFold(n_splits=n_folds, shuffle=True, random_state=seed)
+    else:
+        splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=seed)
+
+    folds = []
+    for train_idx, test_idx in splitter.split(X, y):
+        scaler = StandardScaler().fit(X[train_idx])
+        # Fixed shuffle so smaller budgets use a random subset of the fold
+        order = np.random.RandomState(seed).permutation(len(train_idx))
+        folds.append({
+            'X_train': scaler.transform(X[train_idx])[order],
+            'y_train': y[train_idx][order],
+            'X_test': scaler.transform(X[test_idx]),
+            'y_test': y[test_idx]
+        })
+
+    # Written whole and renamed, so a concurrent or interrupted run never leaves a truncated cache
+    atomic_joblib_dump(folds, path)
+    return path
+
+def _init_worker(cache_path):
+    global _folds
+    _folds = joblib.load(cache_path, mmap_mode='r')
+
+def _model_size(model):
+    buffer = io.BytesIO()
+    pickle.dump(model, buffer, protocol=pickle.HIGHEST_PROTOCOL)
+    return buffer.tell()
+
+def _single_row_latency_ms(model, row, repeats=30):
+    model.predict(row)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(row)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000)
+
+def evaluate_candidate(kind, params, n_rows):
+    """Fit one candidate on every cached fold using the first ``n_rows`` training rows"""
+    space = SEARCH_SPACES[kind]
+    scores, fit_times, sizes, latencies = [], [], [], []
+
+    for fold in _folds:
+        model = space['estimator'](**space['fixed'], **params)
+        X_train = np.asarray(fold['X_train'][:n_rows])
+        y_train = np.asarray(fold['y_train'][:n_rows])
+
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_times.append(time.perf_counter() - start)
+
+        predictions = model.predict(fold['X_test'])
+        if space['metric'] == 'r2':
+            scores.append(r2_score(fold['y_test'], predictions))
+        else:
+            scores.append(accuracy_score(fold['y_test'], predictions))
+
+        sizes.append(_model_size(model))
+        latencies.append(_single_row_latency_ms(model, np.asarray(fold['X_test'][:1])))
+
+    return {
+        'params': params,
+        'rows': n_rows,
+        space['metric']: float(np.mean(scores)),
+        'fit_seconds': float(np.mean(fit_times)),
+        'model_kb': float(np.mean(sizes) / 1024),
+        'latency_ms': float(np.median(latencies))
+    }
+
+def successive_halving(kind, n_samples=5000, n_folds=3, factor=3, min_rows=500, workers=None):
+    """
+    Successive halving over the full grid for one model
+
+    Each round evaluates the surviving candidates with ``factor`` times more
+    training rows than the last, then keeps the best 1/``factor`` of them.
+    """
+    space = SEARCH_SPACES[kind]
+    metric = space['metric']
+    cache_path = build_fold_cache(kind, n_samples, n_folds)
+    max_rows = len(joblib.load(cache_path, mmap_mode='r')[0]['y_train'])
+
+    names = list(space['grid'])
+    candidates = [dict(zip(names, values)) for values in itertools.product(*space['grid'].values())]
+    results = {}
+
+    n_rows = min_rows
+    round_index = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cache_path,)) as pool:
+        while candidates:
+            n_rows = min(n_rows, max_rows)
+            print(f"  Round {round_index}: {len(candidates)} candidates x {n_rows} rows")
+
+            futures = [pool.submit(evaluate_candidate, kind, params, n_rows) for params in candidates]
+            round_results = [future.result() for future in futures]
+            for result in round_results:
+                result['round'] = round_index
+                results[json.dumps(result['params'], sort_keys=True)] = result
+
+            if len(candidates) == 1 or n_rows == max_rows:
+                break
+
+            round_results.sort(key=lambda r: r[metric], reverse=True)
+            keep = max(1, len(candidates) // factor)
+            candidates = [r['params'] for r in round_results[:keep]]
+            n_rows *= factor
+            round_index += 1
+
+    leaderboard = pd.DataFrame([
+        {**r['params'], 'round': r['round'], 'rows': r['rows'], metric: r[metric],
+         'fit_seconds': r['fit_seconds'], 'model_kb': r['model_kb'], 'latency_ms': r['latency_ms']}
+        for r in results.values()
+    ])
+    # Candidates that survived the longest first, then by score
+    return leaderboard.sort_values(['round', metric], ascending=[False, False]).reset_index(drop=True)
+
+def main():
+    parser = argparse.ArgumentParser(description='Tune the fertility score and level models')
+    parser.add_argument('--model', choices=['score', 'level', 'both'], default='both')
+    parser.add_argument('--samples', type=int, default=5000)
+    parser.add_argument('--folds', type=int, default=3)
+    parser.add_argument('--factor', type=int, default=3)
+    parser.add_argument('--min-rows', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output-dir', default='models')
+    args = parser.parse_args()
+
+    kinds = ['score', 'level'] if args.model == 'both' else [args.model]
+    for kind in kinds:
+        print(f"\n🔧 Tuning {kind} model ({SEARCH_SPACES[kind]['estimator'].__name__})...")
+        start = time.perf_counter()
+        leaderboard = successive_halving(kind, args.samples, args.folds, args.factor,
+                                         args.min_rows, args.workers)
+
+        os.makedirs(args.output_dir, exist_ok=True)
+        output_path = os.path.join(args.output_dir, f'tuning_leaderboard_{kind}.csv')
+        leaderboard.to_csv(output_path, index=False)
+
+        print(f"\n🏆 Leaderboard ({time.perf_counter() - start:.1f}s total):")
+        print(leaderboard.head(10).to_string(index=False))
+        print(f"Saved to {output_path}")
+
+if __name__ == '__main__':
+    main()
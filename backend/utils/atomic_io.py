@@ -0,0 +1,43 @@
+import json
+import os
+import tempfile
+from typing import Any, Dict, Optional
+
+import joblib
+
+def _atomic_replace(path: str, write_fn) -> None:
+    """
+    Write a file next to ``path`` and rename it into place.
+
+    The temporary file lives in the same directory so ``os.replace`` is an
+    atomic rename; readers see either the old file or the complete new one.
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write_fn(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def atomic_joblib_dump(obj: Any, path: str) -> None:
+    """Dump ``obj`` with joblib and publish it at ``path`` atomically"""
+    _atomic_replace(path, lambda f: joblib.dump(obj, f))
+
+def atomic_write_json(data: Dict, path: str, indent: Optional[int] = 2) -> None:
+    """Write ``data`` as JSON and publish it at ``path`` atomically"""
+    _atomic_replace(path, lambda f: f.write(json.dumps(data, indent=indent, default=str).encode('utf-8')))
+
+def read_json(path: str, default: Any = None) -> Any:
+    """Read a JSON file, returning ``default`` if it is missing or unreadable"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
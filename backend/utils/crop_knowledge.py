@@ -0,0 +1,421 @@
+"""
+Crop knowledge shared by recommendations, the suitability model, the
+predictor and the chatbot
+
+Every crop is one record. Each consumer ("source") keeps its own requirement
+values, because the rule sets were tuned separately (e.g. tomato needs
+N >= 100 for the rule-based suggestions but N >= 150 for the suitability
+model). ``source_table`` rebuilds each consumer's view in its original
+order, so outputs are unchanged.
+
+The store is built once per process (``crop_knowledge``) and indexed for
+lookups that stay fast as the catalog grows to thousands of varieties:
+
+* a name index over canonical keys, aliases and per-source display names
+* a centered interval tree over every requirement's pH range (stabbing
+  queries in O(log n + k))
+* one sorted index per nutrient minimum (prefix lookups by bisection)
+
+``query(ph=5.2, potassium=100)`` answers "which crops tolerate pH 5.2 and
+get by on 100 mg/kg potassium" from the most selective index, checking the
+remaining conditions only on those candidates.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Nutrient requirement keys that get a sorted index
+NUTRIENT_KEYS = {
+    'nitrogen': 'nitrogen_min',
+    'phosphorus': 'phosphorus_min',
+    'potassium': 'potassium_min',
+    'moisture': 'moisture_min',
+}
+
+CROP_RECORDS = (
+    {
+        'key': 'rice', 'name': 'Rice', 'aliases': ('rice',),
+        'requirements': {
+            'recommendations': {'name': 'rice', 'ph_range': (5.5, 7.0), 'nitrogen_min': 80, 'phosphorus_min': 15,
+                                'potassium_min': 80, 'seasons': ['spring', 'summer'], 'type': 'cereal'},
+            'suitability_model': {'name': 'Rice', 'ph_range': (5.5, 7.0), 'nitrogen_min': 80, 'phosphorus_min': 15,
+                                  'potassium_min': 100, 'moisture_min': 25, 'type': 'cereal'},
+            'chatbot': {'name': 'Rice', 'category': 'grains', 'ph_range': (5.5, 7.0), 'fertility_need': 'high',
+                        'season': 'warm'},
+        },
+    },
+    {
+        'key': 'wheat', 'name': 'Wheat', 'aliases': ('wheat',),
+        'requirements': {
+            'recommendations': {'name': 'wheat', 'ph_range': (6.0, 7.5), 'nitrogen_min': 100, 'phosphorus_min': 20,
+                                'potassium_min': 100, 'seasons': ['autumn', 'winter', 'spring'], 'type': 'cereal'},
+            'suitability_model': {'name': 'Wheat', 'ph_range': (6.0, 7.5), 'nitrogen_min': 100, 'phosphorus_min': 20,
+                                  'potassium_min': 120, 'moisture_min': 15, 'type': 'cereal'},
+            'chatbot': {'name': 'Wheat', 'category': 'grains', 'ph_range': (6.0, 7.5), 'fertility_need': 'medium',
+                        'season': 'cool'},
+        },
+    },
+    {
+        'key': 'corn', 'name': 'Corn', 'aliases': ('corn', 'maize'),
+        'requirements': {
+            'recommendations': {'name': 'corn', 'ph_range': (6.0, 7.0), 'nitrogen_min': 120, 'phosphorus_min': 25,
+                                'potassium_min': 120, 'seasons': ['spring', 'summer'], 'type': 'cereal'},
+            'suitability_model': {'name': 'Corn', 'ph_range': (6.0, 7.0), 'nitrogen_min': 120, 'phosphorus_min': 25,
+                                  'potassium_min': 150, 'moisture_min': 20, 'type': 'cereal'},
+            'chatbot': {'name': 'Corn', 'category': 'grains', 'ph_range': (6.0, 6.8), 'fertility_need': 'high',
+                        'season': 'warm'},
+        },
+    },
+    {
+        'key': 'barley', 'name': 'Barley', 'aliases': ('barley',),
+        'requirements': {
+            'suitability_model': {'name': 'Barley', 'ph_range': (6.0, 8.0), 'nitrogen_min': 80, 'phosphorus_min': 18,
+                                  'potassium_min': 100, 'moisture_min': 12, 'type': 'cereal'},
+            'chatbot': {'name': 'Barley', 'category': 'grains', 'ph_range': (6.0, 8.0), 'fertility_need': 'medium',
+                        'season': 'cool'},
+        },
+    },
+    {
+        'key': 'soybean', 'name': 'Soybeans', 'aliases': ('soybean', 'soybeans', 'soya'),
+        'requirements': {
+            'suitability_model': {'name': 'Soybeans', 'ph_range': (6.0, 7.5), 'nitrogen_min': 60, 'phosphorus_min': 25,
+                                  'potassium_min': 140, 'moisture_min': 18, 'type': 'cash_crop'},
+        },
+    },
+    {
+        'key': 'cotton', 'name': 'Cotton', 'aliases': ('cotton',),
+        'requirements': {
+            'suitability_model': {'name': 'Cotton', 'ph_range': (5.8, 8.0), 'nitrogen_min': 100, 'phosphorus_min': 30,
+                                  'potassium_min': 180, 'moisture_min': 15, 'type': 'cash_crop'},
+        },
+    },
+    {
+        'key': 'sugarcane', 'name': 'Sugarcane', 'aliases': ('sugarcane',),
+        'requirements': {
+            'suitability_model': {'name': 'Sugarcane', 'ph_range': (6.0, 7.5), 'nitrogen_min': 150,
+                                  'phosphorus_min': 35, 'potassium_min': 200, 'moisture_min': 25, 'type': 'cash_crop'},
+        },
+    },
+    {
+        'key': 'potato', 'name': 'Potatoes', 'aliases': ('potato', 'potatoes'),
+        'harvest': '2-3 weeks after flowers appear', 'spacing': '12-15 inches apart',
+        'requirements': {
+            'recommendations': {'name': 'potato', 'ph_range': (5.0, 6.5), 'nitrogen_min': 80, 'phosphorus_min': 20,
+                                'potassium_min': 200, 'seasons': ['spring', 'autumn'], 'type': 'tuber'},
+            'suitability_model': {'name': 'Potatoes', 'ph_range': (4.8, 6.5), 'nitrogen_min': 120, 'phosphorus_min': 40,
+                                  'potassium_min': 250, 'moisture_min': 20, 'type': 'cash_crop'},
+            'chatbot': {'name': 'Potatoes', 'category': 'vegetables', 'ph_range': (4.8, 6.5), 'fertility_need': 'high',
+                        'season': 'cool', 'spacing': '12-15 inches'},
+        },
+    },
+    {
+        'key': 'tomato', 'name': 'Tomatoes', 'aliases': ('tomato', 'tomatoes'),
+        'harvest': 'When fruits are fully colored but still firm', 'spacing': '18-24 inches apart',
+        'requirements': {
+            'recommendations': {'name': 'tomato', 'ph_range': (6.0, 7.0), 'nitrogen_min': 100, 'phosphorus_min': 30,
+                                'potassium_min': 150, 'seasons': ['spring', 'summer'], 'type': 'vegetable'},
+            'suitability_model': {'name': 'Tomatoes', 'ph_range': (6.0, 7.0), 'nitrogen_min': 150, 'phosphorus_min': 45,
+                                  'potassium_min': 220, 'moisture_min': 22, 'type': 'cash_crop'},
+            'chatbot': {'name': 'Tomatoes', 'category': 'vegetables', 'ph_range': (6.0, 7.0), 'fertility_need': 'high',
+                        'season': 'warm', 'spacing': '18-24 inches'},
+        },
+    },
+    {
+        'key': 'onion', 'name': 'Onions', 'aliases': ('onion', 'onions'),
+        'harvest': 'When tops begin to yellow and fall over', 'spacing': '4-6 inches apart',
+        'requirements': {
+            'suitability_model': {'name': 'Onions', 'ph_range': (6.0, 7.5), 'nitrogen_min': 100, 'phosphorus_min': 35,
+                                  'potassium_min': 180, 'moisture_min': 18, 'type': 'cash_crop'},
+            'chatbot': {'name': 'Onions', 'category': 'vegetables', 'ph_range': (6.0, 7.0), 'fertility_need': 'medium',
+                        'season': 'cool', 'spacing': '4-6 inches'},
+        },
+    },
+    {
+        'key': 'bean', 'name': 'Beans', 'aliases': ('bean', 'beans'),
+        'requirements': {
+            # Lower nitrogen need due to N-fixation
+            'recommendations': {'name': 'beans', 'ph_range': (6.0, 7.5), 'nitrogen_min': 40, 'phosphorus_min': 20,
+                                'potassium_min': 100, 'seasons': ['spring', 'summer'], 'type': 'legume'},
+        },
+    },
+    {
+        'key': 'pea', 'name': 'Peas', 'aliases': ('pea', 'peas'),
+        'requirements': {
+            # Lower nitrogen need due to N-fixation
+            'recommendations': {'name': 'peas', 'ph_range': (6.0, 7.5), 'nitrogen_min': 30, 'phosphorus_min': 15,
+                                'potassium_min': 80, 'seasons': ['autumn', 'winter', 'spring'], 'type': 'legume'},
+        },
+    },
+    {
+        'key': 'carrot', 'name': 'Carrots', 'aliases': ('carrot', 'carrots'),
+        'harvest': 'When shoulders are 3/4 inch diameter', 'spacing': '2-3 inches apart',
+        'requirements': {
+            'recommendations': {'name': 'carrot', 'ph_range': (6.0, 7.0), 'nitrogen_min': 70, 'phosphorus_min': 25,
+                                'potassium_min': 150, 'seasons': ['spring', 'autumn'], 'type': 'root'},
+            'chatbot': {'name': 'Carrots', 'category': 'vegetables', 'ph_range': (6.0, 7.0), 'fertility_need': 'low',
+                        'season': 'cool', 'spacing': '2-3 inches'},
+        },
+    },
+    {
+        'key': 'cabbage', 'name': 'Cabbage', 'aliases': ('cabbage', 'cabbages'),
+        'spacing': '12-18 inches apart',
+        'requirements': {
+            'recommendations': {'name': 'cabbage', 'ph_range': (6.0, 7.5), 'nitrogen_min': 90, 'phosphorus_min': 20,
+                                'potassium_min': 120, 'seasons': ['autumn', 'winter', 'spring'], 'type': 'leafy'},
+            'chatbot': {'name': 'Cabbage', 'category': 'vegetables', 'ph_range': (6.0, 7.5), 'fertility_need': 'high',
+                        'season': 'cool', 'spacing': '12-18 inches'},
+        },
+    },
+    {
+        'key': 'spinach', 'name': 'Spinach', 'aliases': ('spinach',),
+        'requirements': {
+            'recommendations': {'name': 'spinach', 'ph_range': (6.0, 7.5), 'nitrogen_min': 80, 'phosphorus_min': 15,
+                                'potassium_min': 100, 'seasons': ['autumn', 'winter', 'spring'], 'type': 'leafy'},
+            'chatbot': {'name': 'Spinach', 'category': 'vegetables', 'ph_range': (6.5, 7.5), 'fertility_need': 'medium',
+                        'season': 'cool', 'spacing': '4-6 inches'},
+        },
+    },
+    {
+        'key': 'lettuce', 'name': 'Lettuce', 'aliases': ('lettuce',),
+        'harvest': 'Cut outer leaves when 4-6 inches long', 'spacing': '6-8 inches apart',
+        'requirements': {
+            'chatbot': {'name': 'Lettuce', 'category': 'vegetables', 'ph_range': (6.0, 7.0), 'fertility_need': 'medium',
+                        'season': 'cool', 'spacing': '6-8 inches'},
+        },
+    },
+    {
+        'key': 'pepper', 'name': 'Peppers', 'aliases': ('pepper', 'peppers'),
+        'harvest': 'When fruits reach full size and color', 'spacing': '12-18 inches apart',
+        'requirements': {
+            'chatbot': {'name': 'Peppers', 'category': 'vegetables', 'ph_range': (6.0, 7.0), 'fertility_need': 'high',
+                        'season': 'warm', 'spacing': '12-18 inches'},
+        },
+    },
+    {
+        'key': 'blueberry', 'name': 'Blueberries', 'aliases': ('blueberry', 'blueberries'),
+        'requirements': {
+            'chatbot': {'name': 'Blueberries', 'category': 'fruits', 'ph_range': (4.5, 5.5), 'fertility_need': 'low',
+                        'season': 'perennial'},
+        },
+    },
+    {
+        'key': 'strawberry', 'name': 'Strawberries', 'aliases': ('strawberry', 'strawberries'),
+        'requirements': {
+            'chatbot': {'name': 'Strawberries', 'category': 'fruits', 'ph_range': (5.5, 6.5), 'fertility_need': 'medium',
+                        'season': 'cool'},
+        },
+    },
+)
+
+# Order in which each consumer lists its crops (outputs and tie-breaking depend on it)
+SOURCE_ORDER = {
+    'recommendations': ('rice', 'wheat', 'corn', 'tomato', 'potato', 'bean', 'pea', 'carrot', 'cabbage', 'spinach'),
+    'suitability_model': ('rice', 'wheat', 'corn', 'barley', 'soybean', 'cotton', 'sugarcane', 'potato', 'tomato',
+                          'onion'),
+    'chatbot': ('tomato', 'lettuce', 'carrot', 'pepper', 'spinach', 'onion', 'potato', 'cabbage',
+                'wheat', 'corn', 'rice', 'barley', 'blueberry', 'strawberry'),
+}
+
+# Chatbot guides, matched against messages in this order
+GUIDE_ORDER = {
+    'spacing': ('tomato', 'lettuce', 'carrot', 'pepper', 'onion', 'potato', 'cabbage'),
+    'harvest': ('tomato', 'lettuce', 'carrot', 'pepper', 'potato', 'onion'),
+}
+
+# Condition-based suggestion lists used by EnhancedFertilityPredictor.get_crop_recommendations
+CROP_GROUPS = {
+    'acidic_soil': ('Blueberries', 'Potatoes', 'Sweet Potatoes', 'Azaleas'),
+    'alkaline_soil': ('Asparagus', 'Cabbage', 'Spinach', 'Sugar Beets'),
+    'neutral_soil': ('Tomatoes', 'Corn', 'Wheat', 'Soybeans', 'Carrots'),
+    'cool_climate': ('Lettuce', 'Peas', 'Spinach', 'Kale'),
+    'hot_climate': ('Okra', 'Eggplant', 'Peppers', 'Melons'),
+    'mild_climate': ('Beans', 'Squash', 'Cucumbers', 'Broccoli'),
+    'sandy_soil': ('Carrots', 'Radishes', 'Potatoes', 'Herbs'),
+    'clay_soil': ('Rice', 'Lettuce', 'Cabbage', 'Chard'),
+    'loamy_soil': ('Tomatoes', 'Peppers', 'Beans', 'Squash'),
+    'high_fertility': ('Leafy Greens', 'Brassicas', 'Heavy Feeders'),
+    'low_fertility': ('Legumes', 'Root Vegetables', 'Light Feeders'),
+    'wet_soil': ('Rice', 'Celery', 'Watercress'),
+    'dry_soil': ('Cacti', 'Drought-resistant crops', 'Mediterranean herbs'),
+}
+
+def _name_key(name: str) -> str:
+    return ' '.join(str(name).split()).casefold()
+
+class IntervalTree:
+    """Static centered interval tree over closed intervals ``(low, high, value)``"""
+
+    def __init__(self, intervals: Iterable[Tuple[float, float, int]]):
+        self.root = self._build(list(intervals))
+
+    def _build(self, intervals):
+        if not intervals:
+            return None
+        endpoints = sorted(point for low, high, _ in intervals for point in (low, high))
+        center = endpoints[len(endpoints) // 2]
+        left = [item for item in intervals if item[1] < center]
+        right = [item for item in intervals if item[0] > center]
+        here = [item for item in intervals if item[0] <= center <= item[1]]
+
+        by_low = sorted(here, key=lambda item: item[0])
+        by_high = sorted(here, key=lambda item: -item[1])
+        return {
+            'center': center,
+            'lows': [item[0] for item in by_low],
+            'low_values': [item[2] for item in by_low],
+            'neg_highs': [-item[1] for item in by_high],
+            'high_values': [item[2] for item in by_high],
+            'left': self._build(left),
+            'right': self._build(right),
+        }
+
+    def stab(self, point: float) -> List[int]:
+        """Values of all intervals containing ``point``"""
+        found = []
+        node = self.root
+        while node is not None:
+            if point < node['center']:
+                # Intervals here end at or after the center; keep those starting by ``point``
+                found.extend(node['low_values'][:bisect_right(node['lows'], point)])
+                node = node['left']
+            elif point > node['center']:
+                found.extend(node['high_values'][:bisect_right(node['neg_highs'], -point)])
+                node = node['right']
+            else:
+                found.extend(node['low_values'])
+                break
+        return found
+
+class SortedIndex:
+    """Entries sorted by one numeric requirement, for "at most" / range lookups"""
+
+    def __init__(self, pairs: Iterable[Tuple[float, int]]):
+        pairs = sorted(pairs)
+        self.keys = [key for key, _ in pairs]
+        self.values = [value for _, value in pairs]
+
+    def at_most(self, limit: float) -> List[int]:
+        return self.values[:bisect_right(self.keys, limit)]
+
+    def count_at_most(self, limit: float) -> int:
+        return bisect_right(self.keys, limit)
+
+    def between(self, low: float, high: float) -> List[int]:
+        return self.values[bisect_left(self.keys, low):bisect_right(self.keys, high)]
+
+class CropKnowledgeStore:
+    """Indexed crop records with per-source requirements"""
+
+    def __init__(self, records: Iterable[Dict] = CROP_RECORDS, source_order: Optional[Dict] = None,
+                 guide_order: Optional[Dict] = None, groups: Optional[Dict] = None):
+        self.records: Dict[str, Dict] = {}
+        self.names: Dict[str, str] = {}
+        # One entry per (crop, source) requirement: (crop key, source, requirement dict)
+        self.entries: List[Tuple[str, str, Dict]] = []
+
+        for record in records:
+            key = record['key']
+            self.records[key] = record
+            for name in (key, record['name'], *record.get('aliases', ())):
+                self.names.setdefault(_name_key(name), key)
+            for source, requirement in record.get('requirements', {}).items():
+                self.names.setdefault(_name_key(requirement.get('name', key)), key)
+                self.entries.append((key, source, requirement))
+
+        self.source_order = source_order if source_order is not None else {
+            source: tuple(key for key, entry_source, _ in self.entries if entry_source == source)
+            for source in dict.fromkeys(source for _, source, _ in self.entries)
+        }
+        self.guide_order = guide_order or {}
+        self.groups = groups or {}
+
+        self.ph_index = IntervalTree(
+            (requirement['ph_range'][0], requirement['ph_range'][1], i)
+            for i, (_, _, requirement) in enumerate(self.entries) if 'ph_range' in requirement
+        )
+        self.nutrient_indexes = {
+            nutrient: SortedIndex((requirement[field], i) for i, (_, _, requirement) in enumerate(self.entries)
+                                  if requirement.get(field) is not None)
+            for nutrient, field in NUTRIENT_KEYS.items()
+        }
+        self.stats = {'queries': 0, 'candidates_examined': 0}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def get(self, name: str) -> Optional[Dict]:
+        """Record for a canonical key, display name, alias or any source's crop name"""
+        key = self.names.get(_name_key(name))
+        return self.records.get(key) if key else None
+
+    def requirement(self, name: str, source: str) -> Optional[Dict]:
+        record = self.get(name)
+        return record.get('requirements', {}).get(source) if record else None
+
+    def source_table(self, source: str) -> Dict[str, Dict]:
+        """``{source crop name: requirements}`` in the source's order, as that consumer defined it"""
+        table = {}
+        for key in self.source_order.get(source, ()):
+            requirement = dict(self.records[key]['requirements'][source])
+            name = requirement.pop('name', key)
+            if isinstance(requirement.get('seasons'), list):
+                requirement['seasons'] = list(requirement['seasons'])
+            table[name] = requirement
+        return table
+
+    def guide(self, kind: str) -> Dict[str, str]:
+        """``{crop key: text}`` for a chatbot guide ('spacing', 'harvest') in matching order"""
+        return {key: self.records[key][kind] for key in self.guide_order.get(kind, ())}
+
+    def group(self, name: str) -> List[str]:
+        return list(self.groups.get(name, ()))
+
+    def query(self, ph: Optional[float] = None, source: Optional[str] = None, **available) -> List[Dict]:
+        """
+        Requirements satisfied by a soil: pH within the crop's range and each
+        given nutrient level (nitrogen, phosphorus, potassium, moisture) at or
+        above the crop's minimum
+
+        Returns ``{'crop', 'source', **requirement}`` dicts in catalog order.
+        Entries without a value for a constrained nutrient are skipped.
+        """
+        unknown = set(available) - set(NUTRIENT_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown nutrient filters: {sorted(unknown)}")
+        constraints = {nutrient: level for nutrient, level in available.items() if level is not None}
+
+        # Start from the smallest candidate set
+        plans = [(self.nutrient_indexes[nutrient].count_at_most(level), nutrient)
+                 for nutrient, level in constraints.items()]
+        if ph is not None:
+            candidates = self.ph_index.stab(ph)
+            plans.append((len(candidates), None))
+        if not plans:
+            candidates = range(len(self.entries))
+        else:
+            size, nutrient = min(plans, key=lambda plan: plan[0])
+            if nutrient is not None:
+                candidates = self.nutrient_indexes[nutrient].at_most(constraints[nutrient])
+
+        results = []
+        examined = 0
+        for i in sorted(candidates):
+            examined += 1
+            key, entry_source, requirement = self.entries[i]
+            if source is not None and entry_source != source:
+                continue
+            if ph is not None:
+                low, high = requirement.get('ph_range', (None, None))
+                if low is None or not low <= ph <= high:
+                    continue
+            if any(requirement.get(NUTRIENT_KEYS[nutrient]) is None
+                   or requirement[NUTRIENT_KEYS[nutrient]] > level for nutrient, level in constraints.items()):
+                continue
+            results.append({'crop': key, 'source': entry_source, **requirement})
+
+        self.stats['queries'] += 1
+        self.stats['candidates_examined'] += examined
+        return results
+
+# Built once per process
+crop_knowledge = CropKnowledgeStore(CROP_RECORDS, SOURCE_ORDER, GUIDE_ORDER, CROP_GROUPS)
@@ -0,0 +1,135 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Soil tests report available nutrients in mg/kg; over a 15 cm plough layer
+# one mg/kg corresponds to roughly 2.24 kg per hectare
+MG_PER_KG_TO_KG_PER_HA = 2.24
+
+NUTRIENTS = ('nitrogen', 'phosphorus', 'potassium')
+
+# Keys of DosagePlan.to_dict deficits: they are N, P2O5 and K2O amounts, as on
+# fertilizer labels, not elemental P and K
+DEFICIT_KEYS = ('nitrogen', 'p2o5', 'k2o')
+
+# Levels below which get_fertilizer_recommendations reports a deficiency
+SOIL_TARGETS = {'nitrogen': 80, 'phosphorus': 15, 'potassium': 100}
+
+# Same missing-value defaults as get_fertilizer_recommendations
+SOIL_DEFAULTS = {'ph': 6.5, 'nitrogen': 100, 'phosphorus': 20, 'potassium': 100}
+
+# Fertilizer grades are labelled N-P2O5-K2O, so elemental deficits are
+# converted to oxide equivalents before products are sized
+OXIDE_FACTORS = np.array([1.0, 2.29, 1.2])
+
+# (name, grade as N-P2O5-K2O percent, nutrient the product is sized for).
+# Applied in order: DAP covers phosphorus and its nitrogen is credited
+# before urea tops up whatever nitrogen is still missing
+FERTILIZER_PRODUCTS: Tuple[Tuple[str, Tuple[float, float, float], str], ...] = (
+    ('DAP (18-46-0)', (18, 46, 0), 'phosphorus'),
+    ('Muriate of Potash (0-0-60)', (0, 0, 60), 'potassium'),
+    ('Urea (46-0-0)', (46, 0, 0), 'nitrogen'),
+)
+
+LIME_TARGET_PH = 6.5
+LIME_TRIGGER_PH = 6.0
+LIME_KG_PER_PH_UNIT = 500
+
+def _filled(values, default: float, size: Optional[int] = None) -> np.ndarray:
+    """Float array with missing values (None/NaN) replaced like ``dict.get`` defaults"""
+    array = np.asarray(values if values is not None else np.nan, dtype=float)
+    if size is not None:
+        array = np.broadcast_to(array, (size,))
+    return np.where(np.isnan(array), default, array)
+
+class DosagePlan:
+    """
+    Per-field nutrient deficits and product quantities from ``calculate_dosage_batch``
+
+    ``deficits`` is (fields, 3) in kg/ha of N, P2O5 and K2O; ``product_rates``
+    is (fields, products) in kg/ha, ordered like ``product_names``.
+    """
+
+    def __init__(self, deficits, product_rates, lime_rates, area_ha, product_names):
+        self.deficits = deficits
+        self.product_rates = product_rates
+        self.lime_rates = lime_rates
+        self.area_ha = area_ha
+        self.product_names = tuple(product_names)
+
+    def __len__(self) -> int:
+        return len(self.area_ha)
+
+    @property
+    def product_totals(self) -> np.ndarray:
+        """Kilograms of each product per field"""
+        return self.product_rates * self.area_ha[:, None]
+
+    @property
+    def lime_totals(self) -> np.ndarray:
+        return self.lime_rates * self.area_ha
+
+    def to_dict(self, index: int) -> Dict:
+        """Plain numeric plan for one field"""
+        area = float(self.area_ha[index])
+        return {
+            'area_ha': area,
+            'deficits_kg_per_ha': {key: round(float(value), 1)
+                                   for key, value in zip(DEFICIT_KEYS, self.deficits[index])},
+            'products': [
+                {'name': name, 'kg_per_ha': round(float(rate), 1), 'total_kg': round(float(rate) * area, 1)}
+                for name, rate in zip(self.product_names, self.product_rates[index])
+            ],
+            'lime_kg_per_ha': round(float(self.lime_rates[index]), 1),
+            'lime_total_kg': round(float(self.lime_rates[index]) * area, 1)
+        }
+
+    def to_dicts(self) -> List[Dict]:
+        return [self.to_dict(i) for i in range(len(self))]
+
+    def totals(self) -> Dict[str, float]:
+        """Kilograms of every product across all fields, for a season order"""
+        totals = {name: round(float(total), 1) for name, total in zip(self.product_names, self.product_totals.sum(axis=0))}
+        totals['Agricultural Lime'] = round(float(self.lime_totals.sum()), 1)
+        return totals
+
+def calculate_dosage_batch(nitrogen, phosphorus, potassium, ph=None, area_ha=1.0,
+                           products: Sequence = FERTILIZER_PRODUCTS,
+                           targets: Optional[Dict[str, float]] = None) -> DosagePlan:
+    """
+    Size fertilizer applications for many fields at once
+
+    Args:
+        nitrogen, phosphorus, potassium: per-field soil test values in mg/kg;
+            missing values (NaN/None) take the single-field defaults
+        ph: per-field pH for the lime requirement (optional)
+        area_ha: field area in hectares, scalar or per field
+        products: ``(name, (N, P2O5, K2O) percent, target nutrient)`` tuples,
+            sized in order against whatever deficit remains
+        targets: soil levels to build up to, defaults to ``SOIL_TARGETS``
+
+    Returns:
+        DosagePlan with deficits, kg/ha per product and lime, and per-field totals
+    """
+    targets = {**SOIL_TARGETS, **(targets or {})}
+    levels = np.column_stack(np.broadcast_arrays(np.atleast_1d(_filled(nitrogen, SOIL_DEFAULTS['nitrogen'])),
+                                                 _filled(phosphorus, SOIL_DEFAULTS['phosphorus']),
+                                                 _filled(potassium, SOIL_DEFAULTS['potassium'])))
+    size = len(levels)
+    target_levels = np.array([targets[nutrient] for nutrient in NUTRIENTS], dtype=float)
+    deficits = np.clip(target_levels - levels, 0, None) * MG_PER_KG_TO_KG_PER_HA * OXIDE_FACTORS
+
+    remaining = deficits.copy()
+    product_rates = np.zeros((size, len(products)))
+    for column, (name, grade, target) in enumerate(products):
+        content = np.asarray(grade, dtype=float) / 100
+        nutrient = NUTRIENTS.index(target)
+        rate = remaining[:, nutrient] / content[nutrient]
+        product_rates[:, column] = rate
+        np.clip(remaining - rate[:, None] * content, 0, None, out=remaining)
+
+    ph_values = _filled(ph, SOIL_DEFAULTS['ph'], size)
+    lime_rates = np.where(ph_values < LIME_TRIGGER_PH, (LIME_TARGET_PH - ph_values) * LIME_KG_PER_PH_UNIT, 0.0)
+
+    return DosagePlan(deficits, product_rates, lime_rates, _filled(area_ha, 1.0, size),
+                      [name for name, _, _ in products])
@@ -0,0 +1,216 @@
+"""
+Persistent mapping from free-text locations to canonical places
+
+``User.location`` is free text, so "Pune", "pune " and "Pune, IN" all name
+the same place. Each normalized spelling (alias) is geocoded once and the
+result is kept in SQLite: a ``places`` table of canonical places keyed by
+rounded coordinates (``geo:18.52,73.86``, roughly 1 km) and an
+``location_aliases`` table pointing every alias at its place. Later lookups
+are served from an in-process dict, then the table, and only unseen
+spellings reach the geocoder. Spellings the geocoder does not know are
+remembered for ``unresolved_ttl`` seconds. Transient geocoder failures
+(including a missing API key) are not stored; the alias is only kept out of
+the geocoder for ``failure_ttl`` seconds, and the caller falls back to the
+raw alias meanwhile.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+LOCATION_DB_PATH = os.getenv('LOCATION_DB_PATH', os.path.join('instance', 'locations.db'))
+LOCATION_UNRESOLVED_TTL = float(os.getenv('LOCATION_UNRESOLVED_TTL', '86400'))
+LOCATION_FAILURE_TTL = float(os.getenv('LOCATION_FAILURE_TTL', '60'))
+MEMO_MAX_SIZE = 4096
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS places (
+    place_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    state TEXT,
+    country TEXT,
+    lat REAL NOT NULL,
+    lon REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS location_aliases (
+    alias TEXT PRIMARY KEY,
+    place_id TEXT,
+    resolved_at REAL NOT NULL
+);
+"""
+
+def place_id_for(lat: float, lon: float) -> str:
+    return f"geo:{lat:.2f},{lon:.2f}"
+
+def parse_place_id(place_id: str) -> Optional[Dict]:
+    """Coordinates encoded in a place ID, or None for anything else"""
+    if not place_id.startswith('geo:'):
+        return None
+    try:
+        lat, lon = place_id[4:].split(',')
+        return {'lat': float(lat), 'lon': float(lon)}
+    except ValueError:
+        return None
+
+class LocationResolver:
+    """
+    Resolve normalized location aliases to canonical places
+
+    ``geocode(alias)`` returns ``{'name', 'lat', 'lon', 'state', 'country'}``,
+    None when the place is unknown, or raises on a transient failure.
+    """
+
+    def __init__(self, geocode: Callable[[str], Optional[Dict]], path: str = LOCATION_DB_PATH,
+                 unresolved_ttl: float = LOCATION_UNRESOLVED_TTL, failure_ttl: float = LOCATION_FAILURE_TTL):
+        self.geocode = geocode
+        self.path = path
+        self.unresolved_ttl = unresolved_ttl
+        self.failure_ttl = failure_ttl
+        self.memo: Dict[str, tuple] = {}
+        # alias -> time of the last failed geocoder call, in memory only
+        self.failed_at: Dict[str, float] = {}
+        self.lock = threading.Lock()
+        self.alias_locks: Dict[str, threading.Lock] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        self.stats = {'memo_hits': 0, 'db_hits': 0, 'geocoded': 0, 'unresolved': 0, 'failures': 0}
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened lazily so importing the module never touches the disk
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _remember(self, alias: str, place: Optional[Dict], resolved_at: float) -> None:
+        """Memoize a lookup result (caller holds the lock)"""
+        if len(self.memo) >= MEMO_MAX_SIZE:
+            self.memo.clear()
+        self.memo[alias] = (place, resolved_at)
+
+    def _memo_lookup(self, alias: str):
+        """(found, place) from the in-process memo (caller holds the lock)"""
+        cached = self.memo.get(alias)
+        if cached is None:
+            return False, None
+        place, resolved_at = cached
+        if place is None and time.time() - resolved_at >= self.unresolved_ttl:
+            del self.memo[alias]
+            return False, None
+        self.stats['memo_hits'] += 1
+        return True, place
+
+    def _recently_failed(self, alias: str) -> bool:
+        """Whether the geocoder failed for this alias within ``failure_ttl`` (caller holds the lock)"""
+        failed_at = self.failed_at.get(alias)
+        if failed_at is None:
+            return False
+        if time.time() - failed_at >= self.failure_ttl:
+            del self.failed_at[alias]
+            return False
+        return True
+
+    def _db_lookup(self, alias: str):
+        """(found, place) from the persistent table (caller holds the lock)"""
+        row = self._connection().execute(
+            "SELECT a.place_id, a.resolved_at, p.name, p.state, p.country, p.lat, p.lon "
+            "FROM location_aliases a LEFT JOIN places p ON p.place_id = a.place_id WHERE a.alias = ?",
+            (alias,)
+        ).fetchone()
+        if row is None:
+            return False, None
+        place_id, resolved_at = row[0], row[1]
+        if place_id is None:
+            if time.time() - resolved_at >= self.unresolved_ttl:
+                return False, None
+            place = None
+        else:
+            place = {'place_id': place_id, 'name': row[2], 'state': row[3], 'country': row[4],
+                     'lat': row[5], 'lon': row[6]}
+        self._remember(alias, place, resolved_at)
+        self.stats['db_hits'] += 1
+        return True, place
+
+    def _store(self, alias: str, place: Optional[Dict]) -> Optional[Dict]:
+        """Persist and memoize a geocoding result; returns the stored place (caller holds the lock)"""
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            if place is not None:
+                # Spellings of the same place share the record of the first one seen
+                conn.execute(
+                    "INSERT OR IGNORE INTO places (place_id, name, state, country, lat, lon) VALUES (?, ?, ?, ?, ?, ?)",
+                    (place['place_id'], place['name'], place.get('state'), place.get('country'),
+                     place['lat'], place['lon'])
+                )
+                row = conn.execute("SELECT place_id, name, state, country, lat, lon FROM places WHERE place_id = ?",
+                                   (place['place_id'],)).fetchone()
+                place = dict(zip(('place_id', 'name', 'state', 'country', 'lat', 'lon'), row))
+            conn.execute("INSERT OR REPLACE INTO location_aliases (alias, place_id, resolved_at) VALUES (?, ?, ?)",
+                         (alias, place['place_id'] if place else None, now))
+        self._remember(alias, place, now)
+        return place
+
+    def resolve(self, alias: str) -> Optional[Dict]:
+        """Canonical place for a normalized alias, or None if it cannot be resolved (now)"""
+        if not alias:
+            return None
+        with self.lock:
+            found, place = self._memo_lookup(alias)
+            if found or self._recently_failed(alias):
+                return place
+            alias_lock = self.alias_locks.setdefault(alias, threading.Lock())
+
+        # One geocoder call per alias even when many requests see it at once
+        with alias_lock:
+            try:
+                return self._resolve_locked(alias)
+            finally:
+                with self.lock:
+                    if self.alias_locks.get(alias) is alias_lock:
+                        del self.alias_locks[alias]
+
+    def _resolve_locked(self, alias: str) -> Optional[Dict]:
+        """Resolve an alias while holding its alias lock"""
+        with self.lock:
+            found, place = self._memo_lookup(alias)
+            if not found:
+                found, place = self._db_lookup(alias)
+            if found or self._recently_failed(alias):
+                return place
+
+        try:
+            result = self.geocode(alias)
+        except Exception as e:
+            print(f"Geocoding failed for {alias}: {e}")
+            with self.lock:
+                self.stats['failures'] += 1
+                if len(self.failed_at) >= MEMO_MAX_SIZE:
+                    self.failed_at.clear()
+                self.failed_at[alias] = time.time()
+            return None
+
+        place = None
+        if result is not None:
+            place = {'place_id': place_id_for(result['lat'], result['lon']), **result}
+        with self.lock:
+            place = self._store(alias, place)
+            self.stats['geocoded' if place else 'unresolved'] += 1
+        return place
+
+    def get_metrics(self) -> Dict:
+        with self.lock:
+            stats = dict(self.stats)
+            memo_size = len(self.memo)
+        return {**stats, 'memo_size': memo_size}
+
+    def close(self) -> None:
+        with self.lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,16 @@
+import os
+from datetime import datetime
+from typing import Dict
+
+from utils.atomic_io import atomic_write_json, read_json
+
+# Holdout metrics per routed model, written by the training scripts and read by
+# services.model_router
+MODEL_PROFILES_PATH = os.path.join('models', 'model_profiles.json')
+
+def record_model_profile(name: str, accuracy: float, path: str = MODEL_PROFILES_PATH, **details) -> Dict:
+    """Store one model's holdout accuracy, keeping the other models' entries"""
+    profiles = read_json(path, default={}) or {}
+    profiles[name] = {'accuracy': float(accuracy), 'trained_at': datetime.utcnow().isoformat(), **details}
+    atomic_write_json(profiles, path)
+    return profiles[name]
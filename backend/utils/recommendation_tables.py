@@ -0,0 +1,176 @@
+"""
+Precomputed lookup tables for threshold-based recommendation rules
+
+The fertilizer and crop rules only compare each input against a few fixed
+thresholds, so their output depends on which band every input falls in.
+A ``RecommendationTable`` enumerates every band combination once, calls the
+rule function on a representative input for each, and stores the distinct
+payloads. At request time the inputs are turned into a mixed-radix band code
+and the payload is an index lookup.
+
+Tables are serialized to ``TABLES_PATH`` by ``build_recommendation_tables.py``.
+Each stored table carries a fingerprint of its bands and rule source; when it
+is missing or out of date the table is rebuilt in memory on first use.
+"""
+
+import hashlib
+import inspect
+import itertools
+import json
+import math
+import os
+import threading
+from bisect import bisect_right
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from utils.atomic_io import atomic_write_json, read_json
+
+TABLES_PATH = os.getenv(
+    'RECOMMENDATION_TABLES_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models', 'recommendation_tables.json')
+)
+
+TABLES_FORMAT_VERSION = 1
+
+def above(threshold: float) -> float:
+    """Cut point for a ``value > threshold`` rule (cuts are inclusive lower bounds)"""
+    return math.nextafter(threshold, math.inf)
+
+def _freeze(value: Any) -> Any:
+    """Payloads are shared between requests, so lists become tuples and dicts read-only views"""
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    return value
+
+def thaw(value: Any) -> Any:
+    """A caller-owned copy of a frozen payload, with plain lists and dicts again"""
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    if isinstance(value, MappingProxyType):
+        return {key: thaw(item) for key, item in value.items()}
+    return value
+
+class Axis:
+    """
+    One rule input split into bands
+
+    Numeric axes take ascending ``cuts``; a value is in band ``i`` when it is
+    at least ``cuts[i - 1]`` and below ``cuts[i]``. Use ``above(t)`` for rules
+    written as ``value > t``. Categorical axes take ``labels``; anything else
+    falls into a final "other" band.
+    """
+
+    def __init__(self, key: str, default: Any, cuts: Sequence[float] = (), labels: Sequence[str] = ()):
+        self.key = key
+        self.default = default
+        self.cuts = tuple(cuts)
+        self.labels = tuple(labels)
+        self.size = len(self.labels or self.cuts) + 1
+
+    def band(self, value: Any) -> int:
+        return self.band_function()(value)
+
+    def band_function(self) -> Callable[[Any], int]:
+        if self.labels:
+            positions, other = {label: i for i, label in enumerate(self.labels)}, len(self.labels)
+            return lambda value: positions.get(value, other)
+        cuts = self.cuts
+        if len(cuts) == 1:
+            cut = cuts[0]
+            return lambda value: 0 if value < cut else 1
+        return lambda value: bisect_right(cuts, value)
+
+    def representatives(self) -> List[Any]:
+        """One input value per band, in band order"""
+        if self.labels:
+            return list(self.labels) + [None]
+        return [self.cuts[0] - 1] + list(self.cuts)
+
+    def describe(self) -> Dict:
+        return {'key': self.key, 'default': self.default, 'cuts': self.cuts, 'labels': self.labels}
+
+class RecommendationTable:
+    """Band-code lookup for a rule function of one ``Dict`` of inputs"""
+
+    def __init__(self, name: str, axes: Sequence[Axis], rule: Callable[[Dict], Any],
+                 depends_on: Any = None, path: Optional[str] = None):
+        self.name = name
+        self.axes = tuple(axes)
+        self.rule = rule
+        # Data the rule reads besides its inputs, so edits to it invalidate the table
+        self.depends_on = depends_on
+        self.path = path
+        self.size = math.prod(axis.size for axis in self.axes)
+        # Per-axis (key, default, band function, radix) for the code loop
+        self._bands = tuple((axis.key, axis.default, axis.band_function(), axis.size) for axis in self.axes)
+        self._payloads = None
+        self._index = None
+        self._lock = threading.Lock()
+        self.source = None
+        _registry[name] = self
+
+    @property
+    def fingerprint(self) -> str:
+        spec = {'version': TABLES_FORMAT_VERSION, 'axes': [axis.describe() for axis in self.axes],
+                'rule': inspect.getsource(self.rule), 'depends_on': self.depends_on}
+        return hashlib.sha1(json.dumps(spec, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def code(self, values: Dict, **overrides) -> int:
+        """Band code of ``values``; keyword overrides take precedence"""
+        code = 0
+        for key, default, band, size in self._bands:
+            value = overrides[key] if key in overrides else values.get(key, default)
+            code = code * size + band(value)
+        return code
+
+    def lookup(self, values: Dict, **overrides) -> Any:
+        """The rule's payload for ``values``, shared and read-only; ``thaw`` it before handing it out"""
+        if self._index is None:
+            self._load()
+        return self._payloads[self._index[self.code(values, **overrides)]]
+
+    def build(self) -> Dict:
+        """Run the rule once per band combination"""
+        payloads, index, seen = [], [], {}
+        for combination in itertools.product(*(axis.representatives() for axis in self.axes)):
+            payload = self.rule({axis.key: value for axis, value in zip(self.axes, combination)})
+            key = json.dumps(payload, sort_keys=True)
+            if key not in seen:
+                seen[key] = len(payloads)
+                payloads.append(payload)
+            index.append(seen[key])
+        return {'fingerprint': self.fingerprint, 'payloads': payloads, 'index': index}
+
+    def _load(self) -> None:
+        with self._lock:
+            if self._index is not None:
+                return
+            stored = (read_json(self.path or TABLES_PATH, default={}) or {}).get('tables', {}).get(self.name)
+            if stored and stored.get('fingerprint') == self.fingerprint and len(stored.get('index', ())) == self.size:
+                self.source = 'serialized'
+            else:
+                stored = self.build()
+                self.source = 'built'
+            self._payloads = [_freeze(payload) for payload in stored['payloads']]
+            self._index = stored['index']
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            'band_combinations': self.size,
+            'distinct_payloads': len(self._payloads) if self._payloads is not None else None,
+            'source': self.source
+        }
+
+_registry: Dict[str, RecommendationTable] = {}
+
+def registered_tables() -> Dict[str, RecommendationTable]:
+    return dict(_registry)
+
+def write_tables(tables: Sequence[RecommendationTable], path: str = TABLES_PATH) -> Dict[str, Dict]:
+    """Build ``tables`` and serialize them together; returns the built tables"""
+    built = {table.name: table.build() for table in tables}
+    atomic_write_json({'version': TABLES_FORMAT_VERSION, 'tables': built}, path, indent=None)
+    return built
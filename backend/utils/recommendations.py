@@ -1,8 +1,16 @@
 from typing import Dict, List
 
-def get_fertilizer_recommendations(soil_params: Dict, fertility_prediction: Dict) -> Dict:
+import numpy as np
+
+from utils.crop_knowledge import crop_knowledge
+from utils.dosage import SOIL_DEFAULTS, calculate_dosage_batch
+from utils.recommendation_tables import Axis, RecommendationTable, above, thaw
+
+LIME_NAME = 'Lime (Calcium Carbonate)'
+
+def _fertilizer_rules(values: Dict) -> Dict:
     """
-    Generate fertilizer recommendations based on soil parameters and fertility prediction
+    Rule set behind get_fertilizer_recommendations, enumerated into FERTILIZER_TABLE
     """
     recommendations = {
         'primary_fertilizers': [],
@@ -13,135 +21,265 @@ def get_fertilizer_recommendations(soil_params: Dict, fertility_prediction: Dict
         'warnings': []
     }
     
-    try:
-        ph = soil_params.get('ph', 6.5)
-        nitrogen = soil_params.get('nitrogen', 100)
-        phosphorus = soil_params.get('phosphorus', 20)
-        potassium = soil_params.get('potassium', 100)
-        organic_carbon = soil_params.get('organic_carbon', 1.0)
-        fertility_level = fertility_prediction.get('level', 'Medium')
-        
-        # pH corrections
-        if ph < 6.0:
-            recommendations['primary_fertilizers'].append({
-                'name': 'Lime (Calcium Carbonate)',
-                'purpose': 'Increase soil pH',
-                'application_rate': f"{2-4} kg per 100 sq meters",
-                'priority': 'high'
-            })
-            recommendations['warnings'].append("Acidic soil detected. Apply lime before other fertilizers.")
-        
-        elif ph > 7.5:
-            recommendations['secondary_fertilizers'].append({
-                'name': 'Sulfur',
-                'purpose': 'Lower soil pH',
-                'application_rate': f"{1-2} kg per 100 sq meters",
-                'priority': 'medium'
-            })
-            recommendations['warnings'].append("Alkaline soil detected. Consider sulfur application.")
-        
-        # Nitrogen recommendations
-        if nitrogen < 80:
-            recommendations['primary_fertilizers'].append({
-                'name': 'Urea (46-0-0)',
-                'purpose': 'Increase nitrogen content',
-                'application_rate': f"{15-25} kg per hectare",
-                'priority': 'high'
-            })
-            recommendations['organic_amendments'].append({
-                'name': 'Compost or Well-rotted Manure',
-                'purpose': 'Slow-release nitrogen and organic matter',
-                'application_rate': f"{2-3} tons per hectare",
-                'priority': 'medium'
-            })
-        elif nitrogen > 200:
-            recommendations['warnings'].append("High nitrogen levels detected. Reduce nitrogen fertilization.")
-        
-        # Phosphorus recommendations
-        if phosphorus < 15:
-            recommendations['primary_fertilizers'].append({
-                'name': 'Single Super Phosphate (0-16-0)',
-                'purpose': 'Increase phosphorus availability',
-                'application_rate': f"{10-15} kg per hectare",
-                'priority': 'high'
-            })
-            recommendations['organic_amendments'].append({
-                'name': 'Bone Meal',
-                'purpose': 'Organic phosphorus source',
-                'application_rate': f"{5-8} kg per 100 sq meters",
-                'priority': 'medium'
-            })
-        elif phosphorus > 40:
-            recommendations['warnings'].append("High phosphorus levels. Avoid phosphorus-rich fertilizers.")
-        
-        # Potassium recommendations
-        if potassium < 100:
-            recommendations['primary_fertilizers'].append({
-                'name': 'Muriate of Potash (0-0-60)',
-                'purpose': 'Increase potassium content',
-                'application_rate': f"{8-12} kg per hectare",
-                'priority': 'high'
-            })
-            recommendations['organic_amendments'].append({
-                'name': 'Wood Ash',
-                'purpose': 'Natural potassium source',
-                'application_rate': f"{2-4} kg per 100 sq meters",
-                'priority': 'low'
-            })
-        elif potassium > 250:
-            recommendations['warnings'].append("High potassium levels detected. Reduce potash application.")
-        
-        # Organic carbon recommendations
-        if organic_carbon < 1.0:
-            recommendations['organic_amendments'].extend([
-                {
-                    'name': 'Compost',
-                    'purpose': 'Improve soil structure and organic matter',
-                    'application_rate': f"{3-5} tons per hectare",
-                    'priority': 'high'
-                },
-                {
-                    'name': 'Green Manure Cover Crops',
-                    'purpose': 'Add organic matter naturally',
-                    'application_rate': "Plant during off-season",
-                    'priority': 'medium'
-                }
-            ])
-        
-        # Complex fertilizer recommendations based on overall fertility
-        if fertility_level == 'Low':
-            recommendations['primary_fertilizers'].append({
-                'name': 'NPK Complex (20-20-20)',
-                'purpose': 'Balanced nutrition for low fertility soil',
-                'application_rate': f"{20-30} kg per hectare",
+    ph = values.get('ph', 6.5)
+    nitrogen = values.get('nitrogen', 100)
+    phosphorus = values.get('phosphorus', 20)
+    potassium = values.get('potassium', 100)
+    organic_carbon = values.get('organic_carbon', 1.0)
+    fertility_level = values.get('fertility_level', 'Medium')
+    
+    # pH corrections
+    if ph < 6.0:
+        recommendations['primary_fertilizers'].append({
+            'name': LIME_NAME,
+            'purpose': 'Increase soil pH',
+            'application_rate': "2-4 kg per 100 sq meters",
+            'priority': 'high'
+        })
+        recommendations['warnings'].append("Acidic soil detected. Apply lime before other fertilizers.")
+    
+    elif ph > 7.5:
+        recommendations['secondary_fertilizers'].append({
+            'name': 'Sulfur',
+            'purpose': 'Lower soil pH',
+            'application_rate': "1-2 kg per 100 sq meters",
+            'priority': 'medium'
+        })
+        recommendations['warnings'].append("Alkaline soil detected. Consider sulfur application.")
+    
+    # Nitrogen recommendations
+    if nitrogen < 80:
+        recommendations['primary_fertilizers'].append({
+            'name': 'Urea (46-0-0)',
+            'purpose': 'Increase nitrogen content',
+            'application_rate': "15-25 kg per hectare",
+            'priority': 'high'
+        })
+        recommendations['organic_amendments'].append({
+            'name': 'Compost or Well-rotted Manure',
+            'purpose': 'Slow-release nitrogen and organic matter',
+            'application_rate': "2-3 tons per hectare",
+            'priority': 'medium'
+        })
+    elif nitrogen > 200:
+        recommendations['warnings'].append("High nitrogen levels detected. Reduce nitrogen fertilization.")
+    
+    # Phosphorus recommendations
+    if phosphorus < 15:
+        recommendations['primary_fertilizers'].append({
+            'name': 'Single Super Phosphate (0-16-0)',
+            'purpose': 'Increase phosphorus availability',
+            'application_rate': "10-15 kg per hectare",
+            'priority': 'high'
+        })
+        recommendations['organic_amendments'].append({
+            'name': 'Bone Meal',
+            'purpose': 'Organic phosphorus source',
+            'application_rate': "5-8 kg per 100 sq meters",
+            'priority': 'medium'
+        })
+    elif phosphorus > 40:
+        recommendations['warnings'].append("High phosphorus levels. Avoid phosphorus-rich fertilizers.")
+    
+    # Potassium recommendations
+    if potassium < 100:
+        recommendations['primary_fertilizers'].append({
+            'name': 'Muriate of Potash (0-0-60)',
+            'purpose': 'Increase potassium content',
+            'application_rate': "8-12 kg per hectare",
+            'priority': 'high'
+        })
+        recommendations['organic_amendments'].append({
+            'name': 'Wood Ash',
+            'purpose': 'Natural potassium source',
+            'application_rate': "2-4 kg per 100 sq meters",
+            'priority': 'low'
+        })
+    elif potassium > 250:
+        recommendations['warnings'].append("High potassium levels detected. Reduce potash application.")
+    
+    # Organic carbon recommendations
+    if organic_carbon < 1.0:
+        recommendations['organic_amendments'].extend([
+            {
+                'name': 'Compost',
+                'purpose': 'Improve soil structure and organic matter',
+                'application_rate': "3-5 tons per hectare",
                 'priority': 'high'
-            })
-        elif fertility_level == 'Medium':
-            recommendations['primary_fertilizers'].append({
-                'name': 'NPK Complex (15-15-15)',
-                'purpose': 'Maintenance fertilization',
-                'application_rate': f"{15-20} kg per hectare",
+            },
+            {
+                'name': 'Green Manure Cover Crops',
+                'purpose': 'Add organic matter naturally',
+                'application_rate': "Plant during off-season",
                 'priority': 'medium'
-            })
-        
-        # Application timing recommendations
-        recommendations['application_timing'] = [
-            "Apply lime 2-3 weeks before other fertilizers if pH correction is needed",
-            "Apply phosphorus fertilizers at planting time for better root establishment",
-            "Split nitrogen application: 1/3 at planting, 1/3 at vegetative growth, 1/3 at flowering",
-            "Apply potassium fertilizers during soil preparation",
-            "Add organic amendments during off-season for better decomposition"
-        ]
-        
-        # Calculate total dosage recommendations
-        recommendations['dosage_recommendations'] = calculate_dosage_summary(recommendations)
-        
-        return recommendations
+            }
+        ])
+    
+    # Complex fertilizer recommendations based on overall fertility
+    if fertility_level == 'Low':
+        recommendations['primary_fertilizers'].append({
+            'name': 'NPK Complex (20-20-20)',
+            'purpose': 'Balanced nutrition for low fertility soil',
+            'application_rate': "20-30 kg per hectare",
+            'priority': 'high'
+        })
+    elif fertility_level == 'Medium':
+        recommendations['primary_fertilizers'].append({
+            'name': 'NPK Complex (15-15-15)',
+            'purpose': 'Maintenance fertilization',
+            'application_rate': "15-20 kg per hectare",
+            'priority': 'medium'
+        })
+    
+    # Application timing recommendations
+    recommendations['application_timing'] = [
+        "Apply lime 2-3 weeks before other fertilizers if pH correction is needed",
+        "Apply phosphorus fertilizers at planting time for better root establishment",
+        "Split nitrogen application: 1/3 at planting, 1/3 at vegetative growth, 1/3 at flowering",
+        "Apply potassium fertilizers during soil preparation",
+        "Add organic amendments during off-season for better decomposition"
+    ]
+    
+    return recommendations
+
+FERTILIZER_TABLE = RecommendationTable('fertilizer_recommendations', (
+    Axis('ph', 6.5, cuts=(6.0, above(7.5))),
+    Axis('nitrogen', 100, cuts=(80, above(200))),
+    Axis('phosphorus', 20, cuts=(15, above(40))),
+    Axis('potassium', 100, cuts=(100, above(250))),
+    Axis('organic_carbon', 1.0, cuts=(1.0,)),
+    Axis('fertility_level', 'Medium', labels=('Low', 'Medium'))
+), _fertilizer_rules)
+
+def _with_dosage(recommendations: Dict, dosage: Dict) -> Dict:
+    """
+    Attach the computed dosage and state it as the rate of every product it sizes
+
+    The rule table's rate ranges are static; for urea, potash and lime the
+    engine's per-field quantity replaces them so the two never disagree.
+    """
+    rates = {product['name']: product['kg_per_ha'] for product in dosage['products']}
+    rates[LIME_NAME] = dosage['lime_kg_per_ha']
+    for fertilizer in recommendations['primary_fertilizers']:
+        if fertilizer['name'] in rates:
+            fertilizer['application_rate'] = f"{rates[fertilizer['name']]} kg per hectare"
+    return {**recommendations, 'dosage_recommendations': dosage}
+
+def get_fertilizer_recommendations(soil_params: Dict, fertility_prediction: Dict) -> Dict:
+    """
+    Generate fertilizer recommendations based on soil parameters and fertility prediction
+    """
+    try:
+        recommendations = thaw(FERTILIZER_TABLE.lookup(soil_params, fertility_level=fertility_prediction.get('level', 'Medium')))
+        return _with_dosage(recommendations, calculate_dosage_summary(soil_params))
         
     except Exception as e:
         print(f"Error generating fertilizer recommendations: {e}")
         return get_default_fertilizer_recommendations()
 
+# Crop requirements used by get_crop_suggestions, from the shared knowledge store
+CROP_DATABASE = crop_knowledge.source_table('recommendations')
+
+SEASON_BITS = {'spring': 1, 'summer': 2, 'autumn': 4, 'winter': 8}
+
+# Catalog compiled once into arrays, one entry per crop in CROP_DATABASE order
+CROP_NAMES = tuple(CROP_DATABASE)
+CROP_TYPES = tuple(crop['type'] for crop in CROP_DATABASE.values())
+CROP_PH_RANGE = np.array([crop['ph_range'] for crop in CROP_DATABASE.values()], dtype=float)
+CROP_PH_MID = CROP_PH_RANGE.sum(axis=1) / 2
+CROP_NUTRIENT_MIN = np.array([[crop['nitrogen_min'], crop['phosphorus_min'], crop['potassium_min']]
+                              for crop in CROP_DATABASE.values()], dtype=float)
+CROP_NUTRIENT_PARTIAL = CROP_NUTRIENT_MIN * 0.8
+CROP_SEASON_MASK = np.array([sum(SEASON_BITS[season] for season in crop['seasons'])
+                             for crop in CROP_DATABASE.values()], dtype=np.uint8)
+
+# The same catalog as plain tuples for single samples, where NumPy's per-call
+# overhead outweighs ten crops' worth of comparisons:
+# (name, type, ph_low, ph_high, ph_mid, minimums, 80% minimums, season mask)
+_CROP_ROWS = tuple(
+    (name, CROP_TYPES[i], *CROP_PH_RANGE[i].tolist(), float(CROP_PH_MID[i]),
+     tuple(CROP_NUTRIENT_MIN[i].tolist()), tuple(CROP_NUTRIENT_PARTIAL[i].tolist()), int(CROP_SEASON_MASK[i]))
+    for i, name in enumerate(CROP_NAMES)
+)
+
+# Category codes returned by evaluate_crops
+HIGHLY_SUITABLE, MODERATELY_SUITABLE, SEASON_SPECIFIC, NOT_RECOMMENDED = 0, 1, 2, 3
+CATEGORY_KEYS = ('highly_suitable', 'moderately_suitable', 'season_specific', 'not_recommended')
+
+SOIL_IMPROVEMENT_CROPS = (
+    {
+        'name': 'Clover',
+        'purpose': 'Nitrogen fixation and organic matter',
+        'type': 'cover crop'
+    },
+    {
+        'name': 'Alfalfa',
+        'purpose': 'Deep root system and nitrogen fixation',
+        'type': 'cover crop'
+    },
+    {
+        'name': 'Winter Rye',
+        'purpose': 'Prevent erosion and add organic matter',
+        'type': 'cover crop'
+    }
+)
+
+def evaluate_crops(ph, nitrogen, phosphorus, potassium, season='spring') -> Dict[str, np.ndarray]:
+    """
+    Score and categorize every catalog crop for one sample or a batch
+    
+    Inputs are scalars or equal-length arrays (``season`` may be one name
+    for all samples). Returns arrays of shape (samples, crops):
+    ``suitability_score`` (percent), ``season_match`` and ``category``
+    (HIGHLY_SUITABLE ... NOT_RECOMMENDED).
+    """
+    ph = np.atleast_1d(np.asarray(ph, dtype=float))[:, None]
+    nutrients = np.stack(np.broadcast_arrays(
+        np.atleast_1d(np.asarray(nitrogen, dtype=float)),
+        np.atleast_1d(np.asarray(phosphorus, dtype=float)),
+        np.atleast_1d(np.asarray(potassium, dtype=float))
+    ), axis=-1)[:, None, :]
+    
+    ph_score = np.where((CROP_PH_RANGE[:, 0] <= ph) & (ph <= CROP_PH_RANGE[:, 1]), 1.0,
+                        np.where(np.abs(ph - CROP_PH_MID) < 0.5, 0.5, 0.0))
+    nutrient_score = np.where(nutrients >= CROP_NUTRIENT_MIN, 1.0,
+                              np.where(nutrients >= CROP_NUTRIENT_PARTIAL, 0.5, 0.0)).sum(axis=-1)
+    score = (ph_score + nutrient_score) / 4 * 100
+    
+    seasons = np.atleast_1d(np.asarray(season, dtype=object))
+    season_bits = np.array([SEASON_BITS.get(str(name).lower(), 0) for name in seasons], dtype=np.uint8)[:, None]
+    season_match = np.broadcast_to((CROP_SEASON_MASK & season_bits) != 0, score.shape)
+    
+    category = np.select(
+        [(score >= 80) & season_match, (score >= 60) & season_match, score >= 60],
+        [HIGHLY_SUITABLE, MODERATELY_SUITABLE, SEASON_SPECIFIC], NOT_RECOMMENDED
+    ).astype(np.uint8)
+    return {'suitability_score': score, 'season_match': season_match, 'category': category}
+
+def _categorize(score: float, season_match: bool) -> int:
+    if score >= 80 and season_match:
+        return HIGHLY_SUITABLE
+    if score >= 60 and season_match:
+        return MODERATELY_SUITABLE
+    if score >= 60:
+        return SEASON_SPECIFIC
+    return NOT_RECOMMENDED
+
+def evaluate_crops_single(ph: float, nitrogen: float, phosphorus: float, potassium: float,
+                          season: str = 'spring') -> List[tuple]:
+    """``evaluate_crops`` for one sample: (score, season_match, category) per crop in catalog order"""
+    season_bit = SEASON_BITS.get(str(season).lower(), 0)
+    results = []
+    for _, _, ph_low, ph_high, ph_mid, (n_min, p_min, k_min), (n_part, p_part, k_part), season_mask in _CROP_ROWS:
+        score = 1.0 if ph_low <= ph <= ph_high else (0.5 if abs(ph - ph_mid) < 0.5 else 0.0)
+        score += 1.0 if nitrogen >= n_min else (0.5 if nitrogen >= n_part else 0.0)
+        score += 1.0 if phosphorus >= p_min else (0.5 if phosphorus >= p_part else 0.0)
+        score += 1.0 if potassium >= k_min else (0.5 if potassium >= k_part else 0.0)
+        score = score / 4 * 100
+        match = bool(season_mask & season_bit)
+        results.append((score, match, _categorize(score, match)))
+    return results
+
 def get_crop_suggestions(soil_params: Dict, season: str) -> Dict:
     """
     Suggest suitable crops based on soil parameters and season
@@ -162,159 +300,22 @@ def get_crop_suggestions(soil_params: Dict, season: str) -> Dict:
         organic_carbon = soil_params.get('organic_carbon', 1.0)
         season = season.lower() if season else 'spring'
         
-        # Define crop database with requirements
-        crop_database = {
-            'rice': {
-                'ph_range': (5.5, 7.0),
-                'nitrogen_min': 80,
-                'phosphorus_min': 15,
-                'potassium_min': 80,
-                'seasons': ['spring', 'summer'],
-                'type': 'cereal'
-            },
-            'wheat': {
-                'ph_range': (6.0, 7.5),
-                'nitrogen_min': 100,
-                'phosphorus_min': 20,
-                'potassium_min': 100,
-                'seasons': ['autumn', 'winter', 'spring'],
-                'type': 'cereal'
-            },
-            'corn': {
-                'ph_range': (6.0, 7.0),
-                'nitrogen_min': 120,
-                'phosphorus_min': 25,
-                'potassium_min': 120,
-                'seasons': ['spring', 'summer'],
-                'type': 'cereal'
-            },
-            'tomato': {
-                'ph_range': (6.0, 7.0),
-                'nitrogen_min': 100,
-                'phosphorus_min': 30,
-                'potassium_min': 150,
-                'seasons': ['spring', 'summer'],
-                'type': 'vegetable'
-            },
-            'potato': {
-                'ph_range': (5.0, 6.5),
-                'nitrogen_min': 80,
-                'phosphorus_min': 20,
-                'potassium_min': 200,
-                'seasons': ['spring', 'autumn'],
-                'type': 'tuber'
-            },
-            'beans': {
-                'ph_range': (6.0, 7.5),
-                'nitrogen_min': 40,  # Lower due to N-fixation
-                'phosphorus_min': 20,
-                'potassium_min': 100,
-                'seasons': ['spring', 'summer'],
-                'type': 'legume'
-            },
-            'peas': {
-                'ph_range': (6.0, 7.5),
-                'nitrogen_min': 30,  # Lower due to N-fixation
-                'phosphorus_min': 15,
-                'potassium_min': 80,
-                'seasons': ['autumn', 'winter', 'spring'],
-                'type': 'legume'
-            },
-            'carrot': {
-                'ph_range': (6.0, 7.0),
-                'nitrogen_min': 70,
-                'phosphorus_min': 25,
-                'potassium_min': 150,
-                'seasons': ['spring', 'autumn'],
-                'type': 'root'
-            },
-            'cabbage': {
-                'ph_range': (6.0, 7.5),
-                'nitrogen_min': 90,
-                'phosphorus_min': 20,
-                'potassium_min': 120,
-                'seasons': ['autumn', 'winter', 'spring'],
-                'type': 'leafy'
-            },
-            'spinach': {
-                'ph_range': (6.0, 7.5),
-                'nitrogen_min': 80,
-                'phosphorus_min': 15,
-                'potassium_min': 100,
-                'seasons': ['autumn', 'winter', 'spring'],
-                'type': 'leafy'
-            }
-        }
-        
-        # Evaluate each crop
-        for crop_name, requirements in crop_database.items():
-            suitability_score = 0
-            total_factors = 4  # pH, N, P, K
-            
-            # pH suitability
-            if requirements['ph_range'][0] <= ph <= requirements['ph_range'][1]:
-                suitability_score += 1
-            elif abs(ph - sum(requirements['ph_range'])/2) < 0.5:
-                suitability_score += 0.5
-            
-            # Nutrient suitability
-            if nitrogen >= requirements['nitrogen_min']:
-                suitability_score += 1
-            elif nitrogen >= requirements['nitrogen_min'] * 0.8:
-                suitability_score += 0.5
-            
-            if phosphorus >= requirements['phosphorus_min']:
-                suitability_score += 1
-            elif phosphorus >= requirements['phosphorus_min'] * 0.8:
-                suitability_score += 0.5
-            
-            if potassium >= requirements['potassium_min']:
-                suitability_score += 1
-            elif potassium >= requirements['potassium_min'] * 0.8:
-                suitability_score += 0.5
-            
-            # Calculate suitability percentage
-            suitability_percentage = (suitability_score / total_factors) * 100
-            
+        # Evaluate every crop against the precompiled catalog
+        evaluation = evaluate_crops_single(ph, nitrogen, phosphorus, potassium, season)
+        for (crop_name, crop_type, *_), (score, season_match, category) in zip(_CROP_ROWS, evaluation):
             crop_info = {
                 'name': crop_name.title(),
-                'type': requirements['type'],
-                'suitability_score': round(suitability_percentage, 1),
-                'season_match': season in requirements['seasons']
+                'type': crop_type,
+                'suitability_score': round(score, 1),
+                'season_match': season_match
             }
-            
-            # Categorize crops
-            if suitability_percentage >= 80 and crop_info['season_match']:
-                suggestions['highly_suitable'].append(crop_info)
-            elif suitability_percentage >= 60 and crop_info['season_match']:
-                suggestions['moderately_suitable'].append(crop_info)
-            elif suitability_percentage >= 60 and not crop_info['season_match']:
-                suggestions['season_specific'].append({
-                    **crop_info,
-                    'suitable_seasons': requirements['seasons']
-                })
-            else:
-                suggestions['not_recommended'].append(crop_info)
+            if category == SEASON_SPECIFIC:
+                crop_info['suitable_seasons'] = list(CROP_DATABASE[crop_name]['seasons'])
+            suggestions[CATEGORY_KEYS[category]].append(crop_info)
         
         # Add soil improvement crops
         if organic_carbon < 1.5 or nitrogen < 80:
-            suggestions['soil_improvement_crops'] = [
-                {
-                    'name': 'Clover',
-                    'purpose': 'Nitrogen fixation and organic matter',
-                    'type': 'cover crop'
-                },
-                {
-                    'name': 'Alfalfa',
-                    'purpose': 'Deep root system and nitrogen fixation',
-                    'type': 'cover crop'
-                },
-                {
-                    'name': 'Winter Rye',
-                    'purpose': 'Prevent erosion and add organic matter',
-                    'type': 'cover crop'
-                }
-            ]
+            suggestions['soil_improvement_crops'] = [dict(crop) for crop in SOIL_IMPROVEMENT_CROPS]
         
         # Sort by suitability score
         suggestions['highly_suitable'].sort(key=lambda x: x['suitability_score'], reverse=True)
@@ -326,54 +327,23 @@ def get_crop_suggestions(soil_params: Dict, season: str) -> Dict:
         print(f"Error generating crop suggestions: {e}")
         return get_default_crop_suggestions()
 
-def calculate_dosage_summary(recommendations: Dict) -> Dict:
+def calculate_dosage_summary(soil_params: Dict, area_ha: float = 1.0) -> Dict:
     """
-    Calculate total fertilizer dosage summary
+    Calculate nutrient deficits and product quantities for one field
     """
-    dosage_summary = {
-        'nitrogen_total': '15-25 kg/ha',
-        'phosphorus_total': '10-15 kg/ha',
-        'potassium_total': '8-12 kg/ha',
-        'organic_matter': '2-5 tons/ha',
-        'lime_if_needed': '2-4 kg/100m²'
-    }
-    
-    return dosage_summary
+    return calculate_dosage_batch(
+        soil_params.get('nitrogen'), soil_params.get('phosphorus'), soil_params.get('potassium'),
+        ph=soil_params.get('ph'), area_ha=area_ha
+    ).to_dict(0)
 
-def get_default_fertilizer_recommendations() -> Dict:
+def get_default_fertilizer_recommendations(area_ha: float = 1.0) -> Dict:
     """
     Return default fertilizer recommendations
+
+    Built like get_fertilizer_recommendations for the default soil values, so
+    both paths return the same schema and product names.
     """
-    return {
-        'primary_fertilizers': [
-            {
-                'name': 'NPK Complex (15-15-15)',
-                'purpose': 'Balanced nutrition',
-                'application_rate': '20 kg per hectare',
-                'priority': 'medium'
-            }
-        ],
-        'secondary_fertilizers': [],
-        'organic_amendments': [
-            {
-                'name': 'Compost',
-                'purpose': 'Improve soil organic matter',
-                'application_rate': '3 tons per hectare',
-                'priority': 'medium'
-            }
-        ],
-        'dosage_recommendations': {
-            'nitrogen_total': '15-20 kg/ha',
-            'phosphorus_total': '10-15 kg/ha',
-            'potassium_total': '10-15 kg/ha',
-            'organic_matter': '2-3 tons/ha'
-        },
-        'application_timing': [
-            "Apply fertilizers during soil preparation",
-            "Add organic matter during off-season"
-        ],
-        'warnings': []
-    }
+    return _with_dosage(_fertilizer_rules(SOIL_DEFAULTS), calculate_dosage_summary(SOIL_DEFAULTS, area_ha))
 
 def get_default_crop_suggestions() -> Dict:
     """
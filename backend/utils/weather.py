@@ -1,38 +1,272 @@
-import requests
 import os
-from typing import Dict, Optional
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
 
-def get_weather_data(location: str) -> Dict:
+import numpy as np
+
+from utils.weather_client import WeatherClientError, weather_client
+from utils.location_resolver import LocationResolver, parse_place_id
+from utils.weather_history import weather_history
+
+# Weather cache settings (seconds / entries)
+WEATHER_CACHE_TTL = float(os.getenv('WEATHER_CACHE_TTL', '600'))
+WEATHER_CACHE_STALE_TTL = float(os.getenv('WEATHER_CACHE_STALE_TTL', '3600'))
+WEATHER_CACHE_NEGATIVE_TTL = float(os.getenv('WEATHER_CACHE_NEGATIVE_TTL', '60'))
+WEATHER_CACHE_MAX_SIZE = int(os.getenv('WEATHER_CACHE_MAX_SIZE', '1024'))
+# How long a lookup waits on another lookup's fetch of the same location when
+# the caller passes no timeout; by default a second past the client's worst case
+WEATHER_CACHE_WAIT_TIMEOUT = float(os.getenv('WEATHER_CACHE_WAIT_TIMEOUT', str(weather_client.worst_case_seconds() + 1)))
+
+# Observed days needed before monthly rainfall comes from history
+MIN_HISTORY_DAYS = 7
+
+def normalize_location(location: str) -> str:
+    """Cache key for a location string: trimmed, case-folded, single spaces, no spaces around commas"""
+    parts = [' '.join(part.split()) for part in str(location).split(',')]
+    return ','.join(part for part in parts if part).casefold()
+
+class WeatherCache:
     """
-    Fetch weather data from OpenWeatherMap API
+    Location-keyed TTL + LRU cache with stale-while-revalidate
     
-    Args:
-        location: City name or coordinates
+    Entries younger than ``ttl`` are served as hits. Entries past ``ttl`` but
+    within ``stale_ttl`` are served immediately while one background refresh
+    replaces them. Failed lookups cache the default data for
+    ``negative_ttl`` without a stale window, so an outage is retried soon
+    but not on every request. Concurrent misses for the same location share
+    a single upstream call; a request that has waited ``wait_timeout`` on it
+    gets the last good value however old, else ``fallback()`` (or its own
+    uncached fetch when there is no fallback).
+    """
+    
+    def __init__(self, fetch: Callable[[str], Tuple[Dict, bool]], ttl: float = WEATHER_CACHE_TTL,
+                 stale_ttl: float = WEATHER_CACHE_STALE_TTL, negative_ttl: float = WEATHER_CACHE_NEGATIVE_TTL,
+                 max_size: int = WEATHER_CACHE_MAX_SIZE, wait_timeout: float = WEATHER_CACHE_WAIT_TIMEOUT,
+                 fallback: Optional[Callable[[], Dict]] = None, shared=None):
+        self.fetch = fetch
+        self.shared = shared
+        self.wait_timeout = wait_timeout
+        self.fallback = fallback
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self.entries: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()
+        self.inflight: Dict[str, threading.Event] = {}
+        self.refreshing = set()
+        self.refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix='weather-refresh')
+        self.stats = {'hits': 0, 'stale_hits': 0, 'negative_hits': 0, 'misses': 0,
+                      'refreshes': 0, 'refresh_failures': 0, 'evictions': 0, 'wait_timeouts': 0, 'shared_hits': 0}
+    
+    def _store(self, key: str, value: Dict, ok: bool, fetched_at: Optional[float] = None) -> None:
+        """Insert or replace an entry (caller holds the lock)"""
+        self.entries[key] = {'value': value, 'fetched_at': fetched_at or time.time(), 'ok': ok}
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.stats['evictions'] += 1
+    
+    def put(self, location: str, value: Dict, ok: bool = True) -> None:
+        with self.lock:
+            self._store(normalize_location(location), value, ok)
+    
+    def _share(self, key: str, value: Dict) -> None:
+        """Publish a successful lookup to the shared store"""
+        if self.shared is None:
+            return
+        try:
+            self.shared.save_latest(key, value, time.time())
+        except sqlite3.Error as e:
+            print(f"Error sharing weather for {key}: {e}")
+    
+    def _from_shared(self, key: str) -> Optional[Dict]:
+        """A fresh value another process stored for ``key``, adopted into this cache"""
+        if self.shared is None:
+            return None
+        try:
+            stored = self.shared.load_latest(key)
+        except sqlite3.Error as e:
+            print(f"Error reading shared weather for {key}: {e}")
+            return None
+        if stored is None or time.time() - stored[1] >= self.ttl:
+            return None
+        value, fetched_at = stored
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or not entry['ok'] or entry['fetched_at'] < fetched_at:
+                self._store(key, value, True, fetched_at)
+            self.stats['shared_hits'] += 1
+        return dict(value)
+    
+    def _fresh(self, key: str) -> Optional[Dict]:
+        """Fresh or negative-cached local value (caller holds the lock)"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        age = time.time() - entry['fetched_at']
+        if not entry['ok']:
+            if age < self.negative_ttl:
+                self.entries.move_to_end(key)
+                self.stats['negative_hits'] += 1
+                return dict(entry['value'])
+        elif age < self.ttl:
+            self.entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return dict(entry['value'])
+        return None
+    
+    def get(self, location: str, wait_timeout: Optional[float] = None) -> Dict:
+        key = normalize_location(location)
+        if wait_timeout is None:
+            wait_timeout = self.wait_timeout
+        with self.lock:
+            value = self._fresh(key)
+        if value is not None:
+            return value
+        value = self._from_shared(key)
+        if value is not None:
+            return value
         
-    Returns:
-        Dictionary containing weather information
+        while True:
+            with self.lock:
+                value = self._fresh(key)
+                if value is not None:
+                    return value
+                entry = self.entries.get(key)
+                if entry is not None and entry['ok']:
+                    age = time.time() - entry['fetched_at']
+                    if age < self.ttl + self.stale_ttl:
+                        self.entries.move_to_end(key)
+                        self.stats['stale_hits'] += 1
+                        if key not in self.refreshing:
+                            self.refreshing.add(key)
+                            self.refresher.submit(self._refresh, key)
+                        return dict(entry['value'])
+                
+                waiter = self.inflight.get(key)
+                if waiter is None:
+                    self.inflight[key] = threading.Event()
+                    self.stats['misses'] += 1
+                    break
+            # Another request is already fetching this location
+            if not waiter.wait(wait_timeout):
+                return self._after_wait_timeout(key)
+        
+        try:
+            value, ok = self.fetch(key)
+            with self.lock:
+                self._store(key, value, ok)
+            if ok:
+                self._share(key, value)
+            return dict(value)
+        finally:
+            with self.lock:
+                self.inflight.pop(key).set()
+    
+    def _after_wait_timeout(self, key: str) -> Dict:
+        """Answer for a request whose shared fetch did not finish in time"""
+        with self.lock:
+            self.stats['wait_timeouts'] += 1
+            entry = self.entries.get(key)
+            if entry is not None and entry['ok']:
+                return dict(entry['value'])
+        if self.fallback is not None:
+            return self.fallback()
+        return dict(self.fetch(key)[0])
+    
+    def refresh(self, location: str) -> bool:
+        """
+        Fetch a location now and store it; returns whether the lookup succeeded
+        
+        A failed lookup never replaces a good entry, so the last good value
+        keeps being served while the provider is down.
+        """
+        key = normalize_location(location)
+        value, ok = self.fetch(key)
+        with self.lock:
+            self.stats['refreshes'] += 1
+            if ok or key not in self.entries:
+                self._store(key, value, ok)
+            else:
+                self.stats['refresh_failures'] += 1
+        if ok:
+            self._share(key, value)
+        return ok
+    
+    def _refresh(self, key: str) -> None:
+        try:
+            self.refresh(key)
+        except Exception as e:
+            print(f"Weather refresh failed for {key}: {e}")
+            with self.lock:
+                self.stats['refresh_failures'] += 1
+        finally:
+            with self.lock:
+                self.refreshing.discard(key)
+    
+    def age(self, location: str) -> Optional[float]:
+        """Seconds since the last successful lookup here or in the shared store, or None if there is none"""
+        key = normalize_location(location)
+        with self.lock:
+            entry = self.entries.get(key)
+            fetched_at = entry['fetched_at'] if entry is not None and entry['ok'] else None
+        if self.shared is not None:
+            try:
+                stored = self.shared.load_latest(key)
+            except sqlite3.Error:
+                stored = None
+            if stored is not None and (fetched_at is None or stored[1] > fetched_at):
+                fetched_at = stored[1]
+        return None if fetched_at is None else time.time() - fetched_at
+    
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+    
+    def get_metrics(self) -> Dict:
+        with self.lock:
+            stats = dict(self.stats)
+            size = len(self.entries)
+        lookups = stats['hits'] + stats['stale_hits'] + stats['negative_hits'] + stats['misses']
+        return {
+            **stats,
+            'size': size,
+            'max_size': self.max_size,
+            'ttl_seconds': self.ttl,
+            'stale_ttl_seconds': self.stale_ttl,
+            'negative_ttl_seconds': self.negative_ttl,
+            'wait_timeout_seconds': self.wait_timeout,
+            'hit_ratio': round((lookups - stats['misses']) / lookups, 4) if lookups else None
+        }
+
+def _fetch_weather(location: str) -> Tuple[Dict, bool]:
+    """
+    Fetch weather data from OpenWeatherMap API
+    
+    Returns (weather_info, True) on success and (default data, False) when
+    the API is not configured or the lookup failed.
     """
     try:
         api_key = os.getenv('OPENWEATHER_API_KEY')
         if not api_key:
             print("OpenWeatherMap API key not found in environment variables")
-            return get_default_weather_data()
+            return get_default_weather_data(), False
         
-        # OpenWeatherMap API endpoint for current weather
-        base_url = "http://api.openweathermap.org/data/2.5/weather"
+        # Canonical place IDs carry their coordinates; anything else is a name query
+        coordinates = parse_place_id(location)
+        query = coordinates if coordinates else {'q': location}
         
-        # Parameters for API request
-        params = {
-            'q': location,
+        # Current weather through the shared pooled client
+        data = weather_client.get_json('/data/2.5/weather', {
+            **query,
             'appid': api_key,
             'units': 'metric'  # Get temperature in Celsius
-        }
-        
-        # Make API request
-        response = requests.get(base_url, params=params, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
+        })
         
         # Extract relevant weather information
         weather_info = {
@@ -48,44 +282,128 @@ def get_weather_data(location: str) -> Dict:
             'uv_index': None  # Would need UV index API call for this
         }
         
-        # Add estimated monthly rainfall (simplified calculation)
+        # Record the observation, then estimate monthly rainfall from the
+        # location's history (humidity heuristic until enough days are seen)
+        _record_observation(location, weather_info)
         weather_info['monthly_rainfall'] = estimate_monthly_rainfall(
             weather_info['rainfall'], 
-            weather_info['humidity']
+            weather_info['humidity'],
+            location
         )
         
-        return weather_info
+        return weather_info, True
         
-    except requests.exceptions.RequestException as e:
+    except WeatherClientError as e:
         print(f"Error fetching weather data: {e}")
-        return get_default_weather_data()
+        return get_default_weather_data(), False
     
     except KeyError as e:
         print(f"Error parsing weather data: {e}")
-        return get_default_weather_data()
+        return get_default_weather_data(), False
     
     except Exception as e:
         print(f"Unexpected error in weather data fetch: {e}")
-        return get_default_weather_data()
+        return get_default_weather_data(), False
+
+def _geocode(alias: str) -> Optional[Dict]:
+    """First OpenWeatherMap geocoding match for a place name, or None if unknown"""
+    api_key = os.getenv('OPENWEATHER_API_KEY')
+    if not api_key:
+        raise WeatherClientError('OpenWeatherMap API key not configured')
+    
+    matches = weather_client.get_json('/geo/1.0/direct', {'q': alias, 'limit': 1, 'appid': api_key})
+    if not isinstance(matches, list) or not matches:
+        return None
+    match = matches[0]
+    return {
+        'name': match['name'],
+        'state': match.get('state'),
+        'country': match.get('country'),
+        'lat': float(match['lat']),
+        'lon': float(match['lon'])
+    }
+
+weather_cache = WeatherCache(_fetch_weather, fallback=lambda: get_default_weather_data(), shared=weather_history)
+location_resolver = LocationResolver(_geocode)
+
+def weather_location_key(location: str) -> str:
+    """
+    Cache and history key for a location
+    
+    The canonical place ID when the spelling can be resolved, so every
+    spelling of a place shares one cache entry and one upstream call;
+    otherwise the normalized string.
+    """
+    alias = normalize_location(location)
+    place = location_resolver.resolve(alias)
+    return place['place_id'] if place else alias
+
+def get_weather_data(location: str, wait_timeout: Optional[float] = None) -> Dict:
+    """
+    Weather for a location, served from the shared cache
+    
+    Args:
+        location: City name or coordinates
+        wait_timeout: Longest to wait on a lookup of the same place that is
+            already in flight (defaults to WEATHER_CACHE_WAIT_TIMEOUT)
+        
+    Returns:
+        Dictionary containing weather information
+    """
+    return weather_cache.get(weather_location_key(location), wait_timeout=wait_timeout)
+
+def get_weather_cache_metrics() -> Dict:
+    return {**weather_cache.get_metrics(), 'client': weather_client.get_metrics(),
+            'resolver': location_resolver.get_metrics()}
+
+def _record_observation(location: str, weather_info: Dict) -> None:
+    try:
+        weather_history.record(normalize_location(location), weather_info)
+    except sqlite3.Error as e:
+        print(f"Error recording weather history: {e}")
 
 def get_historical_weather(location: str, days: int = 30) -> Dict:
     """
     Get historical weather data for better soil analysis
-    Note: This would require a paid API plan for historical data
+    
+    Served from the local observation store (7-day window for ``days`` <= 7,
+    else 30-day); falls back to typical values for locations never observed.
     """
-    # For now, return simulated historical data
+    window = 7 if days <= 7 else 30
+    try:
+        aggregates = weather_history.get_aggregates(weather_location_key(location), window)
+    except sqlite3.Error as e:
+        print(f"Error reading weather history: {e}")
+        aggregates = None
+    
+    if aggregates:
+        return {**aggregates, 'source': 'observed'}
+    
     return {
         'avg_temperature': 25.0,
         'total_rainfall': 150.0,
         'avg_humidity': 65.0,
-        'rainfall_days': 12
+        'rainfall_days': 12,
+        'window_days': window,
+        'days_observed': 0,
+        'source': 'default'
     }
 
-def estimate_monthly_rainfall(current_rainfall: float, humidity: float) -> float:
+def estimate_monthly_rainfall(current_rainfall: float, humidity: float, location: Optional[str] = None) -> float:
     """
     Estimate monthly rainfall based on current conditions
-    This is a simplified estimation - in production, you'd use historical data
+    
+    With at least ``MIN_HISTORY_DAYS`` observed days for ``location`` the
+    30-day rolling total (scaled to a full month) is used instead.
     """
+    if location:
+        try:
+            history = weather_history.get_aggregates(normalize_location(location), 30)
+        except sqlite3.Error:
+            history = None
+        if history and history['days_observed'] >= MIN_HISTORY_DAYS:
+            return round(history['total_rainfall'] * 30 / history['days_observed'], 1)
+    
     # Base estimation from humidity
     base_rainfall = (humidity - 30) * 2.5  # Rough correlation
     
@@ -194,47 +512,172 @@ def assess_weather_impact_on_soil(weather_data: Dict, soil_params: Dict) -> Dict
         print(f"Error in weather impact assessment: {e}")
         return impact_assessment
 
+# Per-season adjustments shared by the single and batch lookups
+SEASONAL_FACTORS = {
+    'spring': {
+        'temperature_adjustment': 0.1,
+        'moisture_adjustment': 0.15,
+        'nutrient_uptake_factor': 1.2,
+        'recommendations': [
+            "Spring is ideal for planting. Soil nutrients are becoming more available.",
+            "Consider adding organic matter to prepare for the growing season."
+        ]
+    },
+    'summer': {
+        'temperature_adjustment': 0.0,
+        'moisture_adjustment': -0.1,
+        'nutrient_uptake_factor': 1.0,
+        'recommendations': [
+            "Monitor soil moisture during hot weather.",
+            "Higher temperatures increase nutrient availability but also loss."
+        ]
+    },
+    'autumn': {
+        'temperature_adjustment': -0.05,
+        'moisture_adjustment': 0.1,
+        'nutrient_uptake_factor': 0.9,
+        'recommendations': [
+            "Good time for soil testing and amendments.",
+            "Prepare soil for winter by adding organic matter."
+        ]
+    },
+    'winter': {
+        'temperature_adjustment': -0.15,
+        'moisture_adjustment': 0.05,
+        'nutrient_uptake_factor': 0.7,
+        'recommendations': [
+            "Soil activity is reduced in winter.",
+            "Plan soil improvements for the next growing season."
+        ]
+    }
+}
+
 def get_seasonal_adjustments(season: str) -> Dict:
     """
     Get seasonal adjustments for soil fertility predictions
     """
-    seasonal_factors = {
-        'spring': {
-            'temperature_adjustment': 0.1,
-            'moisture_adjustment': 0.15,
-            'nutrient_uptake_factor': 1.2,
-            'recommendations': [
-                "Spring is ideal for planting. Soil nutrients are becoming more available.",
-                "Consider adding organic matter to prepare for the growing season."
-            ]
-        },
-        'summer': {
-            'temperature_adjustment': 0.0,
-            'moisture_adjustment': -0.1,
-            'nutrient_uptake_factor': 1.0,
-            'recommendations': [
-                "Monitor soil moisture during hot weather.",
-                "Higher temperatures increase nutrient availability but also loss."
-            ]
-        },
-        'autumn': {
-            'temperature_adjustment': -0.05,
-            'moisture_adjustment': 0.1,
-            'nutrient_uptake_factor': 0.9,
-            'recommendations': [
-                "Good time for soil testing and amendments.",
-                "Prepare soil for winter by adding organic matter."
-            ]
-        },
-        'winter': {
-            'temperature_adjustment': -0.15,
-            'moisture_adjustment': 0.05,
-            'nutrient_uptake_factor': 0.7,
-            'recommendations': [
-                "Soil activity is reduced in winter.",
-                "Plan soil improvements for the next growing season."
-            ]
-        }
-    }
+    factors = SEASONAL_FACTORS.get(season.lower(), SEASONAL_FACTORS['spring'])
+    return {**factors, 'recommendations': list(factors['recommendations'])}
+
+# Impact codes of the batch assessment; IMPACT_LABELS[code] is the string
+# the single-field assessment uses
+IMPACT_NEUTRAL, IMPACT_POSITIVE, IMPACT_NEGATIVE, IMPACT_MIXED = 0, 1, 2, 3
+IMPACT_LABELS = np.array(['neutral', 'positive', 'negative', 'mixed'])
+
+# Recommendation bits, in the order the single-field assessment emits them
+WEATHER_IMPACT_RECOMMENDATIONS = (
+    "Low temperatures may slow nutrient availability. Consider soil warming techniques.",
+    "High temperatures may accelerate nutrient loss. Ensure adequate irrigation.",
+    "Low rainfall may require additional irrigation for optimal nutrient uptake.",
+    "Excessive rainfall may cause nutrient leaching. Consider drainage improvements.",
+    "High humidity may increase disease risk but helps maintain soil moisture.",
+    "Low humidity may increase water stress. Monitor soil moisture closely.",
+)
+
+def _filled(values, default: float) -> np.ndarray:
+    """Float array with missing values (None/NaN) replaced like ``dict.get`` defaults"""
+    array = np.asarray(values, dtype=float)
+    return np.where(np.isnan(array), default, array)
+
+class WeatherImpactBatch:
+    """
+    Per-field impact codes from ``assess_weather_impact_batch``
+    
+    Arrays hold ``IMPACT_*`` codes (uint8) and a bitmask into
+    ``WEATHER_IMPACT_RECOMMENDATIONS``; strings are only built when a field
+    is turned into a dict.
+    """
+    
+    FIELDS = ('temperature_impact', 'rainfall_impact', 'humidity_impact', 'overall_impact')
+    
+    def __init__(self, temperature_impact, rainfall_impact, humidity_impact, overall_impact, recommendation_mask):
+        self.temperature_impact = temperature_impact
+        self.rainfall_impact = rainfall_impact
+        self.humidity_impact = humidity_impact
+        self.overall_impact = overall_impact
+        self.recommendation_mask = recommendation_mask
+    
+    def __len__(self) -> int:
+        return len(self.overall_impact)
+    
+    def labels(self, field: str = 'overall_impact') -> np.ndarray:
+        """String labels for one of ``FIELDS``"""
+        return IMPACT_LABELS[getattr(self, field)]
+    
+    def recommendations(self, index: int) -> List[str]:
+        mask = int(self.recommendation_mask[index])
+        return [text for bit, text in enumerate(WEATHER_IMPACT_RECOMMENDATIONS) if mask & (1 << bit)]
+    
+    def to_dict(self, index: int) -> Dict:
+        """The ``assess_weather_impact_on_soil`` result for one field"""
+        result = {field: str(IMPACT_LABELS[getattr(self, field)[index]]) for field in self.FIELDS}
+        result['recommendations'] = self.recommendations(index)
+        return result
     
-    return seasonal_factors.get(season.lower(), seasonal_factors['spring'])
+    def to_dicts(self) -> List[Dict]:
+        return [self.to_dict(i) for i in range(len(self))]
+    
+    def counts(self, field: str = 'overall_impact') -> Dict[str, int]:
+        """Number of fields per label, for regional summaries"""
+        totals = np.bincount(getattr(self, field), minlength=len(IMPACT_LABELS))
+        return {str(label): int(total) for label, total in zip(IMPACT_LABELS, totals)}
+
+def assess_weather_impact_batch(temperature, monthly_rainfall, humidity,
+                                soil_params: Optional[Dict] = None) -> WeatherImpactBatch:
+    """
+    Vectorized ``assess_weather_impact_on_soil`` over many fields
+    
+    Args:
+        temperature, monthly_rainfall, humidity: per-field arrays; missing
+            values (NaN/None) take the single-field defaults (25, 100, 60)
+        soil_params: per-field soil arrays, accepted for parity with the
+            single-field function, which does not use them either
+        
+    Returns:
+        WeatherImpactBatch with the same classifications, field for field
+    """
+    temp = _filled(temperature, 25)
+    rainfall = _filled(monthly_rainfall, 100)
+    humid = _filled(humidity, 60)
+    
+    cold, hot = temp < 10, temp > 35
+    dry, wet = rainfall < 50, rainfall > 300
+    muggy, arid = humid > 80, humid < 40
+    
+    temperature_impact = np.where(cold | hot, IMPACT_NEGATIVE, IMPACT_POSITIVE).astype(np.uint8)
+    rainfall_impact = np.where(dry | wet, IMPACT_NEGATIVE, IMPACT_POSITIVE).astype(np.uint8)
+    humidity_impact = np.select([muggy, arid], [IMPACT_MIXED, IMPACT_NEGATIVE], IMPACT_NEUTRAL).astype(np.uint8)
+    
+    impacts = np.stack([temperature_impact, rainfall_impact, humidity_impact])
+    positive = (impacts == IMPACT_POSITIVE).sum(axis=0)
+    negative = (impacts == IMPACT_NEGATIVE).sum(axis=0)
+    overall_impact = np.select([positive > negative, negative > positive],
+                               [IMPACT_POSITIVE, IMPACT_NEGATIVE], IMPACT_NEUTRAL).astype(np.uint8)
+    
+    recommendation_mask = np.zeros(len(temp), dtype=np.uint8)
+    for bit, flags in enumerate((cold, hot, dry, wet, muggy, arid)):
+        recommendation_mask |= flags.astype(np.uint8) << bit
+    
+    return WeatherImpactBatch(temperature_impact, rainfall_impact, humidity_impact,
+                              overall_impact, recommendation_mask)
+
+SEASON_NAMES = tuple(SEASONAL_FACTORS)
+_SEASON_ARRAYS = {
+    key: np.array([SEASONAL_FACTORS[season][key] for season in SEASON_NAMES])
+    for key in ('temperature_adjustment', 'moisture_adjustment', 'nutrient_uptake_factor')
+}
+
+def get_seasonal_adjustments_batch(seasons) -> Dict[str, np.ndarray]:
+    """
+    Vectorized ``get_seasonal_adjustments``
+    
+    Returns ``season_code`` (index into ``SEASON_NAMES``; unknown seasons map
+    to spring like the single lookup) and one array per numeric adjustment.
+    Recommendations stay in ``SEASONAL_FACTORS[SEASON_NAMES[code]]``.
+    """
+    unique, inverse = np.unique(np.asarray(seasons, dtype=str), return_inverse=True)
+    spring = SEASON_NAMES.index('spring')
+    unique_codes = np.array([SEASON_NAMES.index(season.lower()) if season.lower() in SEASONAL_FACTORS else spring
+                             for season in unique], dtype=np.uint8)
+    codes = unique_codes[inverse.reshape(-1)] if len(unique) else np.zeros(0, dtype=np.uint8)
+    return {'season_code': codes, **{key: values[codes] for key, values in _SEASON_ARRAYS.items()}}
@@ -0,0 +1,192 @@
+"""
+Shared HTTP client for the weather provider
+
+One ``requests.Session`` with a keep-alive connection pool is reused for
+every call, so lookups skip the TCP/DNS setup after the first request.
+Calls use separate connect and read timeouts, retry transient failures
+(connection errors, timeouts, 5xx, 429) a bounded number of times with
+jittered exponential backoff, stop retrying once a total deadline for the
+whole call has passed, and go through a circuit breaker: after
+repeated failures the upstream is treated as down and calls fail fast until
+a cool-down has passed and a trial call succeeds.
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+WEATHER_API_BASE_URL = os.getenv('WEATHER_API_BASE_URL', 'http://api.openweathermap.org')
+WEATHER_CONNECT_TIMEOUT = float(os.getenv('WEATHER_CONNECT_TIMEOUT', '2'))
+WEATHER_READ_TIMEOUT = float(os.getenv('WEATHER_READ_TIMEOUT', '4'))
+WEATHER_MAX_RETRIES = int(os.getenv('WEATHER_MAX_RETRIES', '2'))
+# Budget for one get_json call including retries and backoff; the flat
+# timeout this client replaced was 10s
+WEATHER_TOTAL_TIMEOUT = float(os.getenv('WEATHER_TOTAL_TIMEOUT', '6'))
+WEATHER_BREAKER_THRESHOLD = int(os.getenv('WEATHER_BREAKER_THRESHOLD', '5'))
+WEATHER_BREAKER_RESET_SECONDS = float(os.getenv('WEATHER_BREAKER_RESET_SECONDS', '30'))
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+class WeatherClientError(Exception):
+    """The weather provider could not be reached or answered with an error"""
+
+class CircuitOpenError(WeatherClientError):
+    """The circuit breaker is open; the call was not attempted"""
+
+class CircuitBreaker:
+    """
+    Closed -> open after ``failure_threshold`` consecutive failures; open ->
+    half-open after ``reset_timeout`` seconds, where one trial call decides
+    whether to close again or re-open.
+    """
+
+    def __init__(self, failure_threshold: int = WEATHER_BREAKER_THRESHOLD,
+                 reset_timeout: float = WEATHER_BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_progress = False
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self.trial_in_progress = False
+            if self.state == 'half_open' and not self.trial_in_progress:
+                self.trial_in_progress = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self.lock:
+            self.state = 'closed'
+            self.failures = 0
+            self.trial_in_progress = False
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+                self.trial_in_progress = False
+
+class WeatherClient:
+    """Pooled, retrying, circuit-broken JSON client for the weather API"""
+
+    def __init__(self, base_url: str = WEATHER_API_BASE_URL,
+                 connect_timeout: float = WEATHER_CONNECT_TIMEOUT,
+                 read_timeout: float = WEATHER_READ_TIMEOUT,
+                 max_retries: int = WEATHER_MAX_RETRIES,
+                 backoff: float = 0.2,
+                 breaker: Optional[CircuitBreaker] = None,
+                 pool_size: int = 16,
+                 total_timeout: float = WEATHER_TOTAL_TIMEOUT):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.total_timeout = total_timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+
+        # Retries are handled here (with jitter and breaker accounting), not by urllib3
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.stats = {'requests': 0, 'retries': 0, 'failures': 0, 'short_circuits': 0}
+        self.stats_lock = threading.Lock()
+
+    def _count(self, key: str) -> None:
+        with self.stats_lock:
+            self.stats[key] += 1
+
+    def _sleep_before_retry(self, attempt: int) -> None:
+        # Full jitter on an exponential base so retries from many threads spread out
+        time.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+
+    def worst_case_seconds(self) -> float:
+        """Longest a ``get_json`` call can take: every attempt timing out plus the largest backoffs, capped by the deadline"""
+        attempts = self.max_retries + 1
+        uncapped = attempts * sum(self.timeout) + sum(self.backoff * (2 ** attempt) for attempt in range(self.max_retries))
+        return min(uncapped, self.total_timeout)
+
+    def _attempt_timeout(self, remaining: float):
+        """(connect, read) timeouts for one attempt, shrunk to fit the time left"""
+        connect = min(self.timeout[0], remaining)
+        return connect, max(min(self.timeout[1], remaining - connect), 0.001)
+
+    def get_json(self, path: str, params: Optional[Dict] = None) -> Dict:
+        """GET ``base_url + path`` and return the decoded JSON body"""
+        if not self.breaker.allow():
+            self._count('short_circuits')
+            raise CircuitOpenError('Weather provider marked down; failing fast')
+
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        deadline = time.monotonic() + self.total_timeout
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                # No retry that could not finish before the deadline
+                if deadline - time.monotonic() <= self.backoff * (2 ** (attempt - 1)):
+                    break
+                self._count('retries')
+                self._sleep_before_retry(attempt - 1)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self._count('requests')
+            try:
+                response = self.session.get(url, params=params, timeout=self._attempt_timeout(remaining))
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                last_error = e
+                continue
+            except requests.exceptions.RequestException as e:
+                last_error = e
+                break
+
+            if response.status_code in RETRYABLE_STATUS:
+                last_error = WeatherClientError(f"HTTP {response.status_code} from {url}")
+                continue
+            if response.status_code >= 400:
+                # Client errors (bad key, unknown city) will not improve on retry
+                # and say nothing about upstream health
+                self.breaker.record_success()
+                raise WeatherClientError(f"HTTP {response.status_code} from {url}")
+            try:
+                data = response.json()
+            except ValueError as e:
+                last_error = WeatherClientError(f"Invalid JSON from {url}: {e}")
+                break
+            self.breaker.record_success()
+            return data
+
+        self._count('failures')
+        self.breaker.record_failure()
+        raise WeatherClientError(str(last_error))
+
+    def get_metrics(self) -> Dict:
+        with self.stats_lock:
+            stats = dict(self.stats)
+        return {
+            **stats,
+            'breaker_state': self.breaker.state,
+            'consecutive_failures': self.breaker.failures,
+            'timeout': list(self.timeout),
+            'total_timeout': self.total_timeout,
+            'base_url': self.base_url
+        }
+
+# Initialize the shared client instance
+weather_client = WeatherClient()
@@ -0,0 +1,233 @@
+"""
+Local time-series store of observed weather
+
+Every successful provider lookup is recorded into a per-location daily
+bucket in SQLite (observation count plus temperature, humidity and hourly
+rain-rate sums). Rolling 7- and 30-day aggregates are kept in a second table
+and updated incrementally on insert: the changed day's contribution is
+swapped in, and days that slide out of the window are subtracted when the
+window advances. Historical lookups are then a single-row read instead of a
+provider call or a rescan of the buckets.
+
+The store also keeps the latest lookup per location (``latest_weather``), so
+web workers that share the database can serve each other's fresh results,
+including those of the background prefetcher, without calling the provider.
+
+Daily rainfall is extrapolated from the observed hourly rain rate (the
+provider reports rain over the last hour), so it is an estimate that gets
+better the more often a location is observed.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+WEATHER_HISTORY_PATH = os.getenv('WEATHER_HISTORY_PATH', os.path.join('instance', 'weather_history.db'))
+WINDOWS = (7, 30)
+RAIN_DAY_MM = 1.0  # a day with at least this much estimated rain counts as a rain day
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_weather (
+    location TEXT NOT NULL,
+    day TEXT NOT NULL,
+    observations INTEGER NOT NULL,
+    temp_sum REAL NOT NULL,
+    humidity_sum REAL NOT NULL,
+    rain_rate_sum REAL NOT NULL,
+    PRIMARY KEY (location, day)
+);
+CREATE TABLE IF NOT EXISTS rolling_weather (
+    location TEXT NOT NULL,
+    window_days INTEGER NOT NULL,
+    as_of TEXT NOT NULL,
+    days INTEGER NOT NULL,
+    temp_sum REAL NOT NULL,
+    humidity_sum REAL NOT NULL,
+    rain_total REAL NOT NULL,
+    rain_days INTEGER NOT NULL,
+    PRIMARY KEY (location, window_days)
+);
+CREATE TABLE IF NOT EXISTS latest_weather (
+    location TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+"""
+
+_ZERO = (0, 0.0, 0.0, 0.0, 0)
+
+def _day_contribution(bucket) -> tuple:
+    """(days, mean temp, mean humidity, rain mm, rain day) a daily bucket adds to a window"""
+    if bucket is None or not bucket[0]:
+        return _ZERO
+    observations, temp_sum, humidity_sum, rain_rate_sum = bucket
+    rain = rain_rate_sum / observations * 24
+    return (1, temp_sum / observations, humidity_sum / observations, rain, int(rain >= RAIN_DAY_MM))
+
+def _window_start(as_of: date, window: int) -> date:
+    return as_of - timedelta(days=window - 1)
+
+class WeatherHistoryStore:
+    """Daily weather buckets with incrementally maintained rolling aggregates"""
+
+    def __init__(self, path: str = WEATHER_HISTORY_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened lazily so importing the module never touches the disk
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _sum_days(self, conn, location: str, first: date, last: date) -> list:
+        """Sum of the day contributions for ``first`` .. ``last`` inclusive"""
+        totals = list(_ZERO)
+        if first > last:
+            return totals
+        rows = conn.execute(
+            "SELECT observations, temp_sum, humidity_sum, rain_rate_sum FROM daily_weather "
+            "WHERE location = ? AND day BETWEEN ? AND ?",
+            (location, first.isoformat(), last.isoformat())
+        )
+        for row in rows:
+            for i, value in enumerate(_day_contribution(row)):
+                totals[i] += value
+        return totals
+
+    def _load_window(self, conn, location: str, window: int, today: date) -> list:
+        """Rolling row for ``window`` advanced to ``today``: [as_of, days, temp, humidity, rain, rain_days]"""
+        row = conn.execute(
+            "SELECT as_of, days, temp_sum, humidity_sum, rain_total, rain_days FROM rolling_weather "
+            "WHERE location = ? AND window_days = ?", (location, window)
+        ).fetchone()
+        if row is None:
+            return [today] + self._sum_days(conn, location, _window_start(today, window), today)
+
+        agg = [date.fromisoformat(row[0])] + list(row[1:])
+        if today > agg[0]:
+            # Days in [old start, new start) leave the window
+            evicted = self._sum_days(conn, location, _window_start(agg[0], window),
+                                     min(agg[0], _window_start(today, window) - timedelta(days=1)))
+            agg[1:] = [total - gone for total, gone in zip(agg[1:], evicted)]
+            agg[0] = today
+        return agg
+
+    def _save_window(self, conn, location: str, window: int, agg: list) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO rolling_weather "
+            "(location, window_days, as_of, days, temp_sum, humidity_sum, rain_total, rain_days) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (location, window, agg[0].isoformat(), *agg[1:])
+        )
+
+    def record(self, location: str, observation: Dict, observed_at: Optional[datetime] = None) -> None:
+        """Add one observation (a ``get_weather_data``-style dict) to its day and the rolling windows"""
+        day = (observed_at or datetime.utcnow()).date()
+        temp = float(observation.get('temperature', 0.0))
+        humidity = float(observation.get('humidity', 0.0))
+        rain_rate = float(observation.get('rainfall') or 0.0)
+
+        with self.lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                old = conn.execute(
+                    "SELECT observations, temp_sum, humidity_sum, rain_rate_sum FROM daily_weather "
+                    "WHERE location = ? AND day = ?", (location, day.isoformat())
+                ).fetchone()
+                new = (1, temp, humidity, rain_rate) if old is None else \
+                    (old[0] + 1, old[1] + temp, old[2] + humidity, old[3] + rain_rate)
+                conn.execute(
+                    "INSERT OR REPLACE INTO daily_weather "
+                    "(location, day, observations, temp_sum, humidity_sum, rain_rate_sum) VALUES (?, ?, ?, ?, ?, ?)",
+                    (location, day.isoformat(), *new)
+                )
+
+                delta = [n - o for n, o in zip(_day_contribution(new), _day_contribution(old))]
+                for window in WINDOWS:
+                    had_row = conn.execute(
+                        "SELECT 1 FROM rolling_weather WHERE location = ? AND window_days = ?", (location, window)
+                    ).fetchone()
+                    agg = self._load_window(conn, location, window, day)
+                    # A freshly built window already summed the new bucket; late
+                    # observations older than the window only update their day
+                    if had_row and _window_start(agg[0], window) <= day <= agg[0]:
+                        agg[1:] = [total + change for total, change in zip(agg[1:], delta)]
+                    self._save_window(conn, location, window, agg)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def get_aggregates(self, location: str, window: int = 30, today: Optional[date] = None) -> Optional[Dict]:
+        """Rolling aggregates over the last ``window`` days, or None if nothing was observed"""
+        if window not in WINDOWS:
+            raise ValueError(f"window must be one of {WINDOWS}")
+        today = today or datetime.utcnow().date()
+
+        with self.lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                stored_as_of = conn.execute(
+                    "SELECT as_of FROM rolling_weather WHERE location = ? AND window_days = ?", (location, window)
+                ).fetchone()
+                if stored_as_of is None:
+                    conn.execute("COMMIT")
+                    return None
+                agg = self._load_window(conn, location, window, today)
+                if agg[0].isoformat() != stored_as_of[0]:
+                    self._save_window(conn, location, window, agg)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+        _, days, temp_sum, humidity_sum, rain_total, rain_days = agg
+        if days <= 0:
+            return None
+        return {
+            'window_days': window,
+            'days_observed': int(days),
+            'avg_temperature': round(temp_sum / days, 2),
+            'avg_humidity': round(humidity_sum / days, 2),
+            'total_rainfall': round(rain_total, 2),
+            'rainfall_days': int(rain_days)
+        }
+
+    def save_latest(self, location: str, data: Dict, fetched_at: float) -> None:
+        """Keep ``data`` as the latest successful lookup for ``location`` unless a newer one is stored"""
+        with self.lock:
+            self._connection().execute(
+                "INSERT INTO latest_weather (location, data, fetched_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(location) DO UPDATE SET data = excluded.data, fetched_at = excluded.fetched_at "
+                "WHERE excluded.fetched_at > latest_weather.fetched_at",
+                (location, json.dumps(data, default=str), fetched_at)
+            )
+
+    def load_latest(self, location: str) -> Optional[Tuple[Dict, float]]:
+        """(data, fetched_at) of the latest stored lookup, or None"""
+        with self.lock:
+            row = self._connection().execute(
+                "SELECT data, fetched_at FROM latest_weather WHERE location = ?", (location,)
+            ).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def close(self) -> None:
+        with self.lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+# Initialize the shared store instance
+weather_history = WeatherHistoryStore()
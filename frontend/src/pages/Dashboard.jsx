@@ -433,8 +433,14 @@ function Dashboard() {
         {/* Weather & Crop Info Combined */}
         <div className="result-card" style={{padding: '20px', background: '#fff', borderRadius: '8px', boxShadow: '0 2px 4px rgba(0,0,0,0.1)'}}>
           <h3 style={{color: '#2c5530', marginBottom: '15px'}}>🌤️ Current Conditions</h3>
-          <p><strong>Weather:</strong> {data.weather_impact.temperature}°C, {data.weather_impact.description}</p>
-          <p><strong>Humidity:</strong> {data.weather_impact.humidity}%</p>
+          {data.weather_status && data.weather_status !== 'ok' ? (
+            <p><strong>Weather:</strong> {data.weather_status === 'pending' ? 'Still loading, refresh in a moment' : 'Unavailable'}</p>
+          ) : (
+            <>
+              <p><strong>Weather:</strong> {data.weather_impact.temperature}°C, {data.weather_impact.description}</p>
+              <p><strong>Humidity:</strong> {data.weather_impact.humidity}%</p>
+            </>
+          )}
           <p><strong>Crop:</strong> {data.soilData.cropType || 'Not specified'}</p>
           <p><strong>Season:</strong> {data.soilData.season}</p>
           <div style={{marginTop: '15px'}}>